@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterable
 
 class AbstractDataType(ABC):
     @abstractmethod
@@ -30,6 +31,31 @@ class AbstractDataType(ABC):
     def __iter__(self):
         ...
 
-    # @abstractmethod
-    # def find_min_greater_than(self, key: int)->Any:
-    #     ...
\ No newline at end of file
+    @abstractmethod
+    def find_max_item_smaller_than(self, key: int)->tuple[int, Any] | None:
+        ...
+
+    @abstractmethod
+    def find_min_greater_than(self, key: int)->Any:
+        ...
+
+    @abstractmethod
+    def find_min_item_greater_than(self, key: int)->tuple[int, Any] | None:
+        ...
+
+    def bulk_load(self, items: Iterable[tuple[int, Any]])->None:
+        """
+        Replaces the contents by the (key, value) items. Backends override it to build the structure in one pass
+        """
+        for key, _ in list(self):
+            self.remove(key)
+        for key, value in items:
+            self.insert(key, value)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups the inserts and removals made inside the block. Backends that rebuild on every change
+        override it to rebuild once, the trees apply each change as it comes
+        """
+        yield self
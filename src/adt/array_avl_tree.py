@@ -0,0 +1,264 @@
+from array import array
+from typing import Any, Iterable
+from src.adt.abstract_data_type import AbstractDataType
+
+NIL = -1
+
+class ArrayAVLTree(AbstractDataType):
+    """
+    AVLTree stored as a structure of arrays: the nodes are indexes into parallel arrays of keys,
+    values, children and heights, instead of one object each.
+    The keys are kept in an array('Q') until one doesn't fit in 64 bits, and then in a list
+    """
+    def __init__(self):
+        self.keys: array | list[int] = array('Q')
+        self.values: list[Any] = list()
+        self.left = array('i')
+        self.right = array('i')
+        self.heights = array('b')
+        self.free: list[int] = list()       # Slots of removed nodes, reused by the next inserts
+        self.root = NIL
+        self.size = 0
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node != NIL:
+            while node != NIL:
+                stack.append(node)
+                node = self.left[node]
+            node = stack.pop()
+            yield self.keys[node], self.values[node]
+            node = self.right[node]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def inorder(self)->list[tuple[int, Any]]:
+        return list(self)
+
+    def insert(self, key: int, value: Any)->None:
+        """
+        Inserts the key in the tree. If the key already exists, its value is replaced
+        """
+        self.root = self._insert(self.root, key, value)
+
+    def _insert(self, root: int, key: int, value: Any)->int:
+        if root == NIL:
+            self.size += 1
+            return self._new_node(key, value)
+        if key < self.keys[root]:
+            self.left[root] = self._insert(self.left[root], key, value)
+        elif key > self.keys[root]:
+            self.right[root] = self._insert(self.right[root], key, value)
+        else:
+            self.values[root] = value
+            return root
+        return self._rebalance(root)
+
+    def bulk_load(self, items: Iterable[tuple[int, Any]])->None:
+        """
+        Replaces the contents by the (key, value) items. Sorted once, the items are the node slots
+        in order, and only the children and heights are left to compute
+        """
+        items = sorted(dict(items).items())
+        keys = [key for key, _ in items]
+        self.keys = array('Q', keys) if not keys or (keys[0] >= 0 and keys[-1] < 2 ** 64) else keys
+        self.values = [value for _, value in items]
+        self.left = array('i', [NIL]) * len(items)
+        self.right = array('i', [NIL]) * len(items)
+        self.heights = array('b', [1]) * len(items)
+        self.free = list()
+        self.size = len(items)
+        self.root = self._build(0, len(items))
+
+    def _build(self, start: int, end: int)->int:
+        if start >= end:
+            return NIL
+        middle = (start + end) // 2
+        self.left[middle] = self._build(start, middle)
+        self.right[middle] = self._build(middle + 1, end)
+        self._update_height(middle)
+        return middle
+
+    def _new_node(self, key: int, value: Any)->int:
+        if isinstance(self.keys, array) and not 0 <= key < 2 ** 64:
+            self.keys = list(self.keys)
+        if self.free:
+            node = self.free.pop()
+            self.keys[node] = key
+            self.values[node] = value
+            self.left[node] = self.right[node] = NIL
+            self.heights[node] = 1
+            return node
+        self.keys.append(key)
+        self.values.append(value)
+        self.left.append(NIL)
+        self.right.append(NIL)
+        self.heights.append(1)
+        return len(self.values) - 1
+
+    def _free_node(self, node: int)->None:
+        self.values[node] = None        # Drops the reference to the value
+        self.free.append(node)
+
+    def search(self, key: int)->Any | None:
+        node = self._search(key)
+        if node == NIL:
+            return None
+        return self.values[node]
+
+    def _search(self, key: int)->int:
+        node = self.root
+        while node != NIL and self.keys[node] != key:
+            node = self.left[node] if key < self.keys[node] else self.right[node]
+        return node
+
+    def update(self, key: int, new_value: Any)->Any | None:
+        """
+        Updates the node value, if found. Else, returns None
+        """
+        node = self._search(key)
+        if node == NIL:
+            return None
+        old_value = self.values[node]
+        self.values[node] = new_value
+        return old_value
+
+    def remove(self, key: int)->Any | None:
+        """
+        Removes the key from the tree, returning its value or None if not found
+        """
+        node = self._search(key)
+        if node == NIL:
+            return None
+        value = self.values[node]
+        self.root = self._remove(self.root, key)
+        self.size -= 1
+        return value
+
+    def _remove(self, root: int, key: int)->int:
+        if key < self.keys[root]:
+            self.left[root] = self._remove(self.left[root], key)
+        elif key > self.keys[root]:
+            self.right[root] = self._remove(self.right[root], key)
+        else:
+            if self.left[root] == NIL or self.right[root] == NIL:
+                child = self.left[root] if self.right[root] == NIL else self.right[root]
+                self._free_node(root)
+                return child
+            successor = self._min_key_node(self.right[root])       # Moves the successor entry into this slot
+            self.keys[root] = self.keys[successor]
+            self.values[root] = self.values[successor]
+            self.right[root] = self._remove_min(self.right[root])
+        return self._rebalance(root)
+
+    def _remove_min(self, root: int)->int:
+        if self.left[root] == NIL:
+            right = self.right[root]
+            self._free_node(root)
+            return right
+        self.left[root] = self._remove_min(self.left[root])
+        return self._rebalance(root)
+
+    def _min_key_node(self, node: int)->int:
+        while self.left[node] != NIL:
+            node = self.left[node]
+        return node
+
+    def find_max_smaller_than(self, key: int)->Any | None:
+        """
+        Returns the value of the greatest key that is smaller or equal than key
+        """
+        node = self._find_max_smaller_than(key)
+        return None if node == NIL else self.values[node]
+
+    def find_max_item_smaller_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the greatest key that is smaller or equal than key
+        """
+        node = self._find_max_smaller_than(key)
+        return None if node == NIL else (self.keys[node], self.values[node])
+
+    def _find_max_smaller_than(self, key: int)->int:
+        keys, left, right = self.keys, self.left, self.right
+        max_node = NIL
+        node = self.root
+        while node != NIL:
+            node_key = keys[node]
+            if node_key == key:
+                return node
+            if node_key < key:
+                max_node = node
+                node = right[node]
+            else:
+                node = left[node]
+        return max_node
+
+    def find_min_greater_than(self, key: int)->Any | None:
+        """
+        Returns the value of the smallest key that is greater or equal than key
+        """
+        node = self._find_min_greater_than(key)
+        return None if node == NIL else self.values[node]
+
+    def find_min_item_greater_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the smallest key that is greater or equal than key
+        """
+        node = self._find_min_greater_than(key)
+        return None if node == NIL else (self.keys[node], self.values[node])
+
+    def _find_min_greater_than(self, key: int)->int:
+        keys, left, right = self.keys, self.left, self.right
+        min_node = NIL
+        node = self.root
+        while node != NIL:
+            node_key = keys[node]
+            if node_key == key:
+                return node
+            if node_key > key:
+                min_node = node
+                node = left[node]
+            else:
+                node = right[node]
+        return min_node
+
+    # Balancing
+    def _height(self, node: int)->int:
+        return 0 if node == NIL else self.heights[node]
+
+    def _update_height(self, node: int)->None:
+        self.heights[node] = 1 + max(self._height(self.left[node]), self._height(self.right[node]))
+
+    def _balance_factor(self, node: int)->int:
+        return self._height(self.left[node]) - self._height(self.right[node])
+
+    def _rotate_left(self, root: int)->int:
+        pivot = self.right[root]
+        self.right[root] = self.left[pivot]
+        self.left[pivot] = root
+        self._update_height(root)
+        self._update_height(pivot)
+        return pivot
+
+    def _rotate_right(self, root: int)->int:
+        pivot = self.left[root]
+        self.left[root] = self.right[pivot]
+        self.right[pivot] = root
+        self._update_height(root)
+        self._update_height(pivot)
+        return pivot
+
+    def _rebalance(self, root: int)->int:
+        self._update_height(root)
+        balance = self._balance_factor(root)
+        if balance > 1:                 # Left heavy
+            if self._balance_factor(self.left[root]) < 0:
+                self.left[root] = self._rotate_left(self.left[root])
+            return self._rotate_right(root)
+        if balance < -1:                # Right heavy
+            if self._balance_factor(self.right[root]) > 0:
+                self.right[root] = self._rotate_right(self.right[root])
+            return self._rotate_left(root)
+        return root
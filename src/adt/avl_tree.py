@@ -0,0 +1,233 @@
+from typing import Any, Iterable
+from src.adt.abstract_data_type import AbstractDataType
+
+class AVLNode:
+    __slots__ = ('left', 'right', 'key', 'value', 'height')
+
+    def __init__(self, key: int, value: Any):
+        self.left = None
+        self.right = None
+        self.key = key
+        self.value = value
+        self.height = 1
+
+class AVLTree(AbstractDataType):
+    """
+    Self-balancing binary search tree.
+    The height is kept under ~1.44 log2(n), so every operation is O(log n)
+    no matter the order the ring positions are inserted
+    """
+    def __init__(self):
+        self.root: AVLNode | None = None
+        self.size = 0
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.value
+            node = node.right
+
+    def __len__(self) -> int:
+        return self.size
+
+    def inorder(self)->list[tuple[int, Any]]:
+        return list(self)
+
+    def insert(self, key: int, value: Any)->None:
+        """
+        Inserts the key in the tree. If the key already exists, its value is replaced
+        """
+        self.root = self._insert(self.root, key, value)
+
+    def _insert(self, root: AVLNode | None, key: int, value: Any)->AVLNode:
+        if root is None:
+            self.size += 1
+            return AVLNode(key, value)
+        if key < root.key:
+            root.left = self._insert(root.left, key, value)
+        elif key > root.key:
+            root.right = self._insert(root.right, key, value)
+        else:
+            root.value = value
+            return root
+        return self._rebalance(root)
+
+    def bulk_load(self, items: Iterable[tuple[int, Any]])->None:
+        """
+        Replaces the contents by the (key, value) items, building a balanced tree from them sorted once
+        """
+        items = sorted(dict(items).items())
+        self.root = self._build(items, 0, len(items))
+        self.size = len(items)
+
+    def _build(self, items: list[tuple[int, Any]], start: int, end: int)->AVLNode | None:
+        if start >= end:
+            return None
+        middle = (start + end) // 2
+        root = AVLNode(*items[middle])
+        root.left = self._build(items, start, middle)
+        root.right = self._build(items, middle + 1, end)
+        self._update_height(root)
+        return root
+
+    def search(self, key: int)->Any | None:
+        node = self._search(key)
+        if node is None:
+            return None
+        return node.value
+
+    def _search(self, key: int)->AVLNode | None:
+        node = self.root
+        while node is not None and node.key != key:
+            node = node.left if key < node.key else node.right
+        return node
+
+    def update(self, key: int, new_value: Any)->Any | None:
+        """
+        Updates the node value, if found. Else, returns None
+        """
+        node = self._search(key)
+        if node is None:
+            return None
+        old_value = node.value
+        node.value = new_value
+        return old_value
+
+    def remove(self, key: int)->Any | None:
+        """
+        Removes the key from the tree, returning its value or None if not found
+        """
+        node = self._search(key)
+        if node is None:
+            return None
+        self.root = self._remove(self.root, key)
+        self.size -= 1
+        return node.value
+
+    def _remove(self, root: AVLNode | None, key: int)->AVLNode | None:
+        if root is None:
+            return None
+        if key < root.key:
+            root.left = self._remove(root.left, key)
+        elif key > root.key:
+            root.right = self._remove(root.right, key)
+        else:
+            if root.left is None:
+                return root.right
+            if root.right is None:
+                return root.left
+            successor = self._min_key_node(root.right)
+            root.right = self._remove_min(root.right)
+            successor.left = root.left
+            successor.right = root.right
+            root = successor
+        return self._rebalance(root)
+
+    def _remove_min(self, root: AVLNode)->AVLNode | None:
+        if root.left is None:
+            return root.right
+        root.left = self._remove_min(root.left)
+        return self._rebalance(root)
+
+    def _min_key_node(self, node: AVLNode)->AVLNode:
+        while node.left is not None:
+            node = node.left
+        return node
+
+    def find_max_smaller_than(self, key: int)->Any | None:
+        """
+        Returns the value of the greatest key that is smaller or equal than key
+        """
+        node = self._find_max_smaller_than(key)
+        return None if node is None else node.value
+
+    def find_max_item_smaller_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the greatest key that is smaller or equal than key
+        """
+        node = self._find_max_smaller_than(key)
+        return None if node is None else (node.key, node.value)
+
+    def _find_max_smaller_than(self, key: int)->AVLNode | None:
+        max_node = None
+        node = self.root
+        while node is not None:
+            if node.key == key:
+                return node
+            if node.key < key:
+                max_node = node
+                node = node.right
+            else:
+                node = node.left
+        return max_node
+
+    def find_min_greater_than(self, key: int)->Any | None:
+        """
+        Returns the value of the smallest key that is greater or equal than key
+        """
+        node = self._find_min_greater_than(key)
+        return None if node is None else node.value
+
+    def find_min_item_greater_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the smallest key that is greater or equal than key
+        """
+        node = self._find_min_greater_than(key)
+        return None if node is None else (node.key, node.value)
+
+    def _find_min_greater_than(self, key: int)->AVLNode | None:
+        min_node = None
+        node = self.root
+        while node is not None:
+            if node.key == key:
+                return node
+            if node.key > key:
+                min_node = node
+                node = node.left
+            else:
+                node = node.right
+        return min_node
+
+    # Balancing
+    def _height(self, node: AVLNode | None)->int:
+        return 0 if node is None else node.height
+
+    def _update_height(self, node: AVLNode)->None:
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+
+    def _balance_factor(self, node: AVLNode)->int:
+        return self._height(node.left) - self._height(node.right)
+
+    def _rotate_left(self, root: AVLNode)->AVLNode:
+        pivot = root.right
+        root.right = pivot.left
+        pivot.left = root
+        self._update_height(root)
+        self._update_height(pivot)
+        return pivot
+
+    def _rotate_right(self, root: AVLNode)->AVLNode:
+        pivot = root.left
+        root.left = pivot.right
+        pivot.right = root
+        self._update_height(root)
+        self._update_height(pivot)
+        return pivot
+
+    def _rebalance(self, root: AVLNode)->AVLNode:
+        self._update_height(root)
+        balance = self._balance_factor(root)
+        if balance > 1:                 # Left heavy
+            if self._balance_factor(root.left) < 0:
+                root.left = self._rotate_left(root.left)
+            return self._rotate_right(root)
+        if balance < -1:                # Right heavy
+            if self._balance_factor(root.right) > 0:
+                root.right = self._rotate_right(root.right)
+            return self._rotate_left(root)
+        return root
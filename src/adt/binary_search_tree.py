@@ -1,7 +1,9 @@
-from typing import Any
+from typing import Any, Iterable
 from src.adt.abstract_data_type import AbstractDataType
 
 class BSTNode:
+    __slots__ = ('left', 'right', 'key', 'value')
+
     def __init__(self, key: int, value: Any):
         self.left = None
         self.right = None
@@ -13,57 +15,78 @@ class BinarySearchTree(AbstractDataType):
         self.root: BSTNode | None = None
 
     def __iter__(self):
-        return self.inorder()
+        """
+        Yields the (key, value) pairs in order, using a stack of at most the tree height
+        """
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.value
+            node = node.right
 
     def insert(self, key: int, value: Any):
+        new_node = BSTNode(key, value)
         if self.root is None:
-            self.root = BSTNode(key, value)
-        else:
-            self._insert(self.root, key, value)
-
-    def _insert(self, root, key, value):
-        if key < root.key:
-            if root.left is None:
-                root.left = BSTNode(key, value)
-            else:
-                self._insert(root.left, key, value)
-        else:
-            if root.right is None:
-                root.right = BSTNode(key, value)
+            self.root = new_node
+            return
+        root = self.root
+        while True:
+            if key < root.key:
+                if root.left is None:
+                    root.left = new_node
+                    return
+                root = root.left
             else:
-                self._insert(root.right, key, value)
+                if root.right is None:
+                    root.right = new_node
+                    return
+                root = root.right
+
+    def bulk_load(self, items: Iterable[tuple[int, Any]])->None:
+        """
+        Replaces the contents by the (key, value) items, building a balanced tree from them sorted once
+        """
+        items = sorted(dict(items).items())
+        self.root = self._build(items, 0, len(items))
+
+    def _build(self, items: list[tuple[int, Any]], start: int, end: int)->BSTNode | None:
+        if start >= end:
+            return None
+        middle = (start + end) // 2
+        root = BSTNode(*items[middle])
+        root.left = self._build(items, start, middle)
+        root.right = self._build(items, middle + 1, end)
+        return root
 
     def search(self, key)-> Any | None:
-        return self._search(self.root, key).value
+        node = self._search(key)
+        if node is None:
+            return None
+        return node.value
 
-    def _search(self, root, key)->BSTNode:
-        if root is None or root.key == key:
-            return root
-        if key < root.key:
-            return self._search(root.left, key)
-        return self._search(root.right, key)
+    def _search(self, key)->BSTNode | None:
+        root = self.root
+        while root is not None and root.key != key:
+            root = root.left if key < root.key else root.right
+        return root
 
     def update(self, key: int, new_value: Any)->Any | None:
         """
         Updates the node value, if found. Else, returns None
         """
-        node = self.search(key)
+        node = self._search(key)
         if node is None:
             return None
         old_value = node.value
         node.value = new_value
         return old_value
     
-    def inorder(self)->list[Any | None]:
-        return self._inorder(self.root)
-
-    def _inorder(self, root):
-        res = []
-        if root:
-            res = self._inorder(root.left)
-            res.append((root.key, root.value))
-            res = res + self._inorder(root.right)
-        return res
+    def inorder(self)->list[tuple[int, Any]]:
+        return list(self)
 
     def print_tree(self):
         lines = self._build_tree_string(self.root, 0, False, '-')[0]
@@ -123,80 +146,100 @@ class BinarySearchTree(AbstractDataType):
 
         return new_box, len(new_box[0]), new_root_start, new_root_end
 
-    def remove(self, key: str)->BSTNode | None:
-        return self._remove(self.root, key)
-
-    def _remove(self, root, key):
+    def remove(self, key: int)->Any | None:
+        """
+        Removes the key from the tree, returning its value or None if not found
+        """
+        parent = None
+        root = self.root
+        while root is not None and root.key != key:
+            parent = root
+            root = root.left if key < root.key else root.right
         if root is None:
-            return root
+            return None
+        removed_value = root.value
 
-        if root.key > key:
-            root.left = self._remove(root.left, key)
+        if root.left is not None and root.right is not None:
+            # Replaces the node by its successor and removes the successor instead
+            successor_parent = root
+            successor = root.right
+            while successor.left is not None:
+                successor_parent = successor
+                successor = successor.left
+            root.key = successor.key
+            root.value = successor.value
+            parent, root = successor_parent, successor
 
-        elif root.key < key:
-            root.right = self._remove(root.right, key)
+        child = root.left if root.left is not None else root.right
+        if parent is None:
+            self.root = child
+        elif parent.left is root:
+            parent.left = child
         else:
-            if root.left is None:
-                return root.right
-            elif root.right is None:
-                return root.left
-
-            temp = self._min_key_node(root.right)
-            root.key = temp.key
-            root.right = self._remove(root.right, temp.key)
-
-        return root
+            parent.right = child
+        return removed_value
 
-    def _min_key_node(self, node):
-        current = node
-        while current.left is not None:
-            current = current.left
-        return current
-    
-    def find_max_smaller_than(self, key: int)->Any:
+    def find_max_smaller_than(self, key: int)->Any | None:
         """
         Returns any value that was stored in this node
         """
-        node = self._find_max_smaller_than(self.root, key, None)
-        print(node)
-        print(node.key)
-        print(node.value)
-
+        node = self._find_max_smaller_than(key)
+        if node is None:
+            return None
         return node.value
 
-    def _find_max_smaller_than(self, root, key: int, max_node)->BSTNode:
-        if root is None:
-            return max_node
-        
-        if root.key == key:         # If root is equal, there can't be any smaller node for key
-            return root
-        
-        if root.key < key:          # If root is less than key: int, we can try to go right and increase our node keyue
-            max_node = root
-            return self._find_max_smaller_than(root.right, key, max_node)
-        
-        else:                       # If root is greater, we can only go try to get an node with smaller number
-            return self._find_max_smaller_than(root.left, key, max_node)
+    def find_max_item_smaller_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the node found by find_max_smaller_than
+        """
+        node = self._find_max_smaller_than(key)
+        if node is None:
+            return None
+        return node.key, node.value
+
+    def _find_max_smaller_than(self, key: int)->BSTNode | None:
+        max_node = None
+        root = self.root
+        while root is not None:
+            if root.key == key:         # If root is equal, there can't be any smaller node for key
+                return root
+            if root.key < key:          # If root is less than key: int, we can try to go right and increase our node keyue
+                max_node = root
+                root = root.right
+            else:                       # If root is greater, we can only go try to get an node with smaller number
+                root = root.left
+        return max_node
         
-    def find_min_greater_than(self, key: int)->Any:
+    def find_min_greater_than(self, key: int)->Any | None:
         """
         Returns any value that was stored in this node
         """
-        return self._find_min_greater_than(self.root, key, None).value
+        node = self._find_min_greater_than(key)
+        if node is None:
+            return None
+        return node.value
 
-    def _find_min_greater_than(self, root, key: int, max_node)->BSTNode:
-        if root is None:
-            return max_node
-        
-        if root.key == key:         # If root is equal, there can't be any smaller node for key
-            return root
-        
-        if root.key > key:          # If root is greater than key: int, we can try to go left and decreate our node key
-            max_node = root
-            return self._find_min_greater_than(root.right, key, max_node)
-        
-        else:                       # If root is less, we can only go try to get an node with a greater number
-            return self._find_min_greater_than(root.left, key, max_node)
+    def find_min_item_greater_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the smallest key that is greater or equal than key
+        """
+        node = self._find_min_greater_than(key)
+        if node is None:
+            return None
+        return node.key, node.value
+
+    def _find_min_greater_than(self, key: int)->BSTNode | None:
+        min_node = None
+        root = self.root
+        while root is not None:
+            if root.key == key:         # If root is equal, there can't be any greater node for key
+                return root
+            if root.key > key:          # If root is greater than key: int, we can try to go left and decreate our node key
+                min_node = root
+                root = root.left
+            else:                       # If root is less, we can only go try to get an node with a greater number
+                root = root.right
+        return min_node
         
 if __name__ == "__main__":
     bst = BinarySearchTree()
@@ -0,0 +1,191 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Any
+from src.adt.abstract_data_type import AbstractDataType
+
+MAX_ARRAY_KEY = 2 ** 64 - 1
+
+class SortedArray(AbstractDataType):
+    """
+    Ring index stored as two parallel arrays sorted by key.
+    Keys live in a contiguous array('Q') while they fit in 64 bits, falling back to
+    a list for wider hashes (e.g. md5). Lookups are a bisect over the keys, so it is
+    meant for read heavy rings where the positions rarely change.
+    """
+    def __init__(self):
+        self.keys: array | list[int] = array('Q')
+        self.values: list[Any] = []
+        self._pending: dict[int, Any] | None = None
+        self._removed = object()
+
+    def __iter__(self):
+        self._flush()
+        return zip(self.keys, self.values)
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self.keys)
+
+    def inorder(self)->list[tuple[int, Any]]:
+        return list(self)
+
+    def insert(self, key: int, value: Any)->None:
+        """
+        Inserts the key in its sorted position. If the key already exists, its value is replaced
+        """
+        if self._pending is not None:
+            self._pending[key] = value
+            return
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            self.values[index] = value
+            return
+        self._ensure_key_fits(key)
+        self.keys.insert(index, key)
+        self.values.insert(index, value)
+
+    def search(self, key: int)->Any | None:
+        """
+        Inside a batch, keys changed by the batch are answered from the buffer, without rebuilding
+        """
+        pending = self._pending
+        if pending and key in pending:
+            value = pending[key]
+            return None if value is self._removed else value
+        index = self._array_index(key)
+        if index is None:
+            return None
+        return self.values[index]
+
+    def update(self, key: int, new_value: Any)->Any | None:
+        """
+        Updates the value of the key, if found. Else, returns None
+        """
+        index = self._index(key)
+        if index is None:
+            return None
+        old_value = self.values[index]
+        self.values[index] = new_value
+        return old_value
+
+    def remove(self, key: int)->Any | None:
+        """
+        Removes the key, returning its value or None if not found
+        """
+        if self._pending is not None:
+            value = self._pending.get(key, self._removed)
+            if value is self._removed:
+                index = self._array_index(key)
+                value = None if index is None else self.values[index]
+            self._pending[key] = self._removed
+            return value
+        index = self._array_index(key)
+        if index is None:
+            return None
+        value = self.values[index]
+        del self.keys[index]
+        del self.values[index]
+        return value
+
+    def find_max_smaller_than(self, key: int)->Any | None:
+        """
+        Returns the value of the greatest key that is smaller or equal than key
+        """
+        self._flush()
+        index = bisect_right(self.keys, key) - 1
+        if index < 0:
+            return None
+        return self.values[index]
+
+    def find_max_item_smaller_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the greatest key that is smaller or equal than key
+        """
+        self._flush()
+        index = bisect_right(self.keys, key) - 1
+        if index < 0:
+            return None
+        return self.keys[index], self.values[index]
+
+    def find_min_greater_than(self, key: int)->Any | None:
+        """
+        Returns the value of the smallest key that is greater or equal than key
+        """
+        self._flush()
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys):
+            return None
+        return self.values[index]
+
+    def find_min_item_greater_than(self, key: int)->tuple[int, Any] | None:
+        """
+        Returns the (key, value) of the smallest key that is greater or equal than key
+        """
+        self._flush()
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys):
+            return None
+        return self.keys[index], self.values[index]
+
+    @contextmanager
+    def batch(self):
+        """
+        Buffers inserts and removals and rebuilds the arrays once when the block exits.
+        Reads inside the block see the changes already made
+        """
+        if self._pending is not None:       # Nested batches are merged into the outer one
+            yield self
+            return
+        self._pending = {}
+        try:
+            yield self
+        finally:
+            self._flush(end_batch=True)
+
+    def bulk_load(self, items: list[tuple[int, Any]])->None:
+        """
+        Replaces the contents by the (key, value) items, sorting them once
+        """
+        self._pending = None
+        merged = dict(items)
+        self._rebuild(sorted(merged.items()))
+
+    def _index(self, key: int)->int | None:
+        self._flush()
+        return self._array_index(key)
+
+    def _array_index(self, key: int)->int | None:
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def _flush(self, end_batch: bool = False)->None:
+        """
+        Applies the buffered changes of a batch with a single sort
+        """
+        pending = self._pending
+        if pending is None:
+            return
+        if pending:
+            merged = dict(zip(self.keys, self.values))
+            for key, value in pending.items():
+                if value is self._removed:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            self._rebuild(sorted(merged.items()))
+        self._pending = None if end_batch else {}
+
+    def _rebuild(self, items: list[tuple[int, Any]])->None:
+        keys = [key for key, _ in items]
+        if keys and keys[-1] > MAX_ARRAY_KEY:
+            self.keys = keys
+        else:
+            self.keys = array('Q', keys)
+        self.values = [value for _, value in items]
+
+    def _ensure_key_fits(self, key: int)->None:
+        if isinstance(self.keys, array) and key > MAX_ARRAY_KEY:
+            self.keys = list(self.keys)
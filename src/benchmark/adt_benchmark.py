@@ -0,0 +1,63 @@
+"""
+Compares the ring ADT backends on split sequences.
+Run with: python -m src.benchmark.adt_benchmark
+"""
+import random
+import sys
+import time
+from src.adt.abstract_data_type import AbstractDataType
+from src.adt.array_avl_tree import ArrayAVLTree
+from src.adt.avl_tree import AVLTree
+from src.adt.binary_search_tree import BinarySearchTree
+from src.adt.sorted_array import SortedArray
+
+HASH_SPACE = 2 ** 128
+
+def sorted_split_positions(positions_count: int)->list[int]:
+    """
+    Adversarial sequence: every split lands after the previous one, like a ring
+    where the inserts keep hitting the last arc
+    """
+    step = HASH_SPACE // (positions_count + 1)
+    return [step * (i + 1) for i in range(positions_count)]
+
+def random_split_positions(positions_count: int, seed: int = 42)->list[int]:
+    rng = random.Random(seed)
+    return [rng.randrange(1, HASH_SPACE) for _ in range(positions_count)]
+
+def run(adt: AbstractDataType, positions: list[int], lookups: list[int])->dict:
+    result = {'insert_s': None, 'lookup_s': None}
+    try:
+        adt.insert(0, 0)
+        start = time.perf_counter()
+        for position in positions:
+            adt.insert(position, position)
+        result['insert_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key_hash in lookups:
+            adt.find_max_smaller_than(key_hash)
+        result['lookup_s'] = time.perf_counter() - start
+    except RecursionError:
+        result['error'] = 'RecursionError'
+    return result
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 2_000, 10_000]
+    lookups = random_split_positions(10_000, seed=7)
+    backends = {'bst': BinarySearchTree, 'avl': AVLTree, 'avl_soa': ArrayAVLTree, 'array': SortedArray}
+    sequences = {'sorted': sorted_split_positions, 'random': random_split_positions}
+
+    print(f'{"sequence":<8} {"positions":>9} {"backend":<6} {"insert (s)":>11} {"10k lookups (s)":>16}')
+    for sequence_name, sequence in sequences.items():
+        for size in sizes:
+            positions = sequence(size)
+            for backend_name, backend in backends.items():
+                result = run(backend(), positions, lookups)
+                if 'error' in result:
+                    print(f'{sequence_name:<8} {size:>9} {backend_name:<6} {result["error"]:>28}')
+                    continue
+                print(f'{sequence_name:<8} {size:>9} {backend_name:<6} {result["insert_s"]:>11.4f} {result["lookup_s"]:>16.4f}')
+
+if __name__ == '__main__':
+    main()
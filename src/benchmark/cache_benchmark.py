@@ -0,0 +1,57 @@
+"""
+Measures the read cache on Zipfian reads: gets/s and hit ratio of a ring without and with caches of several sizes,
+for a plain ring, a ring with 3 replicas and a ring with its values in log storages.
+Run with: python -m src.benchmark.cache_benchmark [keys] [reads]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from itertools import accumulate
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.log_storage import LogStorage
+from src.consistent_hash_ring.read_cache import ReadCache
+from src.consistent_hash_ring.ring import Ring
+
+def zipf_reads(keys: list[str], reads_count: int, exponent: float = 1.0, seed: int = 0)->list[str]:
+    weights = list(accumulate(1 / rank ** exponent for rank in range(1, len(keys) + 1)))
+    return random.Random(seed).choices(keys, cum_weights=weights, k=reads_count)
+
+def run(reads: list[str], keys: list[str], cache: ReadCache | None, ring_type: str, directory: str)->float:
+    node_storage = (lambda index: LogStorage(os.path.join(directory, str(index)))) if ring_type == 'log' else None
+    replication_factor = 3 if ring_type == 'replicated' else 1
+    ring = Ring(1_000, AVLTree(), vnodes=16, replication_factor=replication_factor, node_storage=node_storage, read_cache=cache)
+    ring.insert_many((key, key) for key in keys)
+    start = time.perf_counter()
+    for key in reads:
+        ring.get(key)
+    gets = len(reads) / (time.perf_counter() - start)
+    ring.close()
+    return gets
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    reads_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    keys = [f'key{i}' for i in range(keys_count)]
+    reads = zipf_reads(keys, reads_count)
+    print(f'{keys_count} keys, {reads_count} Zipfian reads')
+    print(f'{"ring":<11} {"cache":<16} {"gets/s":>10} {"hit ratio":>10}')
+    caches = {
+        'off': lambda: None,
+        'lru 1000': lambda: ReadCache(1_000),
+        'lru 10000': lambda: ReadCache(10_000),
+        'tinylfu 1000': lambda: ReadCache(1_000, admission=True),
+        'tinylfu 10000': lambda: ReadCache(10_000, admission=True),
+        'lru 10000 hot': lambda: ReadCache(10_000, top_k=10),
+    }
+    for ring_type in ['plain', 'replicated', 'log']:
+        for name, build in caches.items():
+            cache = build()
+            with tempfile.TemporaryDirectory() as directory:
+                gets = run(reads, keys, cache, ring_type, directory)
+            hit_ratio = f'{cache.hit_ratio:.3f}' if cache is not None else '-'
+            print(f'{ring_type:<11} {name:<16} {gets:>10.0f} {hit_ratio:>10}')
+
+if __name__ == '__main__':
+    main()
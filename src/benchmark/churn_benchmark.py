@@ -0,0 +1,60 @@
+"""
+Runs a steady insert/delete churn against rings with different scaling policies
+and reports how often nodes are split and merged.
+Run with: python -m src.benchmark.churn_benchmark [operations] [working set]
+"""
+import random
+import sys
+import time
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.ring import Ring
+from src.consistent_hash_ring.scaling_policy import ScalingPolicy
+
+NODE_CAPACITY = 100
+
+POLICIES = {
+    'split 1.0 / merge 0.0': dict(split_load=1.0, merge_load=0.0),
+    'split 1.0 / merge 0.25': dict(split_load=1.0, merge_load=0.25),
+    'split 1.0 / merge 0.45': dict(split_load=1.0, merge_load=0.45),
+    'split 0.9 / merge 0.25 / cooldown': dict(split_load=0.9, merge_load=0.25, cooldown=0.05),
+}
+
+def run(policy: ScalingPolicy, operations: int, working_set: int, seed: int = 42)->dict:
+    rng = random.Random(seed)
+    ring = Ring(NODE_CAPACITY, AVLTree(), policy=policy)
+    keys = [f'key{i}' for i in range(working_set)]
+    ring.insert_many((key, key) for key in keys)
+    next_key = working_set
+    policy.reset_stats()
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        # The working set drifts around its initial size
+        if rng.random() < 0.5 or len(keys) < working_set // 2:
+            key = f'key{next_key}'
+            next_key += 1
+            ring.insert(key, key)
+            keys.append(key)
+        else:
+            index = rng.randrange(len(keys))
+            keys[index], keys[-1] = keys[-1], keys[index]
+            ring.delete(keys.pop())
+    elapsed = time.perf_counter() - start
+
+    stats = policy.stats()
+    stats['ops_per_second'] = operations / elapsed
+    stats['nodes'] = len(list(ring.nodes()))
+    return stats
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    working_set = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    print(f'{operations} operations over ~{working_set} keys, node capacity {NODE_CAPACITY}')
+    print(f'{"policy":<34} {"ops/s":>8} {"splits/s":>9} {"merges/s":>9} {"rejected":>9} {"nodes":>6}')
+    for name, parameters in POLICIES.items():
+        stats = run(ScalingPolicy(**parameters), operations, working_set)
+        print(f'{name:<34} {stats["ops_per_second"]:>8.0f} {stats["splits_per_second"]:>9.1f} '
+              f'{stats["merges_per_second"]:>9.1f} {stats["rejected_merges"]:>9} {stats["nodes"]:>6}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the throughput of a Ring behind one global lock with ConcurrentRing, for 1 to 8 threads
+running a mix of 90% reads and 10% inserts over their own keys.
+Parallel speed up needs a free-threaded build (python3.13t); with the GIL the numbers show the locking overhead.
+Run with: python -m src.benchmark.concurrency_benchmark [operations per thread]
+"""
+import sys
+import threading
+import time
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.concurrent_ring import ConcurrentRing
+from src.consistent_hash_ring.ring import Ring
+
+NODES_COUNT = 16
+PRELOADED_KEYS = 20_000
+
+class GlobalLockRing:
+    def __init__(self, ring: Ring) -> None:
+        self.ring = ring
+        self.lock = threading.Lock()
+
+    def insert(self, key, value):
+        with self.lock:
+            self.ring.insert(key, value)
+
+    def get(self, key):
+        with self.lock:
+            return self.ring.get(key)
+
+def build(ring: Ring) -> Ring:
+    for _ in range(NODES_COUNT - 1):
+        ring.add_node()
+    ring.insert_many((f'key{i}', i) for i in range(PRELOADED_KEYS))
+    return ring
+
+def run(ring, threads_count: int, operations: int) -> float:
+    def worker(thread_index: int):
+        for i in range(operations):
+            if i % 10 == 0:
+                ring.insert(f'thread{thread_index}-key{i}', i)
+            else:
+                ring.get(f'key{(thread_index * operations + i) % PRELOADED_KEYS}')
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return threads_count * operations / (time.perf_counter() - start)
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'Python {sys.version.split()[0]}, GIL {"enabled" if gil_enabled else "disabled"}, {NODES_COUNT} nodes, {operations} operations per thread')
+    print(f'{"threads":>7} {"global lock ops/s":>18} {"concurrent ops/s":>17} {"ratio":>6}')
+    for threads_count in [1, 2, 4, 8]:
+        global_lock = run(GlobalLockRing(build(Ring(10 ** 6, AVLTree(), vnodes=8))), threads_count, operations)
+        concurrent = run(build(ConcurrentRing(10 ** 6, AVLTree(), vnodes=8)), threads_count, operations)
+        print(f'{threads_count:>7} {global_lock:>18.0f} {concurrent:>17.0f} {concurrent / global_lock:>6.2f}')
+
+if __name__ == '__main__':
+    main()
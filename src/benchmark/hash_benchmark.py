@@ -0,0 +1,43 @@
+"""
+Measures the hashes per second of each registered hash function.
+Run with: python -m src.benchmark.hash_benchmark [keys]
+"""
+import hashlib
+import os
+import sys
+import time
+from src.hash.hash import Hasher, HASH_FUNCTIONS
+
+def legacy_md5(key: str)->int:
+    """
+    The hash function before the registry, for reference
+    """
+    hash_value = int(hashlib.md5(key.encode()).hexdigest(), 16)
+    if 'MAX_HASH_SIZE' in os.environ:
+        return hash_value % int(os.environ['MAX_HASH_SIZE'])
+    return hash_value
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    keys = [f'user:{i}:session' for i in range(keys_count)]
+
+    print(f'{"function":<12} {"hash (M/s)":>11} {"hash_many (M/s)":>16}')
+    start = time.perf_counter()
+    for key in keys:
+        legacy_md5(key)
+    print(f'{"legacy md5":<12} {keys_count / (time.perf_counter() - start) / 1e6:>11.2f}')
+
+    for name in HASH_FUNCTIONS:
+        hasher = Hasher(name)
+        start = time.perf_counter()
+        for key in keys:
+            hasher(key)
+        single = keys_count / (time.perf_counter() - start) / 1e6
+
+        start = time.perf_counter()
+        hasher.hash_many(keys)
+        batch = keys_count / (time.perf_counter() - start) / 1e6
+        print(f'{name:<12} {single:>11.2f} {batch:>16.2f}')
+
+if __name__ == '__main__':
+    main()
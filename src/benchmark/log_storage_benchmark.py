@@ -0,0 +1,74 @@
+"""
+Compares the node storages: dicts and LogStorage, which keeps the values in memory-mapped segments.
+Reports writes/s, reads/s, the Python heap used by each, measured with tracemalloc, and how long
+LogStorage takes to reopen from its saved index and, as after a crash, by scanning the log.
+Run with: python -m src.benchmark.log_storage_benchmark [keys] [value bytes]
+"""
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from src.consistent_hash_ring.log_storage import LogStorage
+
+def fill(storage, keys: list[str], value_size: int)->float:
+    start = time.perf_counter()
+    for key in keys:
+        storage[key] = bytes(value_size)
+    return len(keys) / (time.perf_counter() - start)
+
+def heap_bytes(make_storage, keys: list[str], value_size: int)->int:
+    """
+    Python heap taken by a filled storage, measured apart so tracemalloc doesn't slow the timed runs
+    """
+    tracemalloc.start()
+    storage = make_storage()
+    for key in keys:
+        storage[key] = bytes(value_size)
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if isinstance(storage, LogStorage):
+        storage.close(remove=True)
+    return heap
+
+def read(storage, keys: list[str], seed: int = 42)->float:
+    reads = random.Random(seed).choices(keys, k=len(keys))
+    start = time.perf_counter()
+    for key in reads:
+        storage[key]
+    return len(reads) / (time.perf_counter() - start)
+
+def reopen_seconds(directory: str)->float:
+    start = time.perf_counter()
+    storage = LogStorage(directory)
+    elapsed = time.perf_counter() - start
+    storage.close()
+    return elapsed
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    value_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    keys = [f'key{i}' for i in range(keys_count)]
+    print(f'{keys_count} keys, {value_size} byte values')
+    print(f'{"storage":<8} {"writes/s":>9} {"reads/s":>9} {"heap MB":>8}')
+
+    storage = dict()
+    writes = fill(storage, keys, value_size)
+    heap = heap_bytes(dict, keys, value_size)
+    print(f'{"dict":<8} {writes:>9.0f} {read(storage, keys):>9.0f} {heap / 2 ** 20:>8.1f}')
+    del storage
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = LogStorage(directory)
+        writes = fill(storage, keys, value_size)
+        heap = heap_bytes(lambda: LogStorage(f'{directory}/heap'), keys, value_size)
+        print(f'{"log":<8} {writes:>9.0f} {read(storage, keys):>9.0f} {heap / 2 ** 20:>8.1f}')
+        storage.close()
+        print(f'Reopen from the index: {reopen_seconds(directory):.2f} s')
+        storage = LogStorage(directory)
+        storage.flush()             # Left open, like after a crash: the next open scans the log
+        print(f'Reopen scanning the log: {reopen_seconds(directory):.2f} s')
+        storage.close()
+
+if __name__ == '__main__':
+    main()
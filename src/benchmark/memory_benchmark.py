@@ -0,0 +1,56 @@
+"""
+Measures, with tracemalloc, the memory taken by each ring position: the ADT entry alone,
+and a whole Ring with virtual nodes, where every position also costs its share of a Node.
+Run with: python -m src.benchmark.memory_benchmark [positions]
+"""
+import random
+import sys
+import tracemalloc
+from src.adt.array_avl_tree import ArrayAVLTree
+from src.adt.avl_tree import AVLTree
+from src.adt.binary_search_tree import BinarySearchTree
+from src.adt.sorted_array import SortedArray
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.ring import Ring
+
+BACKENDS = {
+    'bst': BinarySearchTree,
+    'avl': AVLTree,
+    'avl_soa': ArrayAVLTree,
+    'array': SortedArray,
+}
+
+VNODES = 16
+
+def adt_bytes_per_position(backend, positions_count: int, seed: int = 42)->float:
+    rng = random.Random(seed)
+    positions = [rng.randrange(2 ** 64) for _ in range(positions_count)]
+    node = Node(0, 1)           # Every position points to the same node, so only the ADT is measured
+    tracemalloc.start()
+    adt = backend()
+    for position in positions:
+        adt.insert(position, node)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / positions_count
+
+def ring_bytes_per_position(backend, positions_count: int)->float:
+    tracemalloc.start()
+    ring = Ring(1_000, backend(), vnodes=VNODES)
+    for _ in range(positions_count // VNODES - 1):
+        ring.add_node()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(ring.routing[0])
+
+def main():
+    positions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f'{positions_count} ring positions, {VNODES} vnodes per node in the Ring')
+    print(f'{"backend":<8} {"ADT bytes/position":>19} {"Ring bytes/position":>20}')
+    for name, backend in BACKENDS.items():
+        adt_bytes = adt_bytes_per_position(backend, positions_count)
+        ring_bytes = ring_bytes_per_position(backend, positions_count)
+        print(f'{name:<8} {adt_bytes:>19.1f} {ring_bytes:>20.1f}')
+
+if __name__ == '__main__':
+    main()
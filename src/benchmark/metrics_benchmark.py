@@ -0,0 +1,38 @@
+"""
+Measures the cost of the metrics: ops/s of Ring and HashTable inserts and gets, without and with metrics.
+Run with: python -m src.benchmark.metrics_benchmark [keys]
+"""
+import sys
+import time
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.ring import Ring
+from src.hash_table.hash_table import HashTable
+from src.metrics import Metrics
+
+def ops_per_second(operation, keys: list[str])->float:
+    start = time.perf_counter()
+    for key in keys:
+        operation(key)
+    return len(keys) / (time.perf_counter() - start)
+
+def run(structure, keys: list[str])->tuple[float, float]:
+    inserts = ops_per_second(lambda key: structure.insert(key, key), keys)
+    gets = ops_per_second(structure.get, keys)
+    return inserts, gets
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    keys = [f'key{i}' for i in range(keys_count)]
+    structures = {
+        'ring': lambda metrics: Ring(1_000, AVLTree(), vnodes=16, metrics=metrics),
+        'hash_table': lambda metrics: HashTable(64, keys_count, 2, metrics=metrics),
+    }
+    print(f'{keys_count} keys')
+    print(f'{"structure":<11} {"metrics":<8} {"inserts/s":>10} {"gets/s":>10}')
+    for name, build in structures.items():
+        for metrics in [None, Metrics()]:
+            inserts, gets = run(build(metrics), keys)
+            print(f'{name:<11} {"on" if metrics else "off":<8} {inserts:>10.0f} {gets:>10.0f}')
+
+if __name__ == '__main__':
+    main()
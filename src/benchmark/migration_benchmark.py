@@ -0,0 +1,44 @@
+"""
+Measures the worst read latency while the ring adds a node, moving the keys at once or streaming them
+in chunks, with and without a keys per second budget.
+Run with: python -m src.benchmark.migration_benchmark [keys] [reads]
+"""
+import statistics
+import sys
+import time
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.migration import RateLimiter
+from src.consistent_hash_ring.ring import Ring
+
+def run(keys_count: int, reads_count: int, migration_chunk: int | None, keys_per_second: float | None)->dict:
+    limiter = RateLimiter(keys_per_second=keys_per_second) if keys_per_second is not None else None
+    ring = Ring(keys_count * 2, AVLTree(), vnodes=16, migration_chunk=migration_chunk, migration_limiter=limiter)
+    for _ in range(3):
+        ring.add_node()
+    ring.insert_many((f'key{i}', i) for i in range(keys_count))
+
+    latencies = []
+    start = time.perf_counter()
+    ring.add_node()
+    latencies.append(time.perf_counter() - start)
+    for i in range(reads_count):
+        start = time.perf_counter()
+        ring.get(f'key{i % keys_count}')
+        latencies.append(time.perf_counter() - start)
+    return {
+        'max_ms': max(latencies) * 1e3,
+        'p99_us': statistics.quantiles(latencies, n=100)[98] * 1e6,
+        'pending': len(ring.migrations),
+    }
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    reads_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    print(f'{keys_count} keys, {reads_count} reads after adding a node to 4 nodes')
+    print(f'{"mode":<28} {"max ms":>8} {"p99 us":>8} {"migrations left":>16}')
+    for name, chunk, rate in [('at once', None, None), ('chunks of 1000', 1000, None), ('chunks of 100, 20k keys/s', 100, 20_000)]:
+        result = run(keys_count, reads_count, chunk, rate)
+        print(f'{name:<28} {result["max_ms"]:>8.2f} {result["p99_us"]:>8.1f} {result["pending"]:>16}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Compares the insert latency of HashTable with synchronous and incremental rehashing.
+Run with: python -m src.benchmark.rehash_benchmark [keys]
+"""
+import statistics
+import sys
+import time
+from src.hash_table.hash_table import HashTable
+
+def run(incremental: bool, keys_count: int)->list[float]:
+    table = HashTable(1, 100, 2, incremental=incremental, rehash_step=1)
+    latencies = []
+    for i in range(keys_count):
+        start = time.perf_counter()
+        table.insert(f'key{i}', f'value{i}')
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f'{keys_count} inserts')
+    print(f'{"rehash":<12} {"total (s)":>9} {"p50 (us)":>9} {"p99 (us)":>9} {"max (ms)":>9}')
+    for name, incremental in [('synchronous', False), ('incremental', True)]:
+        latencies = run(incremental, keys_count)
+        percentiles = statistics.quantiles(latencies, n=100)
+        print(f'{name:<12} {sum(latencies):>9.2f} {percentiles[49] * 1e6:>9.1f} '
+              f'{percentiles[98] * 1e6:>9.1f} {max(latencies) * 1e3:>9.2f}')
+
+if __name__ == '__main__':
+    main()
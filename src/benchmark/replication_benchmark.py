@@ -0,0 +1,57 @@
+"""
+Compares reads on rings with replication factor 1, 2 and 3.
+Reports the read QPS of this process and the share of the reads served by the busiest
+node, which is what bounds the throughput when every node is a separate machine.
+Run with: python -m src.benchmark.replication_benchmark [keys] [reads]
+"""
+import random
+from collections import Counter
+import sys
+import time
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.ring import Ring
+
+NODES_COUNT = 8
+
+def run(replication_factor: int, keys_count: int, reads_count: int, seed: int = 42)->dict:
+    rng = random.Random(seed)
+    ring = Ring(keys_count, AVLTree(), vnodes=32, replication_factor=replication_factor)
+    for _ in range(NODES_COUNT - 1):
+        ring.add_node()
+
+    keys = [f'key{i}' for i in range(keys_count)]
+    start = time.perf_counter()
+    for key in keys:
+        ring.insert(key, key)
+    insert_qps = keys_count / (time.perf_counter() - start)
+
+    # Skewed reads: a few keys get most of the traffic
+    reads = [keys[min(int(rng.paretovariate(1.2)) - 1, keys_count - 1)] for _ in range(reads_count)]
+    for node in ring.nodes():
+        node.reads_served = 0
+    start = time.perf_counter()
+    for key in reads:
+        ring.get(key)
+    read_qps = reads_count / (time.perf_counter() - start)
+
+    if replication_factor > 1:
+        busiest = max(node.reads_served for node in ring.nodes())
+    else:                   # Without replicas every read is served by the owner
+        served = Counter(ring._find_node(ring.hasher(key)).index for key in reads)
+        busiest = max(served.values())
+    return {'insert_qps': insert_qps, 'read_qps': read_qps, 'busiest_share': busiest / reads_count}
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    reads_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    print(f'{keys_count} keys, {reads_count} skewed reads, {NODES_COUNT} nodes')
+    print(f'{"RF":>2} {"insert QPS":>11} {"read QPS":>10} {"busiest node share":>19} {"cluster read QPS":>17}')
+    for replication_factor in [1, 2, 3]:
+        result = run(replication_factor, keys_count, reads_count)
+        # If each node serves read_qps on its own machine, the busiest node saturates first
+        cluster_qps = result['read_qps'] / result['busiest_share']
+        print(f'{replication_factor:>2} {result["insert_qps"]:>11.0f} {result["read_qps"]:>10.0f} '
+              f'{result["busiest_share"]:>19.3f} {cluster_qps:>17.0f}')
+
+if __name__ == '__main__':
+    main()
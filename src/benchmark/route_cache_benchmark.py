@@ -0,0 +1,38 @@
+"""
+Measures the route cache: gets/s and updates/s of Zipfian operations over a stable working set of keys,
+without and with the cache, and the gets/s of a pass over the working set after a topology change made every entry stale.
+Run with: python -m src.benchmark.route_cache_benchmark [keys] [working set] [passes]
+"""
+import random
+import sys
+import time
+from src.adt.avl_tree import AVLTree
+from src.benchmark.cache_benchmark import zipf_reads
+from src.consistent_hash_ring.ring import Ring
+
+def ops_per_second(operation, keys: list[str])->float:
+    start = time.perf_counter()
+    for key in keys:
+        operation(key)
+    return len(keys) / (time.perf_counter() - start)
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    working_set = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    passes = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    keys = [f'key{i}' for i in range(keys_count)]
+    hot = random.Random(0).sample(keys, working_set)
+    operations = zipf_reads(hot, working_set * passes)
+    print(f'{keys_count} keys, {working_set * passes} Zipfian operations over {working_set} keys')
+    print(f'{"route cache":>11} {"gets/s":>10} {"updates/s":>10} {"stale gets/s":>13}')
+    for route_cache_size in [None, working_set // 10, working_set]:
+        ring = Ring(1_000, AVLTree(), vnodes=16, route_cache_size=route_cache_size)
+        ring.insert_many((key, key) for key in keys)
+        gets = ops_per_second(ring.get, operations)
+        updates = ops_per_second(lambda key: ring.update(key, key), operations)
+        ring.add_node()
+        stale_gets = ops_per_second(ring.get, hot)
+        print(f'{route_cache_size or "off":>11} {gets:>10.0f} {updates:>10.0f} {stale_gets:>13.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Measures the throughput of an AsyncRing whose nodes live in worker processes, for 1 to 8 workers.
+The router sends concurrent get_many and insert_many batches, one request per worker each.
+Scaling needs as many free cores as workers plus one for the router.
+Run with: python -m src.benchmark.sharded_benchmark [keys] [batch size]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.async_ring import AsyncRing
+from src.consistent_hash_ring.process_storage import spawn_worker
+from src.consistent_hash_ring.ring import Ring
+
+CONCURRENT_BATCHES = 8
+
+async def run(workers_count: int, keys_count: int, batch_size: int)->dict:
+    socket_dir = tempfile.mkdtemp(prefix='ring-')
+    async_ring = AsyncRing(Ring(10 ** 9, AVLTree(), vnodes=32), lambda node: spawn_worker(node, socket_dir))
+    try:
+        for _ in range(workers_count - 1):
+            await async_ring.add_node()
+        keys = [f'key{i}' for i in range(keys_count)]
+        batches = [keys[i:i + batch_size] for i in range(0, keys_count, batch_size)]
+
+        start = time.perf_counter()
+        for i in range(0, len(batches), CONCURRENT_BATCHES):
+            await asyncio.gather(*(async_ring.insert_many((key, key * 4) for key in batch) for batch in batches[i:i + CONCURRENT_BATCHES]))
+        insert_ops = keys_count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(0, len(batches), CONCURRENT_BATCHES):
+            await asyncio.gather(*(async_ring.get_many(batch) for batch in batches[i:i + CONCURRENT_BATCHES]))
+        get_ops = keys_count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await async_ring.add_node()
+        await async_ring.wait_for_migrations()
+        migration_seconds = time.perf_counter() - start
+    finally:
+        await async_ring.close()
+    return {'insert_ops': insert_ops, 'get_ops': get_ops, 'migration_seconds': migration_seconds}
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    print(f'{keys_count} keys, batches of {batch_size}, {os.cpu_count()} cores')
+    print(f'{"workers":>7} {"insert ops/s":>13} {"get ops/s":>10} {"add_node migration s":>21}')
+    for workers_count in [1, 2, 4, 8]:
+        result = asyncio.run(run(workers_count, keys_count, batch_size))
+        print(f'{workers_count:>7} {result["insert_ops"]:>13.0f} {result["get_ops"]:>10.0f} {result["migration_seconds"]:>21.3f}')
+
+if __name__ == '__main__':
+    main()
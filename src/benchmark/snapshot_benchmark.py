@@ -0,0 +1,49 @@
+"""
+Compares rebuilding a ring by replaying its inserts against saving it with Ring.save and loading it back
+with Ring.load. Also reports the snapshot size and, with tracemalloc, the peak memory of the load over the
+memory of the loaded ring, which stays close to 1 because the snapshot is streamed.
+Run with: python -m src.benchmark.snapshot_benchmark [keys] [vnodes]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.ring import Ring
+
+NODE_CAPACITY = 10_000
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    vnodes = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    items = [(f'key{i}', f'value{i}') for i in range(keys_count)]
+
+    start = time.perf_counter()
+    ring = Ring(NODE_CAPACITY, AVLTree(), vnodes=vnodes)
+    for key, value in items:
+        ring.insert(key, value)
+    replay = time.perf_counter() - start
+    print(f'{keys_count} keys, {len(ring.node_positions)} nodes, {vnodes} vnodes')
+    print(f'Replaying the inserts: {replay:.2f} s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ring.snapshot')
+        start = time.perf_counter()
+        ring.save(path)
+        print(f'Save: {time.perf_counter() - start:.2f} s, {os.path.getsize(path) / 2 ** 20:.1f} MB')
+        del ring
+
+        start = time.perf_counter()
+        Ring.load(path)
+        print(f'Load: {time.perf_counter() - start:.2f} s')
+
+        tracemalloc.start()
+        loaded = Ring.load(path)
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'Load peak memory / ring memory: {peak / size:.2f}')
+        assert loaded.get(items[-1][0]) == items[-1][1]
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Compares the placement strategies, modulo hashing (HashTable), consistent hashing (Ring)
+with each ADT backend, jump hash and rendezvous hashing, over a sweep of key counts, node counts and workload mixes.
+For every combination it reports ops/s, p50/p99 latency, peak memory and the fraction of
+keys moved when a node is added. Results are written as JSON and can be compared against
+a previous run to catch regressions.
+
+Run with: python -m src.benchmark.strategy_benchmark --output results.json [--compare baseline.json]
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+from src.adt.avl_tree import AVLTree
+from src.adt.binary_search_tree import BinarySearchTree
+from src.adt.sorted_array import SortedArray
+from src.consistent_hash_ring.ring import Ring
+from src.hash_table.hash_table import HashTable
+from src.jump_hash.jump_hash import JumpHash
+from src.rendezvous_hash.rendezvous_hash import RendezvousHash
+
+# Fractions of get, insert, update and delete operations
+WORKLOADS = {
+    'read_heavy': (0.95, 0.02, 0.02, 0.01),
+    'balanced': (0.50, 0.20, 0.20, 0.10),
+    'write_heavy': (0.10, 0.40, 0.30, 0.20),
+}
+
+class HashTableStrategy:
+    def __init__(self, nodes_count: int, incremental: bool) -> None:
+        # The threshold is never reached: the benchmark controls the scale events
+        self.table = HashTable(nodes_count, 1, sys.maxsize, incremental=incremental)
+
+    def load(self, items: list[tuple[str, str]]) -> None:
+        for key, value in items:
+            self.table.insert(key, value)
+
+    def get(self, key: str) -> Any:
+        return self.table.get(key)
+
+    def insert(self, key: str, value: Any) -> None:
+        self.table.insert(key, value)
+
+    def update(self, key: str, value: Any) -> None:
+        self.table.update(key, value)
+
+    def delete(self, key: str) -> None:
+        self.table.delete(key)
+
+    def owners(self) -> dict[str, int]:
+        self.table._finish_rehash()
+        return {key: node.index for node in self.table.table_nodes for key in node.data}
+
+    def add_node(self) -> None:
+        self.table.add_nodes(1)
+
+class RingStrategy:
+    def __init__(self, nodes_count: int, adt: Callable, vnodes: int) -> None:
+        self.nodes_count = nodes_count
+        self.ring = Ring(sys.maxsize, adt(), vnodes=vnodes)
+
+    def load(self, items: list[tuple[str, str]]) -> None:
+        self.ring.insert_many(items)
+        for _ in range(self.nodes_count - 1):
+            self.ring.add_node()
+
+    def get(self, key: str) -> Any:
+        return self.ring.get(key)
+
+    def insert(self, key: str, value: Any) -> None:
+        self.ring.insert(key, value)
+
+    def update(self, key: str, value: Any) -> None:
+        self.ring.update(key, value)
+
+    def delete(self, key: str) -> None:
+        self.ring.delete(key)
+
+    def owners(self) -> dict[str, int]:
+        return {key: node.index for node in self.ring.nodes() for key in node.data}
+
+    def add_node(self) -> None:
+        self.ring.add_node()
+
+class FixedClusterStrategy:
+    """
+    JumpHash and RendezvousHash, which share the Ring surface but don't scale on their own
+    """
+    def __init__(self, table) -> None:
+        self.table = table
+
+    def load(self, items: list[tuple[str, str]]) -> None:
+        for key, value in items:
+            self.table.insert(key, value)
+
+    def get(self, key: str) -> Any:
+        return self.table.get(key)
+
+    def insert(self, key: str, value: Any) -> None:
+        self.table.insert(key, value)
+
+    def update(self, key: str, value: Any) -> None:
+        self.table.update(key, value)
+
+    def delete(self, key: str) -> None:
+        self.table.delete(key)
+
+    def owners(self) -> dict[str, int]:
+        return {key: node.index for node in self.table.nodes() for key in node.data}
+
+    def add_node(self) -> None:
+        if isinstance(self.table, JumpHash):
+            self.table.add_nodes(1)
+        else:
+            self.table.add_node()
+
+STRATEGIES: dict[str, Callable[[int], Any]] = {
+    'modulo': lambda nodes_count: HashTableStrategy(nodes_count, incremental=False),
+    'modulo_incremental': lambda nodes_count: HashTableStrategy(nodes_count, incremental=True),
+    'ring_bst': lambda nodes_count: RingStrategy(nodes_count, BinarySearchTree, vnodes=1),
+    'ring_avl': lambda nodes_count: RingStrategy(nodes_count, AVLTree, vnodes=1),
+    'ring_array': lambda nodes_count: RingStrategy(nodes_count, SortedArray, vnodes=1),
+    'ring_avl_vnodes': lambda nodes_count: RingStrategy(nodes_count, AVLTree, vnodes=32),
+    'jump': lambda nodes_count: FixedClusterStrategy(JumpHash(nodes_count, sys.maxsize)),
+    'rendezvous': lambda nodes_count: FixedClusterStrategy(RendezvousHash(nodes_count, sys.maxsize)),
+}
+
+def run_workload(strategy, keys: list[str], mix: tuple[float, ...], operations: int, rng: random.Random) -> list[float]:
+    get_share, insert_share, update_share, _ = mix
+    next_key = len(keys)
+    latencies = []
+    for _ in range(operations):
+        draw = rng.random()
+        if draw < get_share:
+            key = rng.choice(keys)
+            start = time.perf_counter()
+            strategy.get(key)
+        elif draw < get_share + insert_share:
+            key = f'key{next_key}'
+            next_key += 1
+            start = time.perf_counter()
+            strategy.insert(key, key)
+            keys.append(key)
+        elif draw < get_share + insert_share + update_share:
+            key = rng.choice(keys)
+            start = time.perf_counter()
+            strategy.update(key, key)
+        else:
+            index = rng.randrange(len(keys))
+            keys[index], keys[-1] = keys[-1], keys[index]
+            key = keys.pop()
+            start = time.perf_counter()
+            strategy.delete(key)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def peak_memory(strategy_name: str, nodes_count: int, items: list[tuple[str, str]]) -> int:
+    """
+    Peak memory allocated while building the strategy, measured apart so tracemalloc doesn't slow the timed runs
+    """
+    tracemalloc.start()
+    strategy = STRATEGIES[strategy_name](nodes_count)
+    strategy.load(items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def run(strategy_name: str, keys_count: int, nodes_count: int, workload: str, operations: int, seed: int, repeats: int) -> dict:
+    """
+    Runs the workload repeats times on fresh structures. Throughput is the median of the runs and the
+    latency percentiles are taken over every operation, so a single noisy run can't flag a regression
+    """
+    items = [(f'key{i}', f'key{i}') for i in range(keys_count)]
+    throughputs = []
+    latencies = []
+    for repeat in range(repeats):
+        strategy = STRATEGIES[strategy_name](nodes_count)
+        strategy.load(items)
+        gc.disable()                # Like timeit, collections are kept out of the timings
+        try:
+            run_latencies = run_workload(strategy, [key for key, _ in items], WORKLOADS[workload], operations, random.Random(seed + repeat))
+        finally:
+            gc.enable()
+        throughputs.append(len(run_latencies) / sum(run_latencies))
+        latencies.extend(run_latencies)
+
+    before = strategy.owners()
+    strategy.add_node()
+    after = strategy.owners()
+    moved = sum(1 for key, owner in before.items() if after[key] != owner)
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'strategy': strategy_name,
+        'keys': keys_count,
+        'nodes': nodes_count,
+        'workload': workload,
+        'ops_per_second': statistics.median(throughputs),
+        'p50_us': percentiles[49] * 1e6,
+        'p99_us': percentiles[98] * 1e6,
+        'peak_memory_bytes': peak_memory(strategy_name, nodes_count, items),
+        'moved_fraction_on_add': moved / len(before),
+    }
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> bool:
+    """
+    Prints the ops/s ratio against the baseline results. Returns False if any combination regressed
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    identity = lambda result: (result['strategy'], result['keys'], result['nodes'], result['workload'])
+    baseline_by_identity = {identity(result): result for result in baseline}
+    passed = True
+    for result in results:
+        previous = baseline_by_identity.get(identity(result))
+        if previous is None:
+            continue
+        ratio = result['ops_per_second'] / previous['ops_per_second']
+        regressed = ratio < 1 - tolerance
+        passed = passed and not regressed
+        print(f'{"REGRESSION" if regressed else "ok":<10} {" ".join(map(str, identity(result)))}: {ratio:.2f}x ops/s')
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, nargs='+', default=[1_000, 10_000])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--workloads', nargs='+', default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('--operations', type=int, default=10_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='previous results to compare the ops/s against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='ops/s drop tolerated by --compare')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"strategy":<20} {"keys":>6} {"nodes":>5} {"workload":<12} {"ops/s":>9} {"p50 us":>7} {"p99 us":>8} {"peak MB":>8} {"moved":>6}')
+    for keys_count in args.keys:
+        for nodes_count in args.nodes:
+            for workload in args.workloads:
+                for strategy_name in args.strategies:
+                    result = run(strategy_name, keys_count, nodes_count, workload, args.operations, args.seed, args.repeats)
+                    results.append(result)
+                    print(f'{strategy_name:<20} {keys_count:>6} {nodes_count:>5} {workload:<12} {result["ops_per_second"]:>9.0f} '
+                          f'{result["p50_us"]:>7.1f} {result["p99_us"]:>8.1f} {result["peak_memory_bytes"] / 2 ** 20:>8.2f} '
+                          f'{result["moved_fraction_on_add"]:>6.3f}')
+
+    with open(args.output, 'w') as output_file:
+        json.dump({'python': platform.python_version(), 'operations': args.operations, 'repeats': args.repeats, 'seed': args.seed, 'results': results}, output_file, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
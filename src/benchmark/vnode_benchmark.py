@@ -0,0 +1,72 @@
+"""
+Measures how evenly the keys are spread and how many keys move on each
+topology change, for different numbers of virtual nodes per node.
+Then inserts past the node capacity, so full nodes are split, and reports how full the nodes are left.
+Run with: python -m src.benchmark.vnode_benchmark [keys] [nodes] [capacity]
+"""
+import statistics
+import sys
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.ring import Ring
+
+def key_owners(ring: Ring)->dict[str, int]:
+    return {key: node.index for node in ring.nodes() for key in node.data}
+
+def keys_moved(before: dict[str, int], after: dict[str, int])->int:
+    return sum(1 for key, index in before.items() if after[key] != index)
+
+def run(vnodes: int, keys_count: int, nodes_count: int)->dict:
+    ring = Ring(keys_count, AVLTree(), vnodes=vnodes)
+    for i in range(keys_count):
+        ring.insert(f'key{i}', f'value{i}')
+    for _ in range(nodes_count - 1):
+        ring.add_node()
+
+    loads = [len(node.data) for node in ring.nodes()]
+    mean_load = statistics.mean(loads)
+
+    before = key_owners(ring)
+    new_node = ring.add_node()
+    after_add = key_owners(ring)
+    donors = len({before[key] for key in before if after_add[key] == new_node.index})
+
+    ring.remove_node(new_node.index)
+    after_remove = key_owners(ring)
+    return {
+        'load_stdev': statistics.pstdev(loads) / mean_load,
+        'max_over_mean': max(loads) / mean_load,
+        'moved_on_add': keys_moved(before, after_add) / keys_count,
+        'donors_on_add': donors,
+        'moved_on_remove': keys_moved(after_add, after_remove) / keys_count,
+    }
+
+def run_splits(vnodes: int, keys_count: int, capacity: int)->dict:
+    ring = Ring(capacity, AVLTree(), vnodes=vnodes)
+    for i in range(keys_count):
+        ring.insert(f'key{i}', f'value{i}')
+    loads = [len(node.data) for node in ring.nodes()]
+    return {
+        'nodes': len(loads),
+        'fill': keys_count / (len(loads) * capacity),
+        'max_over_mean': max(loads) / statistics.mean(loads),
+    }
+
+def main():
+    keys_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    nodes_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f'{keys_count} keys, {nodes_count} nodes, ideal move fraction {1 / (nodes_count + 1):.3f}')
+    print(f'{"vnodes":>6} {"stdev/mean":>10} {"max/mean":>9} {"moved add":>10} {"donors":>7} {"moved remove":>13}')
+    for vnodes in [1, 8, 32, 128]:
+        result = run(vnodes, keys_count, nodes_count)
+        print(f'{vnodes:>6} {result["load_stdev"]:>10.3f} {result["max_over_mean"]:>9.2f} '
+              f'{result["moved_on_add"]:>10.3f} {result["donors_on_add"]:>7} {result["moved_on_remove"]:>13.3f}')
+
+    capacity = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    print(f'\n{keys_count} keys inserted one by one into nodes of capacity {capacity}')
+    print(f'{"vnodes":>6} {"nodes":>6} {"fill":>6} {"max/mean":>9}')
+    for vnodes in [1, 8, 32, 128]:
+        result = run_splits(vnodes, keys_count, capacity)
+        print(f'{vnodes:>6} {result["nodes"]:>6} {result["fill"]:>6.2f} {result["max_over_mean"]:>9.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import asyncio
+from itertools import islice
+from typing import Any, Callable, Iterable
+from .node import Node
+from .ring import Ring
+from .storage import AsyncStorage, InMemoryStorage
+from .errors.node_errors import KeyNotFoundError
+
+import logging
+logger = logging.getLogger(__name__)
+
+READ_ATTEMPTS = 3
+
+class AsyncRing:
+    """
+    asyncio front end for a Ring whose nodes keep their values in async storages.
+    The ring works as the directory: it decides which node owns each key and splits and merges nodes,
+    while the values live in the storage of the owner. Calls to different nodes run concurrently and
+    batches send one request per node.
+    When the topology changes, a background task copies the moved values to their new storage.
+    Until a key is copied, reads fall back to its previous storage and writes replace the copy
+    """
+    def __init__(self, ring: Ring, storage_factory: Callable[[Node], AsyncStorage] = lambda node: InMemoryStorage(), migration_batch: int = 100) -> None:
+        if ring.replication_factor > 1 or ring.load_bound is not None or ring.migration_chunk is not None or ring.read_cache is not None:
+            raise ValueError('AsyncRing needs a ring without replication, bounded loads, streaming migrations nor read cache')
+        self.ring = ring
+        self.storage_factory = storage_factory
+        self.migration_batch = migration_batch
+        self.storages: dict[int, AsyncStorage] = {node.index: storage_factory(node) for node in ring.nodes()}
+        self.write_locks: dict[int, asyncio.Lock] = dict()     # Node index -> lock ordering the writes to its storage
+        self.migrating: dict[str, int] = dict()                 # Key -> index of the node whose storage still has its value
+        self.migration_task: asyncio.Task | None = None
+
+    async def insert(self, key: str, value: Any)->None:
+        self._change_directory(self.ring.insert, key, None)
+        await self._put_many([(key, value)])
+
+    async def get(self, key: str)->Any:
+        """
+        Returns the value of the key. Raises an exception if not found
+        """
+        return (await self.get_many([key]))[key]
+
+    async def update(self, key: str, new_value: Any)->None:
+        node = self._owner(key)
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        await self._put_many([(key, new_value)])
+
+    async def delete(self, key: str)->Any:
+        value = await self.get(key)
+        node = self._owner(key)
+        async with self._write_lock(node.index):
+            deletes = [self.storages[node.index].delete_many([key])]
+            source = self.migrating.pop(key, None)
+            if source is not None:
+                deletes.append(self.storages[source].delete_many([key]))
+            await asyncio.gather(*deletes)
+        self._change_directory(self.ring.delete, key)
+        return value
+
+    async def insert_many(self, items: Iterable[tuple[str, Any]])->None:
+        """
+        Inserts a batch of items, sending one request to each node
+        """
+        items = list(items)
+        self._change_directory(self.ring.insert_many, [(key, None) for key, _ in items])
+        await self._put_many(items)
+
+    async def get_many(self, keys: Iterable[str])->dict[str, Any]:
+        """
+        Returns the values of a batch of keys, sending one request to each node. Raises an exception if any is not found.
+        Keys still being migrated are read from their previous storage too, and the owner's value wins
+        """
+        keys = list(keys)
+        for key in keys:
+            if not self._owner(key).has_key(key):
+                raise KeyNotFoundError(f'Key {key} not found')
+        values: dict[str, Any] = dict()
+        pending = keys
+        for _ in range(READ_ATTEMPTS):      # A key can be copied between the reads of both storages: read it again
+            owners: dict[int, list[str]] = dict()
+            sources: dict[int, list[str]] = dict()
+            for key in pending:
+                owners.setdefault(self._owner(key).index, []).append(key)
+                if key in self.migrating:
+                    sources.setdefault(self.migrating[key], []).append(key)
+            owner_reads = [self.storages[index].get_many(node_keys) for index, node_keys in owners.items()]
+            source_reads = [self.storages[index].get_many(node_keys) for index, node_keys in sources.items()]
+            results = await asyncio.gather(*source_reads, *owner_reads)
+            for result in results:          # Owner reads come last, overriding the migrating copies
+                values.update(result)
+            pending = [key for key in pending if key not in values]
+            if not pending:
+                return values
+        raise KeyNotFoundError(f'Key {pending[0]} not found')
+
+    async def add_node(self)->Node:
+        return self._change_directory(self.ring.add_node)
+
+    async def remove_node(self, index: int)->bool:
+        return self._change_directory(self.ring.remove_node, index)
+
+    async def wait_for_migrations(self)->None:
+        while self.migration_task is not None:
+            await self.migration_task
+
+    async def close(self)->None:
+        """
+        Waits for the migrations and closes every storage
+        """
+        await self.wait_for_migrations()
+        await asyncio.gather(*(storage.close() for storage in self.storages.values()))
+        self.storages = dict()
+
+    def _owner(self, key: str)->Node:
+        return self.ring._route(self.ring.hasher(key))
+
+    def _write_lock(self, index: int)->asyncio.Lock:
+        if index not in self.write_locks:
+            self.write_locks[index] = asyncio.Lock()
+        return self.write_locks[index]
+
+    async def _put_many(self, items: list[tuple[str, Any]])->None:
+        """
+        Writes the items to the storages of their owners, one request per node
+        """
+        while items:
+            by_node: dict[int, list[tuple[str, Any]]] = dict()
+            for key, value in items:
+                by_node.setdefault(self._owner(key).index, []).append((key, value))
+            moved = await asyncio.gather(*(self._put_node(index, node_items) for index, node_items in by_node.items()))
+            items = [item for node_items in moved for item in node_items]
+
+    async def _put_node(self, index: int, items: list[tuple[str, Any]])->list[tuple[str, Any]]:
+        """
+        Writes the items to the storage of the node. Returns the ones it stopped owning while waiting for the lock
+        """
+        async with self._write_lock(index):
+            moved = [(key, value) for key, value in items if self._owner(key).index != index]
+            items = [(key, value) for key, value in items if self._owner(key).index == index]
+            await self.storages[index].put_many(items)
+            superseded: dict[int, list[str]] = dict()       # Source -> keys whose pending copy this write replaced
+            for key, _ in items:
+                source = self.migrating.get(key)
+                if source is not None and source != index:
+                    superseded.setdefault(source, []).append(key)
+            self._written([key for key, _ in items], index)
+        await asyncio.gather(*(self._drop_stale(source, keys) for source, keys in superseded.items()))
+        return moved
+
+    async def _drop_stale(self, source: int, keys: list[str])->None:
+        """
+        Deletes the old copies a write superseded from the storage they were waiting to be copied from.
+        Keys that migrate from it again or that it owns again meanwhile have their newest value there
+        """
+        async with self._write_lock(source):
+            keys = [key for key in keys if self.migrating.get(key) != source and self._owner(key).index != source]
+            if keys and source in self.storages:
+                await self.storages[source].delete_many(keys)
+
+    def _written(self, keys: list[str], index: int)->None:
+        """
+        The newest values of the keys are in the storage of the node: nothing older has to be migrated.
+        Keys that changed owner during the write migrate from this node
+        """
+        for key in keys:
+            if self._owner(key).index == index:
+                self.migrating.pop(key, None)
+            else:
+                self.migrating[key] = index
+
+    def _change_directory(self, operation: Callable, *args)->Any:
+        """
+        Runs operation on the ring. If it changed the topology, the moved keys start migrating
+        """
+        routing = self.ring.routing
+        result = operation(*args)
+        if self.ring.routing is not routing:
+            self._plan_migration(routing)
+        return result
+
+    def _plan_migration(self, old_routing)->None:
+        """
+        Finds the keys whose owner changed. They are in the new nodes and in the nodes that received the arcs
+        of the removed ones, so only those are checked against the previous routing
+        """
+        old_positions, old_nodes = old_routing
+        _, new_nodes = self.ring.routing
+        new_indexes = {node.index for node in new_nodes}
+        old_indexes = {node.index for node in old_nodes}
+
+        changed: dict[int, Node] = dict()
+        for node in new_nodes:
+            if node.index not in old_indexes:
+                if node.index not in self.storages:         # A reused index may still have keys to drain
+                    self.storages[node.index] = self.storage_factory(node)
+                changed[node.index] = node
+        for position, node in zip(old_positions, old_nodes):
+            if node.index not in new_indexes:
+                receiver = self.ring._route(position)
+                changed[receiver.index] = receiver
+
+        for node in changed.values():
+            for key, key_hash in node.key_hashes.items():
+                source = self.ring._route(key_hash, old_routing)
+                if source is not node:
+                    self.migrating.setdefault(key, source.index)     # A key moved twice is still in its first storage
+                elif self.migrating.get(key) == node.index:
+                    del self.migrating[key]
+        logger.info(f'Topology changed: {len(self.migrating)} keys to migrate')
+        if self.migrating and self.migration_task is None:
+            self.migration_task = asyncio.get_running_loop().create_task(self._migrate())
+
+    async def _migrate(self)->None:
+        """
+        Copies the migrating keys in batches, one request per (source, destination) pair.
+        Each batch holds the write lock of its destination only while it writes there
+        """
+        try:
+            while self.migrating:
+                moves: dict[tuple[int, int], list[str]] = dict()
+                for key, source in list(islice(self.migrating.items(), self.migration_batch)):
+                    destination = self._owner(key).index
+                    if destination == source:
+                        del self.migrating[key]
+                        continue
+                    moves.setdefault((source, destination), []).append(key)
+                await asyncio.gather(*(self._move(source, destination, keys) for (source, destination), keys in moves.items()))
+            for index in list(self.storages):
+                if index not in self.ring.node_positions:       # Removed nodes, now drained
+                    await self.storages.pop(index).close()
+                    self.write_locks.pop(index, None)
+        finally:
+            self.migration_task = None
+
+    async def _move(self, source: int, destination: int, keys: list[str])->None:
+        values = await self.storages[source].get_many(keys)
+        async with self._write_lock(destination):
+            # Skips the keys written, deleted or moved again while their values were read
+            keys = [key for key in keys if self.migrating.get(key) == source and self._owner(key).index == destination]
+            await self.storages[destination].put_many([(key, values[key]) for key in keys if key in values])
+            keys = [key for key in keys if self.migrating.get(key) == source]      # Unless a write replaced them meanwhile
+            self._written(keys, destination)
+        await self.storages[source].delete_many([key for key in keys if self._owner(key).index != source])
@@ -0,0 +1,184 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable
+from .node import Node
+from .ring import Ring
+from .errors.node_errors import KeyNotFoundError
+
+import logging
+logger = logging.getLogger(__name__)
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Waiting writers block new readers, so topology changes are not starved.
+    The writer thread can take the lock again, in read or write mode, while holding it
+    """
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer: int | None = None             # Ident of the thread holding the write lock
+        self._writer_depth = 0
+
+    def acquire_read(self) -> bool:
+        """
+        Returns False when the calling thread already holds the write lock, so nothing has to be released
+        """
+        if self._writer == threading.get_ident():
+            return False
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        return True
+
+    def release_read(self) -> None:
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        acquired = self.acquire_read()
+        try:
+            yield
+        finally:
+            if acquired:
+                self.release_read()
+
+    @contextmanager
+    def write(self):
+        thread = threading.get_ident()
+        with self._condition:
+            if self._writer != thread:
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._waiting_writers -= 1
+                self._writer = thread
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._condition.notify_all()
+
+_missing = object()
+
+class ConcurrentRing(Ring):
+    """
+    Ring that can be shared by many threads.
+    Reads take no lock: they route on the immutable snapshot the ring publishes on every topology change.
+    Writes hold the ring index in read mode and lock only the node that owns the key, so operations
+    on different nodes run in parallel. Splits, merges and the other topology changes hold the index
+    in write mode, which they only take when a node has to change.
+    With replication, bounded loads or streaming migrations an operation touches more than its owner,
+    so every operation holds the index in write mode. So does a read cache, which every read updates.
+    Node storages other than dicts can move their data while written, so their reads lock the node too
+    The route cache is only used by the operations that hold the index in write mode
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.topology_lock = ReadWriteLock()
+        self.exclusive = self.replication_factor > 1 or self.load_bound is not None or self.migration_chunk is not None or self.read_cache is not None
+        self.lock_free_reads = self.node_storage is None
+
+    def insert(self, key: str, value):
+        if self.exclusive:
+            with self.topology_lock.write():
+                return super().insert(key, value)
+        key_hash = self.hasher(key)
+        acquired = self.topology_lock.acquire_read()        # Not a with block: get and insert are the hot path
+        try:
+            node = self._find_node(key_hash)
+            with node.lock:
+                if not self.policy.should_split(node):
+                    node.insert(key, value, key_hash)
+                    return
+        finally:
+            if acquired:
+                self.topology_lock.release_read()
+        with self.topology_lock.write():        # The node is full: the split is done alone
+            super().insert(key, value)
+
+    def get(self, key: str)->Any:
+        if self.exclusive:
+            with self.topology_lock.write():
+                return super().get(key)
+        key_hash = self.hasher(key)
+        # Lock free read on the routing snapshot. A miss may be a key moved by a split that was not
+        # published yet, so it is confirmed under the lock, which waits for the split to finish
+        if self.lock_free_reads:
+            value = self._route(key_hash).data.get(key, _missing)
+            if value is not _missing:
+                return value
+        acquired = self.topology_lock.acquire_read()
+        try:
+            node = self._find_node(key_hash)
+            with node.lock:
+                if not node.has_key(key):
+                    raise KeyNotFoundError(f'Key {key} not found')
+                return node.get(key)
+        finally:
+            if acquired:
+                self.topology_lock.release_read()
+
+    def update(self, key: str, new_value: Any)->None:
+        if self.exclusive:
+            with self.topology_lock.write():
+                return super().update(key, new_value)
+        key_hash = self.hasher(key)
+        with self.topology_lock.read():
+            node = self._find_node(key_hash)
+            with node.lock:
+                if not node.has_key(key):
+                    raise KeyNotFoundError(f'Key {key} not found')
+                return node.update(key, new_value)
+
+    def delete(self, key: str)->Any:
+        if self.exclusive:
+            with self.topology_lock.write():
+                return super().delete(key)
+        key_hash = self.hasher(key)
+        with self.topology_lock.read():
+            node = self._find_node(key_hash)
+            with node.lock:
+                if not node.has_key(key):
+                    raise KeyNotFoundError(f'Key {key} not found')
+                removed_key = node.delete(key)
+                underloaded = self.policy.should_merge(node)
+        if underloaded:
+            with self.topology_lock.write():
+                # Another thread may have merged the node or filled it meanwhile
+                if node.index in self.node_positions and self.policy.should_merge(node):
+                    logger.info(f'Node {node.index} is underloaded: scaling down the ring')
+                    self._merge_node(node)
+        return removed_key
+
+    def insert_many(self, items: Iterable[tuple[str, Any]])->None:
+        with self.topology_lock.write():
+            super().insert_many(items)
+
+    def get_many(self, keys: Iterable[str])->dict[str, Any]:
+        with self.topology_lock.write():
+            return super().get_many(keys)
+
+    def delete_many(self, keys: Iterable[str])->dict[str, Any]:
+        with self.topology_lock.write():
+            return super().delete_many(keys)
+
+    def add_node(self)->Node:
+        with self.topology_lock.write():
+            return super().add_node()
+
+    def remove_node(self, index: int)->bool:
+        with self.topology_lock.write():
+            return super().remove_node(index)
+
+    def save(self, path: str)->None:
+        with self.topology_lock.write():
+            super().save(path)
@@ -1,2 +1,5 @@
 class NodeNotFoundError(Exception):
-    ...
\ No newline at end of file
+    ...
+
+class PositionTakenError(Exception):
+    ...
@@ -0,0 +1,299 @@
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import MutableMapping
+from typing import Any, Iterator
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Records are a header (kind, key length, value length), the utf-8 key and the pickled value.
+# The active segment is preallocated with zeros, so a zero kind marks the end of the log
+RECORD = struct.Struct('!BHI')
+KIND_END, KIND_PUT, KIND_DELETE = range(3)
+
+# The index file has a header (magic, active segment, log offset it covers, segments count),
+# then (segment, size, garbage bytes) per segment and (key length, segment, value offset, value length) per key
+INDEX_MAGIC = b'CHLI'
+INDEX_HEADER = struct.Struct('!4sIQI')
+INDEX_SEGMENT = struct.Struct('!IQQ')
+INDEX_ENTRY = struct.Struct('!HIQI')
+INDEX_FILE = 'index'
+
+def _segment_name(segment: int)->str:
+    return f'segment-{segment:08d}.log'
+
+class LogStorage(MutableMapping):
+    """
+    Node data kept on disk, as a log of append-only segments and an in-memory index of where each value is.
+    Reads unpickle straight from memory-mapped segments, so only the keys have to fit in memory.
+    Overwritten and deleted records are garbage: once a sealed segment is mostly garbage, its live records
+    are copied to the end of the log, a batch per write, like the incremental rehash of HashTable.
+    close() saves the index, so reopening the directory skips the log scan
+    """
+    def __init__(self, directory: str, segment_size: int = 16 * 2 ** 20, compaction_ratio: float = 0.5, compaction_batch: int = 64) -> None:
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compaction_ratio = compaction_ratio
+        self.compaction_batch = compaction_batch
+        self.index: dict[str, tuple[int, int, int]] = dict()     # Key -> (segment, value offset, value length)
+        self.sizes: dict[int, int] = dict()             # Segment -> bytes used
+        self.garbage: dict[int, int] = dict()           # Segment -> bytes of overwritten and deleted records
+        self.files: dict[int, Any] = dict()
+        self.maps: dict[int, mmap.mmap] = dict()
+        self.views: dict[int, memoryview] = dict()
+        self.compacting: tuple[int, int] | None = None  # (segment, offset of the next record to copy)
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # Mapping interface
+    def __getitem__(self, key: str)->Any:
+        segment, offset, length = self.index[key]
+        return pickle.loads(self.views[segment][offset:offset + length])
+
+    def __setitem__(self, key: str, value: Any)->None:
+        self._append(KIND_PUT, key.encode(), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+        self._compaction_step()
+
+    def __delitem__(self, key: str)->None:
+        if key not in self.index:
+            raise KeyError(key)
+        self._append(KIND_DELETE, key.encode(), b'', key)
+        self._compaction_step()
+
+    def __contains__(self, key: object)->bool:
+        return key in self.index
+
+    def __iter__(self)->Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self)->int:
+        return len(self.index)
+
+    def flush(self)->None:
+        """
+        Writes the log to disk. The index is only saved by close(): after a crash the log is scanned instead
+        """
+        self.maps[self.active].flush()
+
+    def close(self, remove: bool = False)->None:
+        """
+        Saves the index and releases the segments. remove deletes the files instead, for nodes that left the ring
+        """
+        self.flush()
+        self._seal(self.active)
+        for segment in list(self.files):
+            self._close_segment(segment)
+        if not remove:
+            self._save_index()
+            return
+        for segment in self.sizes:
+            os.unlink(self._path(_segment_name(segment)))
+        os.rmdir(self.directory)
+
+    def compact(self)->None:
+        """
+        Copies the live records of every sealed segment with garbage to the end of the log
+        """
+        for segment in [segment for segment in self.garbage if segment != self.active and self.garbage[segment]]:
+            if segment not in self.sizes:         # Already compacted by the previous ones
+                continue
+            if self.compacting is None or self.compacting[0] != segment:
+                self.compacting = (segment, 0)
+            while self.compacting is not None:
+                self._compact_batch()
+
+    # Log
+    def _path(self, name: str)->str:
+        return os.path.join(self.directory, name)
+
+    def _open(self)->None:
+        segments = sorted(int(name[8:16]) for name in os.listdir(self.directory) if name.startswith('segment-'))
+        start_segment, start_offset = self._load_index(segments)
+        self.active = segments[-1] if segments else 0
+        for segment in segments:
+            self._map_segment(segment, writable=segment == segments[-1])
+            if segment >= start_segment:
+                self._scan(segment, start_offset if segment == start_segment else 0)
+        if not segments:
+            self._new_segment(0)
+        self.compacting = None          # The scan saw partial sizes: pick the segment to compact with the final ones
+        for segment in self.sizes:
+            self._check_garbage(segment)
+        logger.info(f'Opened {self.directory}: {len(self.index)} keys in {len(self.sizes)} segments')
+
+    def _map_segment(self, segment: int, writable: bool)->None:
+        """
+        Maps the segment. The active one is extended to the segment size, so appends never remap it
+        """
+        file = open(self._path(_segment_name(segment)), 'r+b')
+        size = os.fstat(file.fileno()).st_size
+        if writable and size < self.segment_size:
+            file.truncate(self.segment_size)
+            size = self.segment_size
+        self.files[segment] = file
+        self.maps[segment] = mmap.mmap(file.fileno(), size)
+        self.views[segment] = memoryview(self.maps[segment])
+        self.sizes.setdefault(segment, 0)
+        self.garbage.setdefault(segment, 0)
+
+    def _new_segment(self, segment: int, min_size: int = 0)->None:
+        with open(self._path(_segment_name(segment)), 'wb') as file:
+            file.truncate(max(self.segment_size, min_size))
+        self._map_segment(segment, writable=True)
+        self.active = segment
+
+    def _close_segment(self, segment: int)->None:
+        self.views.pop(segment).release()
+        self.maps.pop(segment).close()
+        self.files.pop(segment).close()
+
+    def _seal(self, segment: int)->None:
+        """
+        Truncates the segment to the bytes it uses
+        """
+        self._close_segment(segment)
+        with open(self._path(_segment_name(segment)), 'r+b') as file:
+            file.truncate(self.sizes[segment])
+        if self.sizes[segment]:
+            self._map_segment(segment, writable=False)
+
+    def _scan(self, segment: int, offset: int)->None:
+        """
+        Applies the records of the segment from offset on to the index. Stops at the end of the log,
+        which is also where a torn write left the segment
+        """
+        view = self.views[segment]
+        while offset + RECORD.size <= len(view):
+            kind, key_length, value_length = RECORD.unpack_from(view, offset)
+            end = offset + RECORD.size + key_length + value_length
+            if kind == KIND_END or end > len(view):
+                break
+            key = bytes(view[offset + RECORD.size:offset + RECORD.size + key_length]).decode()
+            self._apply(kind, key, segment, offset + RECORD.size + key_length, value_length, end - offset)
+            offset = end
+        self.sizes[segment] = offset
+
+    def _apply(self, kind: int, key: str, segment: int, value_offset: int, value_length: int, record_size: int)->None:
+        previous = self.index.pop(key, None)
+        if previous is not None:
+            self._add_garbage(previous[0], RECORD.size + len(key.encode()) + previous[2])
+        if kind == KIND_PUT:
+            self.index[key] = (segment, value_offset, value_length)
+        else:
+            self._add_garbage(segment, record_size)       # Tombstones are garbage once written
+
+    def _append(self, kind: int, key_bytes: bytes, value_bytes: bytes, key: str)->None:
+        record_size = RECORD.size + len(key_bytes) + len(value_bytes)
+        offset = self.sizes[self.active]
+        if offset + record_size > len(self.maps[self.active]):
+            if offset:
+                self._seal(self.active)
+                segment = self.active + 1
+            else:                   # A record larger than the empty segment: recreate it large enough
+                self._close_segment(self.active)
+                segment = self.active
+            self._new_segment(segment, record_size)
+            offset = 0
+        view = self.views[self.active]
+        RECORD.pack_into(view, offset, kind, len(key_bytes), len(value_bytes))
+        key_end = offset + RECORD.size + len(key_bytes)
+        view[offset + RECORD.size:key_end] = key_bytes
+        view[key_end:key_end + len(value_bytes)] = value_bytes
+        self.sizes[self.active] = offset + record_size
+        self._apply(kind, key, self.active, key_end, len(value_bytes), record_size)
+
+    # Compaction
+    def _add_garbage(self, segment: int, size: int)->None:
+        self.garbage[segment] += size
+        self._check_garbage(segment)
+
+    def _check_garbage(self, segment: int)->None:
+        if self.compacting is None and segment != self.active and self.garbage[segment] >= self.sizes[segment] * self.compaction_ratio:
+            self.compacting = (segment, 0)
+
+    def _compaction_step(self)->None:
+        if self.compacting is not None:
+            self._compact_batch()
+
+    def _compact_batch(self)->None:
+        """
+        Copies the next compaction_batch live records of the segment being compacted to the end of the log.
+        Tombstones are kept while an older segment may still have the key. The segment is deleted once copied
+        """
+        segment, offset = self.compacting
+        view = self.views.get(segment)
+        oldest = min(self.sizes)
+        for _ in range(self.compaction_batch):
+            if view is None or offset >= self.sizes[segment]:
+                self._drop_segment(segment)
+                return
+            kind, key_length, value_length = RECORD.unpack_from(view, offset)
+            key_end = offset + RECORD.size + key_length
+            key = bytes(view[offset + RECORD.size:key_end]).decode()
+            live = self.index.get(key) == (segment, key_end, value_length)
+            if live or (kind == KIND_DELETE and key not in self.index and oldest < segment):
+                value_bytes = bytes(view[key_end:key_end + value_length])
+                self._append(kind, key.encode(), value_bytes, key)
+            offset = key_end + value_length
+        self.compacting = (segment, offset)
+
+    def _drop_segment(self, segment: int)->None:
+        if segment in self.files:
+            self._close_segment(segment)
+        os.unlink(self._path(_segment_name(segment)))
+        del self.sizes[segment]
+        del self.garbage[segment]
+        self.compacting = None
+        logger.debug('Compacted segment %d of %s', segment, self.directory)
+        for other in self.sizes:
+            self._check_garbage(other)
+            if self.compacting is not None:
+                break
+
+    # Index file
+    def _save_index(self)->None:
+        """
+        Writes the index next to the segments, replacing the previous one only once complete
+        """
+        parts = [INDEX_HEADER.pack(INDEX_MAGIC, self.active, self.sizes[self.active], len(self.sizes))]
+        for segment, size in self.sizes.items():
+            parts.append(INDEX_SEGMENT.pack(segment, size, self.garbage[segment]))
+        for key, (segment, offset, length) in self.index.items():
+            key_bytes = key.encode()
+            parts.append(INDEX_ENTRY.pack(len(key_bytes), segment, offset, length))
+            parts.append(key_bytes)
+        temporary = self._path(INDEX_FILE + '.tmp')
+        with open(temporary, 'wb') as file:
+            file.write(b''.join(parts))
+        os.replace(temporary, self._path(INDEX_FILE))
+
+    def _load_index(self, segments: list[int])->tuple[int, int]:
+        """
+        Loads the saved index, if any, and deletes it: it is only valid until the log changes.
+        Returns the log position from which the segments still have to be scanned
+        """
+        path = self._path(INDEX_FILE)
+        if not os.path.exists(path):
+            return (segments[0] if segments else 0), 0
+        with open(path, 'rb') as file:
+            data = file.read()
+        os.unlink(path)
+        magic, active, covered, segments_count = INDEX_HEADER.unpack_from(data, 0)
+        if magic != INDEX_MAGIC:
+            logger.warning(f'Ignoring the invalid index of {self.directory}')
+            return (segments[0] if segments else 0), 0
+        offset = INDEX_HEADER.size
+        for _ in range(segments_count):
+            segment, size, garbage = INDEX_SEGMENT.unpack_from(data, offset)
+            self.sizes[segment] = size
+            self.garbage[segment] = garbage
+            offset += INDEX_SEGMENT.size
+        index = self.index
+        while offset < len(data):
+            key_length, segment, value_offset, value_length = INDEX_ENTRY.unpack_from(data, offset)
+            offset += INDEX_ENTRY.size
+            index[data[offset:offset + key_length].decode()] = (segment, value_offset, value_length)
+            offset += key_length
+        return active, covered
@@ -0,0 +1,64 @@
+import time
+from typing import Callable, Iterator
+from .node import Node
+
+class RateLimiter:
+    """
+    Token buckets capping how many keys and bytes migrations move per second.
+    Each bucket holds up to burst seconds of budget, which bounds the keys moved during a single operation.
+    A step may overdraw it, and then the next steps wait
+    """
+    def __init__(self, keys_per_second: float | None = None, bytes_per_second: float | None = None, burst: float = 0.01, clock: Callable[[], float] = time.monotonic) -> None:
+        self.keys_per_second = keys_per_second
+        self.bytes_per_second = bytes_per_second
+        self.burst = burst
+        self.clock = clock
+        self.key_tokens = 0.0 if keys_per_second is None else keys_per_second * burst
+        self.byte_tokens = 0.0 if bytes_per_second is None else bytes_per_second * burst
+        self.refilled_at = clock()
+
+    def allows(self) -> bool:
+        if self.keys_per_second is not None and self.key_tokens <= 0:
+            return False
+        return self.bytes_per_second is None or self.byte_tokens > 0
+
+    def spend(self, keys: int, bytes: int) -> None:
+        self.key_tokens -= keys
+        self.byte_tokens -= bytes
+
+    def refill(self) -> None:
+        """
+        Adds the budget earned since the last refill. Called once per operation, so the time spent
+        moving keys doesn't refill the bucket while the operation runs
+        """
+        now = self.clock()
+        elapsed = now - self.refilled_at
+        self.refilled_at = now
+        if self.keys_per_second is not None:
+            self.key_tokens = min(self.key_tokens + elapsed * self.keys_per_second, self.keys_per_second * self.burst)
+        if self.bytes_per_second is not None:
+            self.byte_tokens = min(self.byte_tokens + elapsed * self.bytes_per_second, self.bytes_per_second * self.burst)
+
+class Migration:
+    """
+    Keys of source moving, a chunk per step, to the nodes that own them now
+    """
+    def __init__(self, source: Node, destination_of: Callable[[int], Node], chunk_size: int) -> None:
+        self.source = source
+        self.steps: Iterator[tuple[int, int]] = source.export_keys_chunks(destination_of, chunk_size)
+        self.keys_moved = 0
+        self.bytes_moved = 0
+        self.done = False
+
+    def step(self) -> tuple[int, int]:
+        """
+        Moves the next chunk. Returns the keys and bytes moved
+        """
+        try:
+            keys, bytes = next(self.steps)
+        except StopIteration:
+            self.done = True
+            return 0, 0
+        self.keys_moved += keys
+        self.bytes_moved += bytes
+        return keys, bytes
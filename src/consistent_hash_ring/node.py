@@ -1,19 +1,48 @@
-from typing import Any
-from src.hash import hash
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+from typing import Any, Callable, Iterator
+from src.hash import Hasher, default_hasher
 from .errors.node_errors import KeyNotFoundError, NodeIsFullError
 
 class Node:
     """
     Node class is just an abstraction of a dictionary.
     This can represent an node of a database, machine, etc.
+    The values are kept in storage, a dict by default. A storage that already has keys, like a
+    reopened LogStorage, is indexed when the node is created
     """
-    def __init__(self, node_index: int, capacity: int, replica_count: int = 1) -> None:
+    __slots__ = ('hasher', 'replica_count', 'capacity', 'index', 'ready', 'data', 'key_hashes', 'sorted_hashes', 'sorted_keys',
+                 'replicas', 'reads_served', 'lock')
+
+    def __init__(self, node_index: int, capacity: int, replica_count: int = 1, hasher: Hasher = default_hasher, storage: MutableMapping | None = None) -> None:
+        self.hasher = hasher
         self.replica_count = replica_count
         self.capacity = capacity
         self.index = node_index
         self.ready = False
-        self.data = dict()
-        self.keys_to_delete = list()
+        self.data = dict() if storage is None else storage
+        self.key_hashes: dict[str, int] = dict()      # Hash of every stored key, so moving keys never rehashes
+        self.sorted_hashes: list[int] = list()        # Hashes and keys ordered by hash, for median splits
+        self.sorted_keys: list[str] = list()
+        if self.data:
+            keys = list(self.data)
+            self.key_hashes = dict(zip(keys, hasher.hash_many(keys)))
+            ordered = sorted(zip(self.key_hashes.values(), keys))
+            self.sorted_hashes = [key_hash for key_hash, _ in ordered]
+            self.sorted_keys = [key for _, key in ordered]
+        self.replicas: dict[int, dict[str, Any]] = dict()     # Arc position -> copies of the keys other nodes own in that arc
+        self.reads_served = 0
+        self.lock = threading.Lock()            # Guards the node data when used by ConcurrentRing
+
+    def close(self, remove: bool = False) -> None:
+        """
+        Closes the storage, if it can be closed. remove also deletes what it kept, for nodes that left the ring
+        """
+        close = getattr(self.data, 'close', None)
+        if close is not None:
+            close(remove)
 
     def is_full(self) -> bool:
         return len(self.data) >= self.capacity
@@ -24,12 +53,29 @@ class Node:
     def set_node_not_ready(self) -> None:
         self.ready = False  
 
-    def insert(self, key: str, value: Any) -> None:
+    def insert(self, key: str, value: Any, key_hash: int | None = None) -> None:
+        """
+        Inserts the key. key_hash can be passed when the caller already hashed the key
+        """
+        if key in self.key_hashes:
+            self.data[key] = value
+            return
+        if key_hash is None:
+            key_hash = self.hasher(key)
         self.data[key] = value
+        self.key_hashes[key] = key_hash
+        index = bisect_right(self.sorted_hashes, key_hash)
+        self.sorted_hashes.insert(index, key_hash)
+        self.sorted_keys.insert(index, key)
 
     def delete(self, key: str) -> Any:
         if not self.has_key(key):
             raise KeyNotFoundError(f'Key {key} not found')
+        index = bisect_left(self.sorted_hashes, self.key_hashes.pop(key))
+        while self.sorted_keys[index] != key:         # Keys with the same hash are next to each other
+            index += 1
+        del self.sorted_hashes[index]
+        del self.sorted_keys[index]
         return self.data.pop(key)
 
     def get(self, key: str) -> Any | None:
@@ -38,6 +84,9 @@ class Node:
         return self.data[key]
     
     def update(self, key: str, new_value: Any) -> None:
+        if key not in self.data:
+            self.insert(key, new_value)
+            return
         self.data[key] = new_value
 
     def has_key(self, key: str) -> bool:
@@ -46,28 +95,161 @@ class Node:
     def list_items(self)->dict | None:
         return list(self.data.items())
 
-    def clean_keys(self)->None:
-        for key in self.keys_to_delete:
-            self.delete(key)
-        self.keys_to_delete = list()
+    def clean_keys(self, keys: list[str])->None:
+        """
+        Deletes all the keys, rebuilding the hash order once
+        """
+        if not keys:
+            return
+        for key in keys:
+            if not self.has_key(key):
+                raise KeyNotFoundError(f'Key {key} not found')
+            del self.data[key]
+            del self.key_hashes[key]
+        remaining = [(key_hash, key) for key_hash, key in zip(self.sorted_hashes, self.sorted_keys) if key in self.data]
+        self.sorted_hashes = [key_hash for key_hash, _ in remaining]
+        self.sorted_keys = [key for _, key in remaining]
         
-    def export_keys(self, other_node, first_key_hash: int)->None:
+    def get_key_hash(self, key: str) -> int:
+        return self.key_hashes[key]
+
+    def export_keys(self, other_node, first_key_hash: int, last_key_hash: int | None = None)->None:
         """
-        Exports all keys with hash equal or greater than first_key_hash to the other node
+        Exports all keys with hash equal or greater than first_key_hash, and up to
+        last_key_hash if provided, to the other node
         """
-        for key in self.data.keys():
-            if first_key_hash <= hash(key):
+        exported = list()
+        for key, key_hash in self.key_hashes.items():
+            if first_key_hash <= key_hash and (last_key_hash is None or key_hash <= last_key_hash):
                 value = self.data[key]
-                other_node.insert(key, value)     # Import and delete the key from the other node
-                self.keys_to_delete.append(key)
-        self.clean_keys()
+                other_node.insert(key, value, key_hash)     # Import and delete the key from the other node
+                exported.append(key)
+        self.clean_keys(exported)
+
+    def export_keys_where(self, other_node, should_export: Callable[[int], bool])->int:
+        """
+        Exports all keys whose hash matches should_export to the other node.
+        Returns how many keys were moved
+        """
+        exported = list()
+        for key, key_hash in self.key_hashes.items():
+            if should_export(key_hash):
+                other_node.insert(key, self.data[key], key_hash)
+                exported.append(key)
+        self.clean_keys(exported)
+        return len(exported)
+
+    def export_keys_chunks(self, destination_of: Callable[[int], Any], chunk_size: int)->Iterator[tuple[int, int]]:
+        """
+        Generator moving the keys whose destination_of(hash) is another node, looking at chunk_size keys per step.
+        Yields the keys and the approximate bytes moved in each step. Keys written at the destination
+        meanwhile are newer, so they are only dropped here. Only the keys are copied up front, not the values
+        """
+        keys = list(self.key_hashes)
+        for start in range(0, len(keys), chunk_size):
+            moved_keys = moved_bytes = 0
+            for key in keys[start:start + chunk_size]:
+                key_hash = self.key_hashes.get(key)
+                if key_hash is None:                # Deleted since the migration started
+                    continue
+                destination = destination_of(key_hash)
+                if destination is self:
+                    continue
+                value = self.delete(key)            # A chunk is small: deleting key by key beats rebuilding the index
+                if not destination.has_key(key):
+                    destination.insert(key, value, key_hash)
+                moved_keys += 1
+                moved_bytes += sys.getsizeof(key) + sys.getsizeof(value)
+            yield moved_keys, moved_bytes
+
+    def items_in_arc(self, start: int, end: int)->dict[str, Any]:
+        """
+        Returns the items with hash in [start, end). If end is not after start, the arc wraps around the ring
+        """
+        first = bisect_left(self.sorted_hashes, start)
+        last = bisect_left(self.sorted_hashes, end)
+        if start < end:
+            keys = self.sorted_keys[first:last]
+        else:
+            keys = self.sorted_keys[first:] + self.sorted_keys[:last]
+        return {key: self.data[key] for key in keys}
+
+    def store_replica(self, arc: int, items: dict[str, Any])->None:
+        self.replicas[arc] = items
+
+    def drop_replica(self, arc: int)->None:
+        self.replicas.pop(arc, None)
+
+    def has_replica_key(self, arc: int, key: str)->bool:
+        return arc in self.replicas and key in self.replicas[arc]
+
+    def get_replica(self, arc: int, key: str)->Any | None:
+        return self.replicas[arc].get(key) if arc in self.replicas else None
+
+    def _median_index(self, position: int)->int | None:
+        """
+        Index, in the hash order rotated to start at position, of the first key of the upper half.
+        Keys with the same hash are kept on the same side. Returns None if the node can't be split
+        """
+        keys_count = len(self.sorted_hashes)
+        if keys_count < 2:
+            return None
+        start = bisect_left(self.sorted_hashes, position)
+        rotated_hash = lambda index: self.sorted_hashes[(start + index) % keys_count]
+        median = keys_count // 2
+        while median > 0 and rotated_hash(median) == rotated_hash(median - 1):
+            median -= 1
+        if median == 0 or rotated_hash(median) == position:
+            return None
+        return median
+
+    def calc_median_hash(self, position: int = 0)->int | None:
+        """
+        Calculates the median of the hash of all keys, going clockwise from position,
+        the ring position of this node. Returns None if the node can't be split
+        """
+        median = self._median_index(position)
+        if median is None:
+            return None
+        start = bisect_left(self.sorted_hashes, position)
+        return self.sorted_hashes[(start + median) % len(self.sorted_hashes)]
+
+    def export_upper_half(self, other_node, position: int = 0)->int | None:
+        """
+        Moves the keys from the clockwise median onwards to the other, empty, node in one bulk move.
+        Returns the median hash, where the other node should be placed, or None if the node can't be split
+        """
+        median = self._median_index(position)
+        if median is None:
+            return None
+        keys_count = len(self.sorted_hashes)
+        start = bisect_left(self.sorted_hashes, position)
+        first = (start + median) % keys_count
+        median_hash = self.sorted_hashes[first]
+        if first >= start:          # Upper half is [first, end) plus the keys that wrapped around, [0, start)
+            moved = (slice(0, start), slice(first, keys_count))
+            kept = (slice(start, first),)
+        else:                       # The median itself wrapped around: upper half is [first, start)
+            moved = (slice(first, start),)
+            kept = (slice(0, first), slice(start, keys_count))
+
+        moved_hashes = [key_hash for part in moved for key_hash in self.sorted_hashes[part]]
+        moved_keys = [key for part in moved for key in self.sorted_keys[part]]
+        for key_hash, key in zip(moved_hashes, moved_keys):
+            other_node.data[key] = self.data.pop(key)
+            other_node.key_hashes[key] = key_hash
+            del self.key_hashes[key]
+        other_node.sorted_hashes = moved_hashes
+        other_node.sorted_keys = moved_keys
+        self.sorted_hashes = [key_hash for part in kept for key_hash in self.sorted_hashes[part]]
+        self.sorted_keys = [key for part in kept for key in self.sorted_keys[part]]
+        return median_hash
 
     def calc_mid_hash(self)->int:
         """
         Calculates the mean of the hash all keys of the node
         """
-        
-        return sum([hash(key) for key in self.data.keys()]) // len(self.data.keys())
+        return sum(self.key_hashes.values()) // len(self.key_hashes)
     
     def __str__(self) -> str:
         base_str = []
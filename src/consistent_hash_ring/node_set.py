@@ -1,4 +1,4 @@
-from consistent_hash_ring.node import Node
+from .node import Node
 from typing import Any
 
 
@@ -53,23 +53,23 @@ class NodeSet:
         """
         Imports data from other NodeSet
         """
-        for index, node in enumerate(other_nodeset):
-            self.nodes[index].import_keys(node)
+        for index, node in enumerate(other_nodeset.nodes):
+            node.export_keys(self.nodes[index], 0)
         return True
 
-    def export_keys(self, other_nodeset: 'NodeSet')->bool:
+    def export_keys(self, other_nodeset: 'NodeSet', first_key_hash: int = 0)->bool:
         """
-        Exports data to other NodeSet
+        Exports data with hash equal or greater than first_key_hash to other NodeSet
         """
-        for index, node in enumerate(other_nodeset):
-            self.nodes[index].export_keys(node)
+        for index, node in enumerate(other_nodeset.nodes):
+            self.nodes[index].export_keys(node, first_key_hash)
         return True    
 
     def calc_mid_hash(self)->int:
         """
         Calculates the mean of the hash all keys of the node
         """
-        return sum(map(lambda x: hash(x), self.data.keys())) // len(self.data)
+        return self.nodes[0].calc_mid_hash()
 
     def is_full(self)->bool:
         return all([node.is_full() for node in self.nodes])
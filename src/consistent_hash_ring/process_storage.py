@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import socket
+import struct
+import tempfile
+import time
+from typing import Any, Iterable
+from .node import Node
+from .storage import AsyncStorage
+
+# Frames are a header (operation, body length) and a body of length prefixed fields:
+# keys for GET and DELETE requests, key and pickled value pairs for PUT requests and ITEMS responses
+HEADER = struct.Struct('!BI')
+LENGTH = struct.Struct('!I')
+OP_GET, OP_PUT, OP_DELETE, OP_ITEMS, OP_OK = range(5)
+
+# Forked workers would inherit the router connections of the previous ones, which then never see the router leave
+WORKER_CONTEXT = multiprocessing.get_context('forkserver')
+WORKER_START_TIMEOUT = 30.0             # Seconds a worker has to listen on its socket
+
+def encode_fields(fields: Iterable[bytes])->bytes:
+    parts = []
+    for field in fields:
+        parts.append(LENGTH.pack(len(field)))
+        parts.append(field)
+    return b''.join(parts)
+
+def decode_fields(body: bytes)->list[bytes]:
+    fields = []
+    offset = 0
+    while offset < len(body):
+        (length,) = LENGTH.unpack_from(body, offset)
+        offset += LENGTH.size
+        fields.append(body[offset:offset + length])
+        offset += length
+    return fields
+
+def _receive_exactly(connection: socket.socket, size: int)->bytes | None:
+    chunks = []
+    while size:
+        chunk = connection.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def serve(socket_path: str, ready)->None:
+    """
+    Worker process loop: stores the keys of one node, answering the router over the socket.
+    Values are kept pickled, so the worker never deserializes them
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen(1)
+        ready.set()
+        connection, _ = server.accept()
+    data: dict[bytes, bytes] = dict()
+    with connection:
+        while True:
+            header = _receive_exactly(connection, HEADER.size)
+            if header is None:
+                return
+            operation, length = HEADER.unpack(header)
+            fields = decode_fields(_receive_exactly(connection, length) if length else b'')
+            if operation == OP_GET:
+                response_fields = []
+                for key in fields:
+                    if key in data:
+                        response_fields += [key, data[key]]
+                body = encode_fields(response_fields)
+                connection.sendall(HEADER.pack(OP_ITEMS, len(body)) + body)
+                continue
+            if operation == OP_PUT:
+                data.update(zip(fields[::2], fields[1::2]))
+            elif operation == OP_DELETE:
+                for key in fields:
+                    data.pop(key, None)
+            connection.sendall(HEADER.pack(OP_OK, 0))
+
+class ProcessStorage(AsyncStorage):
+    """
+    Storage of a node living in a worker process, reached over a Unix domain socket.
+    Requests on the connection are sent one at a time
+    """
+    def __init__(self, socket_path: str, process: multiprocessing.Process | None = None) -> None:
+        self.socket_path = socket_path
+        self.process = process
+        self.lock = asyncio.Lock()
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def get_many(self, keys: Iterable[str])->dict[str, Any]:
+        fields = await self._request(OP_GET, [key.encode() for key in keys])
+        return {key.decode(): pickle.loads(value) for key, value in zip(fields[::2], fields[1::2])}
+
+    async def put_many(self, items: Iterable[tuple[str, Any]])->None:
+        fields = []
+        for key, value in items:
+            fields += [key.encode(), pickle.dumps(value)]
+        await self._request(OP_PUT, fields)
+
+    async def delete_many(self, keys: Iterable[str])->None:
+        await self._request(OP_DELETE, [key.encode() for key in keys])
+
+    async def close(self)->None:
+        """
+        Closes the connection, which ends the worker, and removes the socket
+        """
+        connected = self.writer is not None
+        if connected:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.writer = None
+        if self.process is not None:
+            if not connected:           # The worker is still waiting for the router
+                self.process.terminate()
+            await asyncio.get_running_loop().run_in_executor(None, self.process.join)
+            self.process = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+            try:
+                os.rmdir(os.path.dirname(self.socket_path))
+            except OSError:             # Other workers still use the directory
+                pass
+
+    async def _request(self, operation: int, fields: list[bytes])->list[bytes]:
+        body = encode_fields(fields)
+        async with self.lock:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+            self.writer.write(HEADER.pack(operation, len(body)) + body)
+            await self.writer.drain()
+            _, length = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+            return decode_fields(await self.reader.readexactly(length)) if length else []
+
+def spawn_worker(node: Node, socket_dir: str | None = None, timeout: float = WORKER_START_TIMEOUT)->ProcessStorage:
+    """
+    Starts a worker process for the node and returns its storage, once the worker listens on its socket.
+    Raises RuntimeError if the worker exits first, e.g. as the socket path is too long to bind,
+    or doesn't listen within timeout seconds
+    """
+    socket_dir = socket_dir if socket_dir is not None else tempfile.mkdtemp(prefix='ring-')
+    socket_path = os.path.join(socket_dir, f'node-{node.index}.sock')
+    ready = WORKER_CONTEXT.Event()
+    process = WORKER_CONTEXT.Process(target=serve, args=(socket_path, ready), daemon=True)
+    process.start()
+    deadline = time.monotonic() + timeout
+    while not ready.wait(0.05):
+        if not process.is_alive():
+            process.join()
+            raise RuntimeError(f'Worker of node {node.index} exited with code {process.exitcode} before listening on {socket_path}')
+        if time.monotonic() >= deadline:
+            process.terminate()
+            process.join()
+            raise RuntimeError(f'Worker of node {node.index} did not listen on {socket_path} within {timeout} seconds')
+    return ProcessStorage(socket_path, process)
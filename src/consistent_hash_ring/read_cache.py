@@ -0,0 +1,234 @@
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Callable, Iterator
+
+MAX_COUNT = 15
+HALVE = bytes(count >> 1 for count in range(256))      # Translation table dividing every counter by 2
+
+class FrequencySketch:
+    """
+    Count-min sketch of how often keys were read, with 4 rows of saturating counters up to 15 in a single bytearray.
+    Row i is indexed by the low bits of hash + i * step, with the step taken from the high bits of the hash.
+    Once the additions reach 10 times the width every counter is halved, so old popularity fades
+    """
+    def __init__(self, width: int) -> None:
+        self.width = 1 << max(width - 1, 1).bit_length()       # Power of two, so rows are indexed with a mask
+        self.mask = self.width - 1
+        self.table = bytearray(4 * self.width)
+        self.additions = 0
+        self.sample_size = 10 * self.width
+        self.ages = 0
+
+    def increment(self, key: str) -> int:
+        """
+        Counts a read of the key, only raising the counters at the minimum (conservative update).
+        Returns the new estimate. The rows are unrolled, as this runs on every read
+        """
+        key_hash = hash(key)
+        step = (key_hash >> 32) | 1
+        mask, width, table = self.mask, self.width, self.table
+        slot_0 = key_hash & mask
+        slot_1 = width + ((key_hash + step) & mask)
+        slot_2 = 2 * width + ((key_hash + 2 * step) & mask)
+        slot_3 = 3 * width + ((key_hash + 3 * step) & mask)
+        count_0, count_1, count_2, count_3 = table[slot_0], table[slot_1], table[slot_2], table[slot_3]
+        estimate = min(count_0, count_1, count_2, count_3)
+        if estimate < MAX_COUNT:
+            if count_0 == estimate:
+                table[slot_0] = estimate + 1
+            if count_1 == estimate:
+                table[slot_1] = estimate + 1
+            if count_2 == estimate:
+                table[slot_2] = estimate + 1
+            if count_3 == estimate:
+                table[slot_3] = estimate + 1
+            estimate += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        key_hash = hash(key)
+        step = (key_hash >> 32) | 1
+        mask, width, table = self.mask, self.width, self.table
+        return min(table[key_hash & mask], table[width + ((key_hash + step) & mask)],
+                   table[2 * width + ((key_hash + 2 * step) & mask)], table[3 * width + ((key_hash + 3 * step) & mask)])
+
+    def _age(self) -> None:
+        self.table = self.table.translate(HALVE)
+        self.additions //= 2
+        self.ages += 1
+
+class ReadCache:
+    """
+    Bounded cache of the values read from a ring, keyed by the key string so hits skip hashing and routing.
+    By default it is a plain LRU. With admission, it follows W-TinyLFU: new keys enter a small LRU window,
+    and a key leaving the window only replaces the least recently used key of the main LRU if the frequency
+    sketch saw it more often, so a burst of one-off reads can't flush the popular keys.
+    With top_k, the keys the sketch counts the most are also tracked per node, as hot keys, hits and misses alike.
+    The sketch is only kept for admission or top_k, as counting every read is most of the cost of a hit
+    """
+    def __init__(self, capacity: int, admission: bool = False, window_fraction: float = 0.01, top_k: int = 0) -> None:
+        if capacity < 2:
+            raise ValueError(f'capacity must be at least 2, got {capacity}')
+        self.capacity = capacity
+        self.admission = admission
+        self.window_capacity = max(1, int(capacity * window_fraction)) if admission else 0
+        self.main_capacity = capacity - self.window_capacity
+        self.window: OrderedDict[str, tuple[Any, int, int]] = OrderedDict()     # Key -> (value, key hash, node index)
+        self.main: OrderedDict[str, tuple[Any, int, int]] = OrderedDict()
+        # Wider than the cache, so the keys read once rarely collide with the cached ones
+        self.sketch = FrequencySketch(4 * capacity) if admission or top_k else None
+        self.top_k = top_k
+        self.hot: dict[int, dict[str, tuple[int, int]]] = dict()     # Node index -> hot key -> (key hash, estimate)
+        self.hot_floor: dict[int, int] = dict()                 # Node index -> lowest estimate of its hot keys
+        self.hot_nodes: dict[str, int] = dict()                 # Hot key -> index of the node tracking it
+        self.sketch_ages = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.main)
+
+    @property
+    def hit_ratio(self) -> float:
+        reads = self.hits + self.misses
+        return self.hits / reads if reads else 0.0
+
+    def get(self, key: str) -> tuple[Any, int, int] | None:
+        """
+        Returns the cached (value, key hash, node index) of the key, or None
+        """
+        sketch = self.sketch
+        estimate = sketch.increment(key) if sketch is not None else 0
+        entry = self.main.get(key)
+        if entry is not None:
+            self.main.move_to_end(key)
+        else:
+            entry = self.window.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.window.move_to_end(key)
+        self.hits += 1
+        if self.top_k:
+            self._track(key, entry[1], entry[2], estimate)
+        return entry
+
+    def put(self, key: str, value: Any, key_hash: int, node_index: int) -> None:
+        """
+        Caches the value read from the node, after a miss
+        """
+        if self.top_k:
+            self._track(key, key_hash, node_index, self.sketch.estimate(key))
+        if not self.admission:
+            self.main[key] = (value, key_hash, node_index)
+            if len(self.main) > self.main_capacity:
+                self.main.popitem(last=False)
+                self.evictions += 1
+            return
+        self.window[key] = (value, key_hash, node_index)
+        if len(self.window) > self.window_capacity:
+            self._admit(*self.window.popitem(last=False))
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drops the key, written or deleted, from the cache and from the hot keys
+        """
+        if self.window.pop(key, None) is None:
+            self.main.pop(key, None)
+        if self.hot_nodes:
+            self._untrack(key)
+
+    def entries(self) -> Iterator[tuple[str, int, int]]:
+        """
+        Yields the (key, key hash, node index) of every cached key
+        """
+        for key, (_, key_hash, node_index) in list(self.window.items()) + list(self.main.items()):
+            yield key, key_hash, node_index
+
+    def clear(self) -> None:
+        self.window.clear()
+        self.main.clear()
+
+    def hot_keys(self) -> dict[int, list[tuple[str, int]]]:
+        """
+        The tracked hot keys of every node, with their estimated reads, most read first
+        """
+        return {index: sorted(((key, estimate) for key, (_, estimate) in keys.items()), key=itemgetter(1), reverse=True)
+                for index, keys in self.hot.items() if keys}
+
+    def reassign_hot_keys(self, node_of: Callable[[int], int]) -> None:
+        """
+        Moves the hot keys to the nodes node_of maps their hashes to, after a topology change,
+        keeping the top_k most read of every node
+        """
+        regrouped: dict[int, dict[str, tuple[int, int]]] = dict()
+        for keys in self.hot.values():
+            for key, entry in keys.items():
+                regrouped.setdefault(node_of(entry[0]), dict())[key] = entry
+        for index, keys in regrouped.items():
+            if len(keys) > self.top_k:
+                regrouped[index] = dict(sorted(keys.items(), key=lambda item: item[1][1], reverse=True)[:self.top_k])
+        self.hot = regrouped
+        self.hot_floor = dict()
+        self.hot_nodes = {key: index for index, keys in regrouped.items() for key in keys}
+
+    def _admit(self, candidate: str, entry: tuple[Any, int, int]) -> None:
+        """
+        Moves the key leaving the window to the main LRU, if it was read more often than the key it would evict
+        """
+        if len(self.main) < self.main_capacity:
+            self.main[candidate] = entry
+            return
+        victim = next(iter(self.main))
+        self.evictions += 1
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del self.main[victim]
+            self.main[candidate] = entry
+
+    def _track(self, key: str, key_hash: int, node_index: int, estimate: int) -> None:
+        """
+        Keeps the key among the hot keys of its node if it beats the least read of them.
+        The estimates of the hot keys are refreshed when they are read, and the lowest of every node
+        is only searched again when a key is replaced
+        """
+        if self.sketch.ages != self.sketch_ages:        # The sketch halved its counters
+            shift = self.sketch.ages - self.sketch_ages
+            self.sketch_ages = self.sketch.ages
+            for keys in self.hot.values():
+                for hot_key, (hot_hash, hot_estimate) in keys.items():
+                    keys[hot_key] = (hot_hash, hot_estimate >> shift)
+            self.hot_floor = dict()
+        tracked_by = self.hot_nodes.get(key)
+        if tracked_by is not None and tracked_by != node_index:     # Cached before the key changed node
+            self._untrack(key)
+        keys = self.hot.get(node_index)
+        if keys is None:
+            keys = self.hot[node_index] = dict()
+        if key in keys:
+            keys[key] = (key_hash, estimate)
+            return
+        if len(keys) < self.top_k:
+            keys[key] = (key_hash, estimate)
+            self.hot_nodes[key] = node_index
+            self.hot_floor.pop(node_index, None)
+            return
+        floor = self.hot_floor.get(node_index)
+        if floor is not None and estimate <= floor:
+            return
+        coldest = min(keys, key=lambda hot_key: keys[hot_key][1])
+        if estimate > keys[coldest][1]:
+            del keys[coldest]
+            del self.hot_nodes[coldest]
+            keys[key] = (key_hash, estimate)
+            self.hot_nodes[key] = node_index
+        self.hot_floor[node_index] = min(hot_estimate for _, hot_estimate in keys.values())
+
+    def _untrack(self, key: str) -> None:
+        node_index = self.hot_nodes.pop(key, None)
+        if node_index is not None:
+            del self.hot[node_index][key]
+            self.hot_floor.pop(node_index, None)
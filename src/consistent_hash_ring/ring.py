@@ -1,55 +1,171 @@
-from typing import Any
+import math
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Iterable, Iterator
 from .node import Node
+from .scaling_policy import ScalingPolicy
+from .migration import Migration, RateLimiter
+from .read_cache import ReadCache
+from .snapshot import BUFFER_SIZE, read_ring, write_ring
 from src.adt.abstract_data_type import AbstractDataType
-from src.hash import hash
+from src.metrics import Metrics
+from src.hash import Hasher, default_hasher
 from .errors.node_errors import KeyNotFoundError, NodeIsFullError 
-from .errors.ring_errors import NodeNotFoundError
+from .errors.ring_errors import NodeNotFoundError, PositionTakenError
 
 import logging
 logger = logging.getLogger(__name__)
 
 class Ring:
-    def __init__(self, node_capacity: int, node_min_load: int, node_max_load: int, adt: AbstractDataType)->None:
+    def __init__(self, node_capacity: int, adt: AbstractDataType, node_min_load: float = 0.0, node_max_load: float = 1.0, vnodes: int = 1, hasher: Hasher | None = None, policy: ScalingPolicy | None = None, replication_factor: int = 1, load_bound: float | None = None, migration_chunk: int | None = None, migration_limiter: RateLimiter | None = None, node_storage: Callable[[int], MutableMapping] | None = None, read_cache: ReadCache | None = None, route_cache_size: int | None = None, metrics: Metrics | None = None)->None:
+        """
+        With vnodes > 1 every physical node is placed at vnodes positions of the ring,
+        so scaling moves keys from all the nodes instead of only from one neighbour.
+        hasher sets the hash function and the ring space, defaulting to md5.
+        policy decides when nodes are split and merged. If not provided, nodes are split at
+        node_max_load and merged below node_min_load.
+        With replication_factor > 1 every key is also copied to the next replication_factor - 1
+        distinct nodes clockwise, and reads are served by the replica that served the fewest reads.
+        With load_bound = ε, the ring uses consistent hashing with bounded loads: a node holds at most
+        ceil((1 + ε) * average keys per node) keys and the rest spill to the next node clockwise with room.
+        The bound holds after every operation: when a new node or deletes lower the average, the nodes
+        past the bound spill their excess keys.
+        With migration_chunk, splits and merges don't move the keys at once: every operation moves the next
+        migration_chunk keys, or as many chunks as migration_limiter allows. Until a key is moved, it is read
+        from the node it is leaving.
+        node_storage creates the storage of the node with the given index, e.g. a LogStorage to keep
+        the values on disk. Without it the values are kept in dicts.
+        read_cache, if given, serves the reads of cached keys without hashing nor routing them.
+        Writes invalidate their keys, and topology changes the keys that changed node.
+        With route_cache_size, the hash and owner of up to that many keys are memoized, so routing a key
+        seen before is a dict lookup: see _locate()
+        metrics, if given, instruments the ring: see instrument()
+        """
+        if load_bound is not None and load_bound <= 0:
+            raise ValueError(f'load_bound must be positive, got {load_bound}')
+        if load_bound is not None and replication_factor > 1:
+            raise ValueError('load_bound can not be combined with replication_factor > 1')
+        if migration_chunk is not None and (load_bound is not None or replication_factor > 1):
+            raise ValueError('migration_chunk can not be combined with load_bound nor replication_factor > 1')
         self.node_capacity = node_capacity
-        self.node_min_load = node_min_load
-        self.node_max_load = node_max_load
+        self.policy = policy if policy is not None else ScalingPolicy(node_max_load, node_min_load)
+        self.node_min_load = self.policy.merge_load
+        self.node_max_load = self.policy.split_load
+        self.vnodes = vnodes
+        self.hasher = hasher if hasher is not None else default_hasher
         self.ring = adt
-        new_node = Node(0, node_capacity)
-        self.ring.insert(0, new_node)        
+        self.node_positions: dict[int, list[int]] = dict()     # Node index -> ring positions of the node
+        self.next_node_index = 0
+        self.replication_factor = replication_factor
+        self.replica_plan: dict[int, tuple[int, Node, tuple[Node, ...]]] = dict()     # Arc position -> (arc end, owner, replicas)
+        self.load_bound = load_bound
+        self.keys_count = 0                             # Only kept with load_bound
+        self.spilled: dict[str, int] = dict()           # Key -> hash of the keys stored past their owner
+        self.spilled_past: dict[int, int] = dict()      # Node index -> spilled keys whose probe sequence passed the node
+        self.routing: tuple[array | list[int], tuple[Node, ...]] = (array('Q'), ())     # Immutable (positions, nodes) copy of the ring, for readers
+        self.migration_chunk = migration_chunk
+        self.migration_limiter = migration_limiter
+        self.migrations: list[Migration] = list()      # Splits and merges whose keys are still moving
+        self.node_storage = node_storage
+        self.read_cache = read_cache
+        self.topology_epoch = 0                         # Bumped whenever a new routing snapshot is published
+        self.route_cache_size = route_cache_size
+        self.route_cache: OrderedDict[str, tuple[int, int, Node]] | None = None if route_cache_size is None else OrderedDict()     # Key -> (epoch, hash, owner)
+        if vnodes == 1:
+            new_node = self._new_node(0)
+            self.ring.insert(0, new_node)
+            self.node_positions[0] = [0]
+        else:
+            self._add_virtual_node()
+        self._topology_changed()
+        if metrics is not None:
+            self.instrument(metrics)
 
     def insert(self, key: str, value):
         """
         Insert an element in the ring.
         If a node is full, it will create a new node and distribute the keys
         """
-        key_hash = hash(key)
-        node_to_insert: Node = self._find_node(key_hash)
+        if self.read_cache is not None:
+            self.read_cache.invalidate(key)
+        if self.load_bound is not None:
+            return self._insert_bounded(self._locate(key)[0], key, value)
+        key_hash, node_to_insert = self._locate(key)
+        if self.migrations:
+            self._migration_step()
+            self._drop_migrating_copy(key_hash, key)       # The new value replaces the one being moved
 
-        if node_to_insert.load() >= self.node_max_load:
-            logger.info(f'Node {node_to_insert.index} id full: scaling up the ring')
-            self._split_node(node_to_insert)
+        while self.policy.should_split(node_to_insert):
+            if self._is_migrating(node_to_insert):
+                if node_to_insert.load < 1:        # Its split is already moving keys out
+                    break
+                self.finish_migrations(node_to_insert)
+            else:
+                logger.info(f'Node {node_to_insert.index} id full: scaling up the ring')
+                self._split_node(node_to_insert)
             node_to_insert = self._find_node(key_hash)
 
-        node_to_insert.insert(key, value)        
+        node_to_insert.insert(key, value, key_hash)
+        if self.replication_factor > 1:
+            self._replicate(key_hash, key, value)
 
     def get(self, key: str)->Any:
         """
         Returns the value of the key. Raises an exception if not found
         """
-        key_hash = hash(key)
-        node_set_to_search: Node = self._find_node(key_hash)
-        if not node_set_to_search.has(key):
+        cache = self.read_cache
+        if cache is None:
+            return self._get(*self._locate(key), key)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        key_hash, owner = self._locate(key)
+        value = self._get(key_hash, owner, key)
+        cache.put(key, value, key_hash, owner.index)
+        return value
+
+    def _get(self, key_hash: int, owner: Node, key: str)->Any:
+        if self.replication_factor > 1:
+            return self._get_from_replica(key_hash, key)
+        if self.load_bound is not None:
+            node_set_to_search = self._find_holder(key_hash, key)
+            if node_set_to_search is None:
+                raise KeyNotFoundError(f'Key {key} not found')
+            return node_set_to_search.get(key)
+        if self.migrations:
+            self._migration_step()
+            source = self._migrating_source(key_hash, key)     # Keys not moved yet are still in the source
+            if source is not None:
+                return source.get(key)
+        if not owner.has_key(key):
             raise KeyNotFoundError(f'Key {key} not found')
-        return node_set_to_search.get(key)
+        return owner.get(key)
 
     def update(self, key: str, new_value: Any)->None:
         """
         Updates the value of the key. Returns old object if update or None if didn't find
         """
-        key_hash = hash(key)
-        node_set_to_search: Node = self._find_node(key_hash)
-        if not node_set_to_search.has(key):
+        if self.read_cache is not None:
+            self.read_cache.invalidate(key)
+        key_hash, node_set_to_search = self._locate(key)
+        if self.load_bound is not None:
+            node_set_to_search = self._find_holder(key_hash, key)
+            if node_set_to_search is None:
+                raise KeyNotFoundError(f'Key {key} not found')
+            return node_set_to_search.update(key, new_value)
+        if self.migrations:
+            self._migration_step()
+            source = self._migrating_source(key_hash, key)
+            if source is not None:          # Moved now, with its new value
+                source.delete(key)
+                return node_set_to_search.insert(key, new_value, key_hash)
+        if not node_set_to_search.has_key(key):
             raise KeyNotFoundError(f'Key {key} not found')
+        if self.replication_factor > 1:
+            self._replicate(key_hash, key, new_value)
         return node_set_to_search.update(key, new_value)
         
     def delete(self, key: str)->Any:
@@ -57,52 +173,846 @@ class Ring:
         Deletes a item from the ring.
         If node become empty, it will be removed from the ring
         """
-        key_hash = hash(key)
-        node_to_search: Node = self._find_node(key_hash)
+        if self.read_cache is not None:
+            self.read_cache.invalidate(key)
+        if self.load_bound is not None:
+            return self._delete_bounded(self._locate(key)[0], key)
+        key_hash, node_to_search = self._locate(key)
+        if self.migrations:
+            self._migration_step()
+            source = self._migrating_source(key_hash, key)
+            if source is not None:
+                return source.delete(key)
         if not node_to_search.has_key(key):
             raise KeyNotFoundError(f'Key {key} not found')
 
         removed_key = node_to_search.delete(key)
-        if node_to_search.load() < self.node_min_load:
+        if self.replication_factor > 1:
+            self._replicate(key_hash, key, deleted=True)
+        if self.policy.should_merge(node_to_search):
             logger.info(f'Node {node_to_search.index} is underloaded: scaling down the ring')
-            self._delete_node(node_to_search.index)
+            self._merge_node(node_to_search)
             
         return removed_key
         
+    def insert_many(self, items: Iterable[tuple[str, Any]])->None:
+        """
+        Inserts a batch of (key, value) items.
+        The nodes are split only after the whole batch is placed, so a node is not split repeatedly mid-batch
+        """
+        if self.load_bound is not None:         # Every key depends on the loads left by the previous ones
+            for key, value in items:
+                self.insert(key, value)
+            return
+        self.finish_migrations()
+        entries = self._hash_batch(items)
+        if self.read_cache is not None:
+            for _, key, _ in entries:
+                self.read_cache.invalidate(key)
+        keys_per_node = self.policy.keys_per_node(self.node_capacity)
+        if self.vnodes > 1:
+            # New virtual nodes take keys from every node, so the ring is scaled before placing the batch
+            keys_count = sum(len(node.data) for node in self.nodes()) + len(entries)
+            while keys_count > keys_per_node * len(self.node_positions):
+                self._add_virtual_node()
+
+        groups = self._group_entries(entries)
+        for node, node_entries in groups:
+            if self.vnodes == 1 and len(node.data) + len(node_entries) > keys_per_node:
+                self._split_node_many(node, node_entries, keys_per_node)
+                continue
+            for key_hash, key, value in node_entries:
+                node.insert(key, value, key_hash)
+
+        overloaded = [node for node, _ in groups if len(node.data) > keys_per_node]
+        while overloaded:
+            node = overloaded.pop()
+            if len(node.data) <= keys_per_node:
+                continue
+            logger.info(f'Node {node.index} is overloaded after batch insert: scaling up the ring')
+            new_node = self._split_node(node)
+            self.finish_migrations()
+            overloaded.extend([node, new_node])
+        self._publish_routing()
+        self._sync_replicas(key_hash for key_hash, _, _ in entries)
+
+    def get_many(self, keys: Iterable[str])->dict[str, Any]:
+        """
+        Returns the values of a batch of keys. Raises an exception if any is not found
+        """
+        if self.load_bound is not None:
+            return {key: self.get(key) for key in keys}
+        self.finish_migrations()
+        values = dict()
+        for node, node_items in self._group_entries(self._hash_batch((key, None) for key in keys)):
+            for _, key, _ in node_items:
+                if not node.has_key(key):
+                    raise KeyNotFoundError(f'Key {key} not found')
+                values[key] = node.get(key)
+        return values
+
+    def delete_many(self, keys: Iterable[str])->dict[str, Any]:
+        """
+        Deletes a batch of keys, returning their values. Raises an exception, deleting nothing, if any is not found.
+        Underloaded nodes are removed only after the whole batch is deleted
+        """
+        if self.load_bound is not None:
+            keys = list(keys)
+            for key in keys:
+                if self._find_holder(self.hasher(key), key) is None:
+                    raise KeyNotFoundError(f'Key {key} not found')
+            return {key: self.delete(key) for key in keys}
+        self.finish_migrations()
+        groups = self._group_entries(self._hash_batch((key, None) for key in keys))
+        for node, node_items in groups:
+            for _, key, _ in node_items:
+                if not node.has_key(key):
+                    raise KeyNotFoundError(f'Key {key} not found')
+
+        removed = dict()
+        for node, node_items in groups:
+            for _, key, _ in node_items:
+                removed[key] = node.delete(key)
+                if self.read_cache is not None:
+                    self.read_cache.invalidate(key)
+
+        for node, _ in groups:
+            if node.index in self.node_positions and self.policy.should_merge(node):
+                logger.info(f'Node {node.index} is underloaded after batch delete: scaling down the ring')
+                self._merge_node(node)
+        self._sync_replicas(key_hash for _, node_items in groups for key_hash, _, _ in node_items)
+        return removed
+
+    def _find_arc(self, hash: int)->tuple[int, Node]:
+        """
+        Finds the position and the node of the arc that contains the hash
+        """
+        item = self.ring.find_max_item_smaller_than(hash)
+        if item is None:            # Hashes before the first position wrap around to the last node
+            item = self.ring.find_max_item_smaller_than(self.hasher.space)
+        return item
+
+    def _topology_changed(self)->None:
+        self._publish_routing()
+        self._sync_replicas()
+        if self.read_cache is not None:
+            self._revalidate_cache()
+
+    def _revalidate_cache(self)->None:
+        """
+        Drops the cached keys that changed node and moves the hot keys to their new nodes
+        """
+        cache = self.read_cache
+        for key, key_hash, node_index in cache.entries():
+            if self._route(key_hash).index != node_index:
+                cache.invalidate(key)
+        cache.reassign_hot_keys(lambda key_hash: self._route(key_hash).index)
+
+    def _publish_routing(self)->None:
+        """
+        Builds a new routing snapshot and swaps it in with a single assignment.
+        Readers holding the previous one keep a consistent, if outdated, view of the ring
+        """
+        entries = list(self.ring)
+        positions = [position for position, _ in entries]
+        if self.hasher.space <= 2 ** 64:
+            positions = array('Q', positions)
+        self.routing = (positions, tuple(node for _, node in entries))
+        self.topology_epoch += 1
+
+    def _locate(self, key: str)->tuple[int, Node]:
+        """
+        Returns the hash and the owner of the key. With the route cache, both are memoized with the
+        topology epoch they were routed in. Entries of an older epoch still have the right hash,
+        so only the routing is done again. The least recently used entry is evicted once the cache is full
+        """
+        cache = self.route_cache
+        if cache is None:
+            key_hash = self.hasher(key)
+            return key_hash, self._route(key_hash)
+        entry = cache.get(key)
+        if entry is None:
+            key_hash = self.hasher(key)
+            if len(cache) >= self.route_cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+            if entry[0] == self.topology_epoch:
+                return entry[1], entry[2]
+            key_hash = entry[1]
+        node = self._route(key_hash)
+        cache[key] = (self.topology_epoch, key_hash, node)
+        return key_hash, node
+
+    def _route(self, hash: int, routing: tuple[array | list[int], tuple[Node, ...]] | None = None)->Node:
+        """
+        Finds the node of the hash in the routing snapshot, or in an older one if given.
+        Same result as _find_node, without walking the ADT
+        """
+        positions, nodes = self.routing if routing is None else routing
+        return nodes[bisect_right(positions, hash) - 1]     # Hashes before the first position wrap around to the last node
+
+    def _replica_plan(self)->dict[int, tuple[int, Node, tuple[Node, ...]]]:
+        """
+        For every arc, finds its end, its owner and the next replication_factor - 1 distinct nodes clockwise
+        """
+        positions = list(self.ring)
+        replicas_count = min(self.replication_factor, len(self.node_positions)) - 1
+        plan = dict()
+        for i, (position, owner) in enumerate(positions):
+            replicas = []
+            next_index = i + 1
+            while len(replicas) < replicas_count:
+                candidate = positions[next_index % len(positions)][1]
+                if candidate is not owner and candidate not in replicas:
+                    replicas.append(candidate)
+                next_index += 1
+            arc_end = positions[(i + 1) % len(positions)][0]
+            plan[position] = (arc_end, owner, tuple(replicas))
+        return plan
+
+    def _sync_replicas(self, key_hashes: Iterable[int] = ())->None:
+        """
+        Copies the keys of every arc whose owner, end or replicas changed since the last sync, to its replicas.
+        The arcs of key_hashes, keys written by a batch, are copied again too, so a batch costs the arcs it touched
+        """
+        if self.replication_factor == 1:
+            return
+        plan = self._replica_plan()
+        for position, entry in self.replica_plan.items():
+            if plan.get(position) != entry:
+                for replica in entry[2]:
+                    replica.drop_replica(position)
+        stale = {position for position, entry in plan.items() if self.replica_plan.get(position) != entry}
+        positions = self.routing[0]
+        stale.update(positions[bisect_right(positions, key_hash) - 1] for key_hash in key_hashes)
+        for position in stale:
+            arc_end, owner, replicas = plan[position]
+            items = owner.items_in_arc(position, arc_end)
+            for replica in replicas:
+                replica.store_replica(position, dict(items))
+        self.replica_plan = plan
+
+    def _replicate(self, key_hash: int, key: str, value: Any = None, deleted: bool = False)->None:
+        position, _ = self._find_arc(key_hash)
+        for replica in self.replica_plan[position][2]:
+            if deleted:
+                replica.replicas[position].pop(key, None)
+            else:
+                replica.replicas[position][key] = value
+
+    def _get_from_replica(self, key_hash: int, key: str)->Any:
+        """
+        Reads the key from the copy of its arc, owner or replica, that served the fewest reads
+        """
+        position, owner = self._find_arc(key_hash)
+        _, _, replicas = self.replica_plan[position]
+        reader = min((owner,) + replicas, key=lambda node: node.reads_served)
+        reader.reads_served += 1
+        if reader is owner:
+            if not owner.has_key(key):
+                raise KeyNotFoundError(f'Key {key} not found')
+            return owner.get(key)
+        if not reader.has_replica_key(position, key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        return reader.get_replica(position, key)
+
+    def _hash_batch(self, items: Iterable[tuple[str, Any]])->list[tuple[int, str, Any]]:
+        """
+        Hashes the whole batch up front, returning (hash, key, value) entries sorted by hash
+        """
+        items = list(items)
+        hashes = self.hasher.hash_many(key for key, _ in items)
+        return sorted(((key_hash, key, value) for key_hash, (key, value) in zip(hashes, items)), key=lambda entry: entry[0])
+
+    def _group_entries(self, entries: list[tuple[int, str, Any]])->list[tuple[Node, list[tuple[int, str, Any]]]]:
+        """
+        Walks the ring positions once alongside the sorted entries, grouping them by the node that owns them
+        """
+        groups: dict[int, tuple[Node, list]] = dict()
+        if not entries:
+            return []
+
+        positions = iter(self.ring)
+        next_position = next(positions, None)
+        owner: Node = self._find_node(entries[0][0])
+        for entry in entries:
+            while next_position is not None and next_position[0] <= entry[0]:
+                owner = next_position[1]
+                next_position = next(positions, None)
+            if owner.index not in groups:
+                groups[owner.index] = (owner, [])
+            groups[owner.index][1].append(entry)
+        return list(groups.values())
+
+    def _split_node_many(self, node: Node, node_entries: list[tuple[int, str, Any]], keys_per_node: int)->list[Node]:
+        """
+        Places node_entries in the node, splitting it once in as many nodes as needed.
+        The keys are ordered clockwise from the node position and cut in chunks, each chunk
+        starting a new node, so every key is moved at most once
+        """
+        position = self.node_positions[node.index][0]
+        stored_value = object()                 # Marks the keys already in the node
+        stored = [(key_hash, key, stored_value) for key, key_hash in node.key_hashes.items()]
+        combined = sorted(stored + node_entries, key=lambda entry: (entry[0] < position, entry[0]))
+        chunks_count = math.ceil(len(combined) / keys_per_node)
+        chunk_size = math.ceil(len(combined) / chunks_count)
+
+        boundaries = [0]
+        for boundary in range(chunk_size, len(combined), chunk_size):
+            boundary = max(boundary, boundaries[-1] + 1)
+            while boundary < len(combined) and combined[boundary][0] == combined[boundary - 1][0]:
+                boundary += 1               # Keys with the same hash must stay in the same node
+            if boundary < len(combined):
+                boundaries.append(boundary)
+        boundaries.append(len(combined))
+
+        new_nodes = []
+        moved = []
+        with self.ring.batch():             # The new positions are added to the ADT at once
+            for start, end in zip(boundaries, boundaries[1:]):
+                owner = node
+                if start > 0:
+                    owner = self._create_node(combined[start][0])
+                    new_nodes.append(owner)
+                    self.policy.record_split(node.index, owner.index)
+                for key_hash, key, value in combined[start:end]:
+                    if value is not stored_value:
+                        owner.insert(key, value, key_hash)
+                    elif owner is not node:
+                        owner.insert(key, node.get(key), key_hash)
+                        moved.append(key)
+        node.clean_keys(moved)
+        logger.info(f'Node {node.index} split in {len(new_nodes) + 1} nodes by a batch insert')
+        return new_nodes
+
+    def nodes(self)->Iterator[Node]:
+        """
+        Iterates over the physical nodes of the ring, once each
+        """
+        seen = set()
+        for _, node in self.ring:
+            if node.index not in seen:
+                seen.add(node.index)
+                yield node
+
+    def add_node(self)->Node:
+        """
+        Scales up the ring by one node.
+        With virtual nodes the new node takes keys from all the others, else the most loaded node is split
+        """
+        if self.load_bound is not None:
+            return self._change_topology(self._scale_up)
+        return self._scale_up()
+
+    def _scale_up(self)->Node:
+        if self.vnodes > 1:
+            return self._add_virtual_node()
+        most_loaded = max(self.nodes(), key=lambda node: node.load)
+        self.finish_migrations(most_loaded)         # Its keys leaving for the node its last split created would be split again
+        if most_loaded.calc_median_hash(self.node_positions[most_loaded.index][0]) is None:
+            return self._add_node_in_widest_arc()       # No node has keys to split: nothing to unload
+        return self._split_node(most_loaded)
+
+    def _add_node_in_widest_arc(self)->Node:
+        """
+        Creates a node in the middle of the widest arc, taking the keys of the arc past that point
+        """
+        positions = [position for position, _ in self.ring]
+        space = self.hasher.space
+        widths = [((positions[(i + 1) % len(positions)] - position) % space or space, position) for i, position in enumerate(positions)]
+        width, start = max(widths)
+        if width < 2:
+            raise NodeIsFullError('The ring has no free position for a new node')
+        owner = self._find_node(start)
+        new_node = self._create_node((start + width // 2) % space)
+        if self.migration_chunk is not None:
+            self._start_migration(owner)
+        else:
+            owner.export_keys_where(new_node, lambda key_hash: self._find_node(key_hash) is new_node)
+        self.policy.record_split(owner.index, new_node.index)
+        self._topology_changed()
+        logger.info(f'New node {new_node.index} created in the middle of the arc of node {owner.index}')
+        return new_node
+
+    def remove_node(self, index: int)->bool:
+        """
+        Scales down the ring, moving the keys of the node to the nodes that now own them.
+        Returns False if the receiving nodes don't have capacity for the keys
+        """
+        if self.load_bound is not None:
+            if index in self.node_positions and not self._has_room_without_a_node():
+                logger.info(f'The other nodes can not hold the keys of the ring: keeping node {index}')
+                self.policy.record_rejected_merge()
+                return False
+            return self._change_topology(lambda: self._delete_node(index))
+        return self._delete_node(index)
+
     def _find_node(self, hash: int)->Node:
         """
         Finds the nearest node to a hash, i.e. the greatest that is smaler than the provided hash
         """
-        return self.ring.find_max_smaller_than(hash)
+        node = self.ring.find_max_smaller_than(hash)
+        if node is None:            # Hashes before the first position wrap around to the last node
+            node = self.ring.find_max_smaller_than(self.hasher.space)
+        return node
         
-    def _split_node(self, node: Node)->None:
+    def _split_node(self, node: Node)->Node:
         """
         Splits the node in two, creating a new node with the new_node_index
         """
-        node_mid_hash = node.calc_mid_hash()        # The new node will get half of the keys of the old node.
-        new_node = Node(node_mid_hash, self.node_capacity)
-        self.ring.insert(node_mid_hash, new_node)
-        node.export_keys(new_node, node_mid_hash)
+        if self.vnodes > 1:
+            return self._add_virtual_node(node)
+        position = self.node_positions[node.index][0]
+        node_median_hash = node.calc_median_hash(position)      # The new node will get the upper half of the keys of the old node.
+        if node_median_hash is None:
+            raise NodeIsFullError(f'Node {node.index} is full and its keys can not be split')
+        new_node = self._create_node(node_median_hash)
+        if self.migration_chunk is not None:
+            self._start_migration(node)
+        else:
+            node.export_upper_half(new_node, position)
+        self.policy.record_split(node.index, new_node.index)
+        self._topology_changed()
+
+        logger.info(f'New node created with index {node_median_hash}')
+        return new_node
+
+    def _new_node(self, index: int)->Node:
+        storage = None if self.node_storage is None else self.node_storage(index)
+        return Node(index, self.node_capacity, hasher=self.hasher, storage=storage)
+
+    def close(self)->None:
+        """
+        Moves the pending keys and closes the storage of every node
+        """
+        self.finish_migrations()
+        for node in self.nodes():
+            node.close()
+
+    def save(self, path: str)->None:
+        """
+        Writes a snapshot of the ring to path, replacing it only once complete. Pending migrations are finished first.
+        With node_storage only the topology is saved: close() the ring to save the storages too
+        """
+        temporary = path + '.tmp'
+        with open(temporary, 'wb', buffering=BUFFER_SIZE) as file:
+            write_ring(self, file)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str, adt: AbstractDataType | None = None, policy: ScalingPolicy | None = None, migration_limiter: RateLimiter | None = None, node_storage: Callable[[int], MutableMapping] | None = None, read_cache: ReadCache | None = None, route_cache_size: int | None = None)->'Ring':
+        """
+        Rebuilds a ring saved by save(), without rehashing nor splitting. The ADT defaults to a new one of
+        the saved type and the policy to one with the saved thresholds.
+        Snapshots of rings with node_storage need it again, to reopen the storage of every node
+        """
+        with open(path, 'rb', buffering=BUFFER_SIZE) as file:
+            return read_ring(file, cls, adt, policy, migration_limiter, node_storage, read_cache, route_cache_size)
+
+    def _create_node(self, position: int)->Node:
+        """
+        Creates a node with a single position, indexed by that position
+        """
+        if self.ring.search(position) is not None:
+            raise PositionTakenError(f'Position {position} already belongs to a node')
+        new_node = self._new_node(position)
+        self.ring.insert(position, new_node)
+        self.node_positions[position] = [position]
+        return new_node
+
+    def _add_virtual_node(self, donor: Node | None = None)->Node:
+        """
+        Creates a node with self.vnodes positions. Each position takes the start of the
+        arc it lands on, so the keys come from up to self.vnodes different nodes.
+        With donor, the positions split the arcs of that node instead, so the new node takes about half
+        of its keys: splitting a full node must unload it, not whichever nodes random positions land on
+        """
+        index = self.next_node_index
+        self.next_node_index += 1
+        new_node = self._new_node(index)
+        positions = self._split_positions(donor) if donor is not None else []
+        if not positions:
+            positions = [self.hasher(f'node-{index}-vnode-{i}') for i in range(self.vnodes)]
+
+        donors: dict[int, Node] = dict()
+        if self.node_positions:
+            for position in positions:
+                donor = self._find_node(position)
+                donors[donor.index] = donor
+        with self.ring.batch():
+            for position in positions:
+                self.ring.insert(position, new_node)
+        self.node_positions[index] = positions
+
+        for donor in donors.values():
+            if self.migration_chunk is not None:
+                self._start_migration(donor)
+            else:
+                donor.export_keys_where(new_node, lambda key_hash: self._find_node(key_hash) is new_node)
+        self.policy.record_split(index, *donors)
+        self._topology_changed()
+        logger.info(f'New node {index} created with {self.vnodes} virtual nodes, keys taken from {len(donors)} nodes')
+        return new_node
+
+    def _split_positions(self, donor: Node)->list[int]:
+        """
+        A position inside every arc of the donor: at the median of the keys of the arc, so the upper half
+        moves, or at the middle of the arc if it has fewer than 2 keys
+        """
+        hashes = donor.sorted_hashes
+        space = self.hasher.space
+        positions = []
+        for start in self.node_positions[donor.index]:
+            item = self.ring.find_min_item_greater_than(start + 1)
+            if item is None:            # The last arc wraps around to the first position
+                item = self.ring.find_min_item_greater_than(0)
+            end = item[0]
+            first, last = bisect_left(hashes, start), bisect_left(hashes, end)
+            arc_hashes = hashes[first:last] if start < end else hashes[first:] + hashes[:last]
+            if len(arc_hashes) >= 2:
+                position = arc_hashes[len(arc_hashes) // 2]
+            else:
+                position = (start + ((end - start) % space or space) // 2) % space
+            if position != start and self.ring.search(position) is None:
+                positions.append(position)
+        return positions
 
-        logger.info(f'New node created with index {node_mid_hash}')
+    def _merge_node(self, node: Node)->bool:
+        """
+        Merges an underloaded node with the lighter of its neighbours that has capacity for the keys.
+        The node that comes first clockwise keeps the merged arc.
+        With virtual nodes the keys are spread over the owners of the node positions instead
+        """
+        if self.vnodes > 1:
+            return self._delete_node(node.index)
+        if len(self.node_positions) == 1:
+            return False
+        position = self.node_positions[node.index][0]
+        predecessor = self._find_node(position - 1)
+        successor = self.ring.find_min_greater_than(position + 1)
+        if successor is None:           # The last node is followed by the first one
+            successor = self.ring.find_min_greater_than(0)
+
+        for neighbour in sorted({predecessor, successor}, key=lambda candidate: candidate.load):
+            if not self.policy.can_absorb(neighbour, len(node.data)):
+                continue
+            if neighbour is predecessor:
+                return self._delete_node(node.index)
+            return self._delete_node(neighbour.index)
+        logger.info(f'Node {node.index} is underloaded but no neighbour can receive its keys')
+        self.policy.record_rejected_merge()
+        return False
 
-    def _delete_node(self, index: int):
+    def _delete_node(self, index: int)->bool:
         """
-        Deletes a node and sends it's values to the previous node
+        Deletes a node and sends each of it's keys to the node that owns it after the removal.
+        Nothing is changed if any of those nodes doesn't have capacity for the keys it would receive
         """
-        # TODO: check if the prior node has capacity to receive the keys
-        node_to_delete: Node = self.ring.search(index)
-        if node_to_delete is None:
+        if index not in self.node_positions:
             logger.info(f'Node with index {index} not found to delete')
             raise NodeNotFoundError(f'Node with index {index} not found')
-        prior_node: Node = self.ring.find_max_smaller_than(index)
-        logger.info(f'Exporting Keys of node {index} to the node {prior_node.index}')
-        node_to_delete.export_keys(prior_node, 0)
-        self.ring.remove(index)
+        if len(self.node_positions) == 1:
+            logger.info(f'Node {index} is the last node of the ring and will not be removed')
+            return False
+        positions = self.node_positions[index]
+        node_to_delete: Node = self.ring.search(positions[0])
+        self.finish_migrations(node_to_delete)      # Its pending keys are counted and sent with the others
+        with self.ring.batch():
+            for position in positions:
+                self.ring.remove(position)
+
+        receivers: dict[int, tuple[Node, list[str]]] = dict()
+        for key in node_to_delete.data:
+            receiver = self._find_node(node_to_delete.get_key_hash(key))
+            if receiver.index not in receivers:
+                receivers[receiver.index] = (receiver, [])
+            receivers[receiver.index][1].append(key)
+        for receiver, keys in receivers.values():
+            if not self.policy.can_absorb(receiver, len(keys)):
+                logger.info(f'Node {receiver.index} can not receive the keys of node {index}: keeping node {index}')
+                with self.ring.batch():
+                    for position in positions:
+                        self.ring.insert(position, node_to_delete)
+                self.policy.record_rejected_merge()
+                return False
+
+        logger.info(f'Exporting Keys of node {index} to the nodes that now own them')
+        if self.migration_chunk is not None:
+            self._start_migration(node_to_delete)
+        else:
+            for receiver, keys in receivers.values():
+                for key in keys:
+                    receiver.insert(key, node_to_delete.get(key), node_to_delete.get_key_hash(key))
+            node_to_delete.clean_keys([key for _, keys in receivers.values() for key in keys])
+            node_to_delete.close(remove=True)
+        del self.node_positions[index]
+        self.policy.forget(index)
+        self.policy.record_merge(*receivers)
+        self._topology_changed()
         logger.info(f'Node {index} removed from the ring successfully')
+        return True
+
+    # Streaming migrations
+    def finish_migrations(self, source: Node | None = None)->None:
+        """
+        Moves every pending key at once, ignoring the rate limit. With source, only the keys leaving that node
+        """
+        for migration in list(self.migrations):
+            if source is None or migration.source is source:
+                while not migration.done:
+                    migration.step()
+                self.migrations.remove(migration)
+                self._release_source(migration.source)
+
+    def _start_migration(self, source: Node)->None:
+        self.migrations.append(Migration(source, self._find_node, self.migration_chunk))
+        logger.info(f'Started moving the keys of node {source.index}, {self.migration_chunk} per step')
+
+    def _migration_step(self)->None:
+        """
+        Moves the next chunk of keys, or as many chunks as the rate limiter allows
+        """
+        limiter = self.migration_limiter
+        if limiter is not None:
+            limiter.refill()
+        while self.migrations and (limiter is None or limiter.allows()):
+            migration = self.migrations[0]
+            keys, bytes = migration.step()
+            if migration.done:
+                self.migrations.pop(0)
+                self._release_source(migration.source)
+                logger.info(f'Node {migration.source.index} moved {migration.keys_moved} keys, {migration.bytes_moved} bytes')
+                continue
+            if limiter is None:
+                return
+            limiter.spend(max(keys, 1), bytes)      # Chunks that moved nothing still cost their scan
+
+    def _release_source(self, node: Node)->None:
+        """
+        Closes the storage of a removed node once all its keys left
+        """
+        if node not in self.routing[1]:
+            node.close(remove=True)
+
+    def _is_migrating(self, node: Node)->bool:
+        return any(migration.source is node for migration in self.migrations)
+
+    def _migrating_source(self, key_hash: int, key: str)->Node | None:
+        """
+        Returns the node the key is leaving, if it was not moved yet
+        """
+        for migration in self.migrations:
+            if migration.source.has_key(key) and self._find_node(key_hash) is not migration.source:
+                return migration.source
+        return None
+
+    def _drop_migrating_copy(self, key_hash: int, key: str)->None:
+        source = self._migrating_source(key_hash, key)
+        if source is not None:
+            source.delete(key)
+
+    # Bounded loads
+    def _bounded_room(self, keys_count: int)->int:
+        """
+        Most keys a node can hold when the ring holds keys_count keys
+        """
+        average = keys_count / len(self.node_positions)
+        return min(math.ceil((1 + self.load_bound) * average), self.policy.keys_per_node(self.node_capacity))
+
+    def _probe(self, key_hash: int)->Iterator[Node]:
+        """
+        Yields the owner of the hash and then every other node clockwise, once each
+        """
+        position, node = self._find_arc(key_hash)
+        seen = {node.index}
+        yield node
+        while len(seen) < len(self.node_positions):
+            item = self.ring.find_min_item_greater_than(position + 1)
+            if item is None:
+                item = self.ring.find_min_item_greater_than(0)
+            position, node = item
+            if node.index not in seen:
+                seen.add(node.index)
+                yield node
+
+    def _find_holder(self, key_hash: int, key: str)->Node | None:
+        """
+        Follows the probe sequence of the key until the node storing it.
+        Stops at the first node no spilled key went past, as the key can't be further
+        """
+        for node in self._probe(key_hash):
+            if node.has_key(key):
+                return node
+            if not self.spilled_past.get(node.index):
+                return None
+        return None
+
+    def _insert_bounded(self, key_hash: int, key: str, value: Any)->None:
+        holder = self._find_holder(key_hash, key)
+        if holder is not None:
+            holder.insert(key, value, key_hash)
+            return
+        keys_per_node = self.policy.keys_per_node(self.node_capacity)
+        while self.keys_count + 1 > keys_per_node * len(self.node_positions):
+            logger.info('Ring reached its capacity: scaling up the ring')
+            self._change_topology(self._scale_up)
+        self._place_bounded(key_hash, key, value)
+        self.keys_count += 1
+
+    def _place_bounded(self, key_hash: int, key: str, value: Any)->None:
+        """
+        Stores the key in the first node of its probe sequence that is under the load bound
+        """
+        room = self._bounded_room(self.keys_count + 1)
+        passed = []
+        for node in self._probe(key_hash):
+            if len(node.data) < room:
+                node.insert(key, value, key_hash)
+                break
+            passed.append(node)
+        else:
+            raise NodeIsFullError(f'No node has room for key {key}')
+        if passed:
+            self.spilled[key] = key_hash
+            for node in passed:
+                self.spilled_past[node.index] = self.spilled_past.get(node.index, 0) + 1
+
+    def _delete_bounded(self, key_hash: int, key: str)->Any:
+        passed = []
+        for node in self._probe(key_hash):
+            if node.has_key(key):
+                break
+            if not self.spilled_past.get(node.index):
+                raise KeyNotFoundError(f'Key {key} not found')
+            passed.append(node)
+        else:
+            raise KeyNotFoundError(f'Key {key} not found')
+        removed_key = node.delete(key)
+        self.keys_count -= 1
+        if self.spilled.pop(key, None) is not None:
+            for passed_node in passed:
+                self.spilled_past[passed_node.index] -= 1
+        if self.policy.should_merge(node) and self._has_room_without_a_node():
+            logger.info(f'Node {node.index} is underloaded: scaling down the ring')
+            self._change_topology(lambda: self._merge_node(node))
+        elif self._bounded_room(self.keys_count) < self._bounded_room(self.keys_count + 1):
+            self._enforce_bound()           # The average dropped, so the fullest nodes may be past the bound
+        return removed_key
+
+    def _has_room_without_a_node(self)->bool:
+        """
+        Whether one node less can still hold every key, spilled ones included.
+        The capacity checks of _delete_node only see the keys at their owner, as the spilled ones are taken out first
+        """
+        return self.keys_count <= self.policy.keys_per_node(self.node_capacity) * (len(self.node_positions) - 1)
+
+    def _enforce_bound(self)->None:
+        """
+        Takes the keys past the load bound out of the nodes holding too many and places them again,
+        so they spill to the next nodes clockwise with room
+        """
+        room = self._bounded_room(self.keys_count)
+        excess = []
+        for node in self.nodes():
+            if len(node.data) > room:
+                for key in list(node.data)[:len(node.data) - room]:
+                    excess.append(self._take_out(node, key))
+        for key_hash, key, value in excess:
+            self._place_bounded(key_hash, key, value)
+            self.keys_count += 1
+
+    def _take_out(self, node: Node, key: str)->tuple[int, str, Any]:
+        """
+        Deletes the key from the node holding it, forgetting the nodes its probe sequence passed if it was spilled
+        """
+        key_hash = self.spilled.pop(key, None)
+        if key_hash is None:
+            key_hash = node.get_key_hash(key)
+        else:
+            for passed_node in self._probe(key_hash):
+                if passed_node is node:
+                    break
+                self.spilled_past[passed_node.index] -= 1
+        self.keys_count -= 1
+        return key_hash, key, node.delete(key)
+
+    def _change_topology(self, change):
+        """
+        Takes the spilled keys out, runs change and places them again, as their probe sequences may have changed.
+        Keys moved by the change itself go to their owner, so only spilled keys are probed again.
+        The nodes the change left past the bound, e.g. as a new node lowered the average, then give their excess keys away
+        """
+        spilled = []
+        for key, key_hash in self.spilled.items():
+            holder = self._find_holder(key_hash, key)
+            spilled.append((key_hash, key, holder.delete(key)))
+        self.spilled = dict()
+        self.spilled_past = dict()
+        self.keys_count -= len(spilled)
+        result = change()
+        for key_hash, key, value in spilled:
+            self._place_bounded(key_hash, key, value)
+            self.keys_count += 1
+        self._enforce_bound()
+        return result
+
+    # Metrics
+    def instrument(self, metrics: Metrics)->None:
+        """
+        Wraps the operations of this ring to count and time them, by type, and routes the single key operations
+        with _measured_locate() to count them per arc. Splits, merges and virtual node additions
+        are timed as events, and the load and keys of every node are exported as gauges, with the hits, misses,
+        evictions and hit ratio of the read cache, if any.
+        Rings that are not instrumented run the plain methods
+        """
+        for operation in ('insert', 'get', 'update', 'delete', 'insert_many', 'get_many', 'delete_many'):
+            setattr(self, operation, metrics.timed(getattr(self, operation),
+                                                   metrics.histogram('ring_operation_seconds', help='Duration of the ring operations', operation=operation),
+                                                   metrics.counter('ring_operations_total', help='Ring operations', operation=operation)))
+        self._locate = self._measured_locate(metrics)
+        for method, event in (('_split_node', 'split'), ('_split_node_many', 'batch_split'), ('_add_virtual_node', 'add_virtual_node'), ('_delete_node', 'merge')):
+            setattr(self, method, metrics.timed(getattr(self, method),
+                                                metrics.histogram('ring_event_seconds', help='Duration of the topology changes', event=event),
+                                                metrics.counter('ring_events_total', help='Topology changes', event=event)))
+        metrics.gauge('ring_node_load', lambda: [({'node': node.index}, node.load) for node in self.nodes()], help='Keys over capacity of each node')
+        metrics.gauge('ring_node_keys', lambda: [({'node': node.index}, len(node.data)) for node in self.nodes()], help='Keys of each node')
+        cache = self.read_cache
+        if cache is not None:
+            metrics.gauge('ring_cache_hits', lambda: [({}, cache.hits)], help='Reads served by the read cache')
+            metrics.gauge('ring_cache_misses', lambda: [({}, cache.misses)], help='Reads the read cache did not have')
+            metrics.gauge('ring_cache_evictions', lambda: [({}, cache.evictions)], help='Keys evicted or rejected by the read cache')
+            metrics.gauge('ring_cache_hit_ratio', lambda: [({}, cache.hit_ratio)], help='Hits over reads of the read cache')
+
+    def _measured_locate(self, metrics: Metrics)->Callable[[str], tuple[int, Node]]:
+        """
+        _locate() that also counts the key in the arc it is routed to, from the same hash and bisect.
+        With the route cache only the hash is memoized, as the arc is needed for every key
+        """
+        arcs: dict[tuple[int, int], Any] = dict()      # (arc position, node index) -> its counter, so the labels are built once
+        def measured(key: str)->tuple[int, Node]:
+            cache = self.route_cache
+            entry = cache.get(key) if cache is not None else None
+            key_hash = self.hasher(key) if entry is None else entry[1]
+            positions, nodes = self.routing
+            index = bisect_right(positions, key_hash) - 1
+            node = nodes[index]
+            arc = (positions[index], node.index)
+            counter = arcs.get(arc)
+            if counter is None:
+                counter = arcs[arc] = metrics.counter('ring_arc_operations_total', help='Single key operations per arc', arc=arc[0], node=arc[1])
+            counter.value += 1
+            if cache is not None:
+                if entry is None and len(cache) >= self.route_cache_size:
+                    cache.popitem(last=False)
+                elif entry is not None:
+                    cache.move_to_end(key)
+                cache[key] = (self.topology_epoch, key_hash, node)
+            return key_hash, node
+        return measured
 
     def __str__(self)->str:
         base_str: list[str] = []
-        for node in self.ring:
+        for _, node in self.ring:
             base_str.append(f'node {node.index}: {str(node)}')
         return '\n'.join(base_str)
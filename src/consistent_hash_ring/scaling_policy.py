@@ -0,0 +1,85 @@
+import time
+from typing import Callable
+from .node import Node
+
+class ScalingPolicy:
+    """
+    Decides when the ring splits and merges nodes.
+    A node is split when its load reaches split_load and merged when it drops below merge_load.
+    merge_load must be under half of split_load, so the two halves of a split can't be merged right back.
+    A node that was split or merged less than cooldown seconds ago is left alone, unless it is completely full
+    """
+    def __init__(self, split_load: float = 1.0, merge_load: float = 0.0, cooldown: float = 0.0, clock: Callable[[], float] = time.monotonic) -> None:
+        if not 0 < split_load <= 1:
+            raise ValueError(f'split_load must be in (0, 1], got {split_load}')
+        if not 0 <= merge_load < split_load / 2:
+            raise ValueError(f'merge_load must be in [0, split_load / 2), got {merge_load}')
+        self.split_load = split_load
+        self.merge_load = merge_load
+        self.cooldown = cooldown
+        self.clock = clock
+        self.last_event: dict[int, float] = dict()      # Node index -> time of its last split or merge
+        self.splits = 0
+        self.merges = 0
+        self.rejected_merges = 0
+        self.started_at = clock()
+
+    def should_split(self, node: Node) -> bool:
+        if node.load >= 1:
+            return True
+        return node.load >= self.split_load and not self._cooling_down(node)
+
+    def should_merge(self, node: Node) -> bool:
+        return node.load < self.merge_load and not self._cooling_down(node)
+
+    def can_absorb(self, node: Node, keys_count: int) -> bool:
+        """
+        Whether the node can receive keys_count keys and stay below split_load
+        """
+        return (len(node.data) + keys_count) / node.capacity < self.split_load
+
+    def keys_per_node(self, capacity: int) -> int:
+        """
+        Most keys a node can hold without being split
+        """
+        return max(1, int(capacity * self.split_load))
+
+    def record_split(self, *node_indexes: int) -> None:
+        self.splits += 1
+        self._touch(node_indexes)
+
+    def record_merge(self, *node_indexes: int) -> None:
+        self.merges += 1
+        self._touch(node_indexes)
+
+    def record_rejected_merge(self) -> None:
+        self.rejected_merges += 1
+
+    def forget(self, node_index: int) -> None:
+        self.last_event.pop(node_index, None)
+
+    def stats(self) -> dict[str, float]:
+        elapsed = max(self.clock() - self.started_at, 1e-9)
+        return {
+            'splits': self.splits,
+            'merges': self.merges,
+            'rejected_merges': self.rejected_merges,
+            'splits_per_second': self.splits / elapsed,
+            'merges_per_second': self.merges / elapsed,
+        }
+
+    def reset_stats(self) -> None:
+        self.splits = 0
+        self.merges = 0
+        self.rejected_merges = 0
+        self.started_at = self.clock()
+
+    def _cooling_down(self, node: Node) -> bool:
+        if self.cooldown <= 0 or node.index not in self.last_event:
+            return False
+        return self.clock() - self.last_event[node.index] < self.cooldown
+
+    def _touch(self, node_indexes: tuple[int, ...]) -> None:
+        now = self.clock()
+        for node_index in node_indexes:
+            self.last_event[node_index] = now
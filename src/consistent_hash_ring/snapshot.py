@@ -0,0 +1,139 @@
+import pickle
+import struct
+from collections.abc import MutableMapping
+from typing import Any, BinaryIO, Callable
+from src.adt.abstract_data_type import AbstractDataType
+from src.hash import Hasher
+from .node import Node
+from .scaling_policy import ScalingPolicy
+from .migration import RateLimiter
+from .read_cache import ReadCache
+
+# A snapshot is the magic, the version and a length prefixed pickled header with the ring settings,
+# then the nodes: index, (capacity, positions count, keys count), positions and, per key in hash order,
+# the hash, (key length, value length), the utf-8 key and the pickled value.
+# Hashes, positions and indexes are big endian integers of the width of the ring space
+MAGIC = b'CHRS'
+VERSION = 1
+LENGTH = struct.Struct('!I')
+NODE = struct.Struct('!QIQ')
+KEY = struct.Struct('!II')
+BUFFER_SIZE = 2 ** 20
+
+def _width(space: int)->int:
+    return max(((space - 1).bit_length() + 7) // 8, 8)
+
+def _read_exactly(file: BinaryIO, size: int)->bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError('Truncated ring snapshot')
+    return data
+
+def write_ring(ring, file: BinaryIO)->None:
+    """
+    Streams the ring to the file, a node at a time. Rings with a node_storage only save their topology
+    and keys count: the values are already in the storages
+    """
+    ring.finish_migrations()
+    with_data = ring.node_storage is None
+    header = pickle.dumps({
+        'node_capacity': ring.node_capacity,
+        'adt': type(ring.ring),
+        'vnodes': ring.vnodes,
+        'hasher': (ring.hasher.algorithm, ring.hasher.space if ring.hasher.reduce else None),
+        'policy': (ring.policy.split_load, ring.policy.merge_load, ring.policy.cooldown),
+        'replication_factor': ring.replication_factor,
+        'load_bound': ring.load_bound,
+        'migration_chunk': ring.migration_chunk,
+        'next_node_index': ring.next_node_index,
+        'keys_count': ring.keys_count,
+        'spilled': ring.spilled,
+        'spilled_past': ring.spilled_past,
+        'with_data': with_data,
+    }, pickle.HIGHEST_PROTOCOL)
+    file.write(MAGIC + bytes([VERSION]) + LENGTH.pack(len(header)) + header)
+
+    width = _width(ring.hasher.space)
+    nodes = list(ring.nodes())
+    file.write(LENGTH.pack(len(nodes)))
+    for node in nodes:
+        positions = ring.node_positions[node.index]
+        keys = node.sorted_keys if with_data else []
+        file.write(node.index.to_bytes(width, 'big') + NODE.pack(node.capacity, len(positions), len(keys)))
+        file.write(b''.join(position.to_bytes(width, 'big') for position in positions))
+        data = node.data
+        for key_hash, key in zip(node.sorted_hashes, keys):
+            key_bytes = key.encode()
+            value_bytes = pickle.dumps(data[key], pickle.HIGHEST_PROTOCOL)
+            file.write(key_hash.to_bytes(width, 'big') + KEY.pack(len(key_bytes), len(value_bytes)) + key_bytes + value_bytes)
+
+def read_ring(file: BinaryIO, ring_class: type, adt: AbstractDataType | None = None, policy: ScalingPolicy | None = None,
+              migration_limiter: RateLimiter | None = None, node_storage: Callable[[int], MutableMapping] | None = None,
+              read_cache: ReadCache | None = None, route_cache_size: int | None = None):
+    """
+    Rebuilds a ring from the file. The keys are read in hash order, so every node is filled without sorting,
+    hashing or splitting, and the positions are bulk loaded in the ADT once every node is read
+    """
+    if _read_exactly(file, len(MAGIC)) != MAGIC:
+        raise ValueError('Not a ring snapshot')
+    version = _read_exactly(file, 1)[0]
+    if version != VERSION:
+        raise ValueError(f'Unsupported ring snapshot version {version}')
+    (header_length,) = LENGTH.unpack(_read_exactly(file, LENGTH.size))
+    header: dict[str, Any] = pickle.loads(_read_exactly(file, header_length))
+    if not header['with_data'] and node_storage is None:
+        raise ValueError('The snapshot has no values: node_storage must reopen the storages of its nodes')
+
+    hasher = Hasher(*header['hasher'])
+    ring = ring_class(
+        header['node_capacity'],
+        adt if adt is not None else header['adt'](),
+        vnodes=header['vnodes'],
+        hasher=hasher,
+        policy=policy if policy is not None else ScalingPolicy(*header['policy']),
+        replication_factor=header['replication_factor'],
+        load_bound=header['load_bound'],
+        migration_chunk=header['migration_chunk'],
+        migration_limiter=migration_limiter,
+        read_cache=read_cache,
+        route_cache_size=route_cache_size,
+    )
+    for index in ring.node_positions:           # Drops the empty node the constructor created
+        ring.policy.forget(index)
+    ring.node_positions = dict()
+    ring.node_storage = node_storage
+
+    width = _width(hasher.space)
+    entries: list[tuple[int, Node]] = []
+    (nodes_count,) = LENGTH.unpack(_read_exactly(file, LENGTH.size))
+    for _ in range(nodes_count):
+        index = int.from_bytes(_read_exactly(file, width), 'big')
+        capacity, positions_count, keys_count = NODE.unpack(_read_exactly(file, NODE.size))
+        positions_bytes = _read_exactly(file, width * positions_count)
+        positions = [int.from_bytes(positions_bytes[i:i + width], 'big') for i in range(0, len(positions_bytes), width)]
+
+        storage = None if node_storage is None else node_storage(index)
+        node = Node(index, capacity, hasher=hasher, storage=storage)
+        data, key_hashes, sorted_hashes, sorted_keys = node.data, node.key_hashes, node.sorted_hashes, node.sorted_keys
+        for _ in range(keys_count):
+            fixed = _read_exactly(file, width + KEY.size)
+            key_hash = int.from_bytes(fixed[:width], 'big')
+            key_length, value_length = KEY.unpack_from(fixed, width)
+            body = memoryview(_read_exactly(file, key_length + value_length))
+            key = str(body[:key_length], 'utf-8')
+            data[key] = pickle.loads(body[key_length:])
+            key_hashes[key] = key_hash
+            sorted_hashes.append(key_hash)
+            sorted_keys.append(key)
+
+        ring.node_positions[index] = positions
+        entries.extend((position, node) for position in positions)
+
+    ring.ring.bulk_load(entries)
+    ring.next_node_index = header['next_node_index']
+    ring.keys_count = header['keys_count']
+    ring.spilled = header['spilled']
+    ring.spilled_past = header['spilled_past']
+    ring.replica_plan = dict()              # Every arc is copied to its replicas again
+    ring._topology_changed()
+    return ring
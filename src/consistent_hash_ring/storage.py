@@ -0,0 +1,56 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Iterable
+
+class AsyncStorage(ABC):
+    """
+    Async key-value store backing one node of an AsyncRing, e.g. a remote machine or database
+    """
+    @abstractmethod
+    async def get_many(self, keys: Iterable[str])->dict[str, Any]:
+        """
+        Returns the stored values of the keys. Missing keys are left out
+        """
+        ...
+
+    @abstractmethod
+    async def put_many(self, items: Iterable[tuple[str, Any]])->None:
+        ...
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str])->None:
+        """
+        Deletes the keys, ignoring the missing ones
+        """
+        ...
+
+    async def close(self)->None:
+        """
+        Releases the storage once its node left the ring
+        """
+
+class InMemoryStorage(AsyncStorage):
+    """
+    Fake storage for tests and benchmarks. Every call waits latency seconds, like a round trip
+    """
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.data: dict[str, Any] = dict()
+        self.calls = 0
+
+    async def get_many(self, keys: Iterable[str])->dict[str, Any]:
+        await self._round_trip()
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    async def put_many(self, items: Iterable[tuple[str, Any]])->None:
+        await self._round_trip()
+        self.data.update(items)
+
+    async def delete_many(self, keys: Iterable[str])->None:
+        await self._round_trip()
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def _round_trip(self)->None:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
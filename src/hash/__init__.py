@@ -0,0 +1 @@
+from .hash import Hasher, HASH_FUNCTIONS, default_hasher, hash, hash_many, register_hash_function
@@ -0,0 +1,150 @@
+import hashlib
+import os
+from array import array
+from typing import Callable, Iterable
+
+MASK_64 = 2 ** 64 - 1
+
+def md5(data: bytes)->int:
+    """
+    128 bits md5 of the data. Same values as parsing the hex digest, without the string round trip
+    """
+    return int.from_bytes(hashlib.md5(data).digest(), 'big')
+
+def blake2b_64(data: bytes)->int:
+    """
+    64 bits blake2b of the data, computed in C by hashlib
+    """
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+FNV_64_OFFSET = 0xcbf29ce484222325
+FNV_64_PRIME = 0x100000001b3
+
+def fnv1a_64(data: bytes)->int:
+    """
+    64 bits FNV-1a of the data
+    """
+    hash_value = FNV_64_OFFSET
+    for byte in data:
+        hash_value = ((hash_value ^ byte) * FNV_64_PRIME) & MASK_64
+    return hash_value
+
+XXH_PRIME_1 = 0x9E3779B185EBCA87
+XXH_PRIME_2 = 0xC2B2AE3D27D4EB4F
+XXH_PRIME_3 = 0x165667B19E3779F9
+XXH_PRIME_4 = 0x85EBCA77C2B2AE63
+XXH_PRIME_5 = 0x27D4EB2F165667C5
+
+def _rotl_64(value: int, bits: int)->int:
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+def _xxh64_round(accumulator: int, lane: int)->int:
+    accumulator = (accumulator + lane * XXH_PRIME_2) & MASK_64
+    return (_rotl_64(accumulator, 31) * XXH_PRIME_1) & MASK_64
+
+def _xxh64_merge_round(accumulator: int, value: int)->int:
+    accumulator ^= _xxh64_round(0, value)
+    return (accumulator * XXH_PRIME_1 + XXH_PRIME_4) & MASK_64
+
+def xxh64(data: bytes, seed: int = 0)->int:
+    """
+    64 bits xxHash (XXH64) of the data
+    """
+    length = len(data)
+    offset = 0
+    if length >= 32:
+        v1 = (seed + XXH_PRIME_1 + XXH_PRIME_2) & MASK_64
+        v2 = (seed + XXH_PRIME_2) & MASK_64
+        v3 = seed
+        v4 = (seed - XXH_PRIME_1) & MASK_64
+        while offset <= length - 32:
+            v1 = _xxh64_round(v1, int.from_bytes(data[offset:offset + 8], 'little'))
+            v2 = _xxh64_round(v2, int.from_bytes(data[offset + 8:offset + 16], 'little'))
+            v3 = _xxh64_round(v3, int.from_bytes(data[offset + 16:offset + 24], 'little'))
+            v4 = _xxh64_round(v4, int.from_bytes(data[offset + 24:offset + 32], 'little'))
+            offset += 32
+        hash_value = (_rotl_64(v1, 1) + _rotl_64(v2, 7) + _rotl_64(v3, 12) + _rotl_64(v4, 18)) & MASK_64
+        for v in (v1, v2, v3, v4):
+            hash_value = _xxh64_merge_round(hash_value, v)
+    else:
+        hash_value = (seed + XXH_PRIME_5) & MASK_64
+    hash_value = (hash_value + length) & MASK_64
+
+    while offset <= length - 8:
+        lane = _xxh64_round(0, int.from_bytes(data[offset:offset + 8], 'little'))
+        hash_value = (_rotl_64(hash_value ^ lane, 27) * XXH_PRIME_1 + XXH_PRIME_4) & MASK_64
+        offset += 8
+    if offset <= length - 4:
+        lane = int.from_bytes(data[offset:offset + 4], 'little')
+        hash_value = (_rotl_64(hash_value ^ (lane * XXH_PRIME_1 & MASK_64), 23) * XXH_PRIME_2 + XXH_PRIME_3) & MASK_64
+        offset += 4
+    while offset < length:
+        hash_value = (_rotl_64(hash_value ^ (data[offset] * XXH_PRIME_5 & MASK_64), 11) * XXH_PRIME_1) & MASK_64
+        offset += 1
+
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * XXH_PRIME_2) & MASK_64
+    hash_value ^= hash_value >> 29
+    hash_value = (hash_value * XXH_PRIME_3) & MASK_64
+    hash_value ^= hash_value >> 32
+    return hash_value
+
+# Name -> (function, bits of the output)
+HASH_FUNCTIONS: dict[str, tuple[Callable[[bytes], int], int]] = {
+    'md5': (md5, 128),
+    'blake2b': (blake2b_64, 64),
+    'fnv1a': (fnv1a_64, 64),
+    'xxh64': (xxh64, 64),
+}
+
+def register_hash_function(name: str, function: Callable[[bytes], int], bits: int)->None:
+    HASH_FUNCTIONS[name] = (function, bits)
+
+class Hasher:
+    """
+    Maps keys to positions of a ring of size space.
+    The function and the space are resolved once, so hashing a key is a single call
+    """
+    def __init__(self, algorithm: str = 'md5', space: int | None = None) -> None:
+        if algorithm not in HASH_FUNCTIONS:
+            raise ValueError(f'Unknown hash function {algorithm}. Options: {", ".join(HASH_FUNCTIONS)}')
+        self.algorithm = algorithm
+        self.function, self.bits = HASH_FUNCTIONS[algorithm]
+        self.space = space if space is not None else 2 ** self.bits
+        self.reduce = space is not None
+
+    def __call__(self, key: str)->int:
+        if self.reduce:
+            return self.function(key.encode()) % self.space
+        return self.function(key.encode())
+
+    def hash_many(self, keys: Iterable[str])->array | list[int]:
+        """
+        Hashes a batch of keys. Returns a compact array('Q') when the space fits in 64 bits
+        """
+        function = self.function
+        hashes = [function(key.encode()) for key in keys]
+        if self.reduce:
+            hashes = [hash_value % self.space for hash_value in hashes]
+        if self.space <= 2 ** 64:
+            return array('Q', hashes)
+        return hashes
+
+def _default_hasher()->Hasher:
+    if 'MAX_HASH_SIZE' in os.environ:
+        return Hasher('md5', int(os.environ['MAX_HASH_SIZE']))
+    return Hasher('md5')
+
+default_hasher = _default_hasher()
+
+def hash(key: str)->int:
+    """
+    returns the md5 hash of the key
+    """
+    return default_hasher(key)
+
+def hash_many(keys: Iterable[str])->array | list[int]:
+    """
+    returns the md5 hashes of the keys
+    """
+    return default_hasher.hash_many(keys)
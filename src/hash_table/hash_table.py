@@ -2,77 +2,206 @@ from src.consistent_hash_ring.node import Node
 from typing import Any
 import math
 import logging
-from src.hash import hash
+from src.hash import Hasher, default_hasher
+from src.metrics import Metrics
 
 logger = logging.getLogger(__name__)
 
 class HashTable:
-    def __init__(self, nodes_count: int, node_capacity: int, node_threshold: int) -> None:
+    def __init__(self, nodes_count: int, node_capacity: int, node_threshold: int, hasher: Hasher = default_hasher, incremental: bool = False, rehash_step: int = 1, metrics: Metrics | None = None) -> None:
+        """
+        With incremental, resizing doesn't rehash every element at once: the old and the new tables
+        coexist and each operation migrates rehash_step nodes of the old table, like Redis dict rehashing.
+        metrics, if given, instruments the table: see instrument()
+        """
+        self.hasher = hasher
         self.nodes_count = nodes_count
-        self.table_nodes = [Node(i, node_capacity) for i in range(nodes_count)]
+        self.table_nodes = [Node(i, node_capacity, hasher=hasher) for i in range(nodes_count)]
         self.node_threshold = node_threshold
         self.elements_count = 0
         self.node_capacity = node_capacity
+        self.incremental = incremental
+        self.rehash_step = rehash_step
+        self.old_table_nodes: list[Node | None] | None = None     # Table being migrated, while rehashing
+        self.old_nodes_count = 0
+        self.rehash_index = 0                               # Nodes of the old table before it were already migrated
+        if metrics is not None:
+            self.instrument(metrics)
 
     def insert(self, key: str, value: Any | None = None) -> int:
-        key_hash = self._hash(key)
+        self._rehash_step()
+        full_hash = self._full_hash(key)
+        key_hash = full_hash % self.nodes_count
         if value is None:
             value = key
-        if self.table_nodes[key_hash].load + 1 >= self.node_threshold:
+        # Like Redis, a table being migrated is not resized again until the migration finishes
+        if self.table_nodes[key_hash].load + 1 >= self.node_threshold and not self.is_rehashing():
             logger.info(f'Node {key_hash} reached it\'s threshold and system will scale up') 
             self.add_nodes(1)
-        logger.debug(f'Inserting element {key} in node {key_hash}')
-        self.table_nodes[key_hash].insert(key, value)                                  # Hash will be used only for finding the node
-        self.elements_count += 1
+            key_hash = full_hash % self.nodes_count
+        logger.debug('Inserting element %s in node %d', key, key_hash)
+        old_node = self._old_node(full_hash)
+        if old_node is not None and old_node.has_key(key):
+            old_node.delete(key)                                                        # Updating a key that was not migrated yet
+            self.elements_count -= 1
+        if not self.table_nodes[key_hash].has_key(key):
+            self.elements_count += 1
+        self.table_nodes[key_hash].insert(key, value, full_hash)                       # Hash will be used only for finding the node
         return key_hash
 
     def delete(self, key: str) -> bool:
-        key_hash = self._hash(key)
-        if key in self.table_nodes[key_hash]:
-            self.table_nodes[key_hash].delete(key)
-            logger.debug(f'Element {key} was deleted from node {key_hash}')
+        self._rehash_step()
+        full_hash = self._full_hash(key)
+        key_hash = full_hash % self.nodes_count
+        node = self._find_node(key, full_hash)
+        if node is not None:
+            node.delete(key)
+            self.elements_count -= 1
+            logger.debug('Element %s was deleted from node %d', key, key_hash)
             return True
-        self.elements_count -= 1
-        logger.debug(f'Element {key} was not found in node {key_hash}')
+        logger.debug('Element %s was not found in node %d', key, key_hash)
         return False
 
     def get(self, key: str) -> Any | None:
-        key_hash = self._hash(key)
-        if key in self.table_nodes[key_hash]:
-            return self.table_nodes[key_hash].get(key)
+        self._rehash_step()
+        node = self._find_node(key, self._full_hash(key))
+        if node is not None:
+            return node.get(key)
         return None
 
     def update(self, key: str, value: Any) -> None:
-        key_hash = self._hash(key)
-        self.table_nodes[key_hash].update(key, value)
+        self._rehash_step()
+        full_hash = self._full_hash(key)
+        node = self._find_node(key, full_hash)
+        if node is None:
+            node = self.table_nodes[full_hash % self.nodes_count]
+            self.elements_count += 1
+            node.insert(key, value, full_hash)
+            return
+        node.update(key, value)
+
+    def instrument(self, metrics: Metrics) -> None:
+        """
+        Wraps the operations of this table to count and time them, by type, and hashes their keys
+        with _measured_full_hash() to count them per node.
+        Resizes and full rehashes are timed as events, and the load of every node is exported as a gauge.
+        Tables that are not instrumented run the plain methods
+        """
+        for operation in ('insert', 'get', 'update', 'delete'):
+            setattr(self, operation, metrics.timed(getattr(self, operation),
+                                                   metrics.histogram('hash_table_operation_seconds', help='Duration of the hash table operations', operation=operation),
+                                                   metrics.counter('hash_table_operations_total', help='Hash table operations', operation=operation)))
+        self._full_hash = self._measured_full_hash(metrics)
+        for method, event in (('_resize', 'resize'), ('_rehash_table', 'rehash')):
+            setattr(self, method, metrics.timed(getattr(self, method),
+                                                metrics.histogram('hash_table_event_seconds', help='Duration of the resizes and rehashes', event=event),
+                                                metrics.counter('hash_table_events_total', help='Resizes and rehashes', event=event)))
+        metrics.gauge('hash_table_node_load', lambda: [({'node': index}, node.load) for index, node in enumerate(self.table_nodes)], help='Keys over capacity of each node')
+
+    def _measured_full_hash(self, metrics: Metrics):
+        """
+        _full_hash() that also counts the key in its node, so the operation hashes it once
+        """
+        nodes: dict[int, Any] = dict()          # Node index -> its counter, so the labels are built once per node
+        def measured(key: str) -> int:
+            full_hash = self.hasher(key)
+            index = full_hash % self.nodes_count
+            if index not in nodes:
+                nodes[index] = metrics.counter('hash_table_node_operations_total', help='Operations per node', node=index)
+            nodes[index].value += 1
+            return full_hash
+        return measured
+
+    def _full_hash(self, key: str) -> int:
+        return self.hasher(key)
 
     def _hash(self, key: str) -> int:
-        return hash(key) % self.nodes_count
+        return self.hasher(key) % self.nodes_count
+
+    def _find_node(self, key: str, full_hash: int) -> Node | None:
+        """
+        Finds the node that stores the key, looking in the old table too while rehashing
+        """
+        node = self.table_nodes[full_hash % self.nodes_count]
+        if node.has_key(key):
+            return node
+        old_node = self._old_node(full_hash)
+        if old_node is not None and old_node.has_key(key):
+            return old_node
+        return None
+
+    def _old_node(self, full_hash: int) -> Node | None:
+        """
+        Returns the node of the old table where the key would be, if it was not migrated yet
+        """
+        if self.old_table_nodes is None:
+            return None
+        old_index = full_hash % self.old_nodes_count
+        if old_index < self.rehash_index:
+            return None
+        return self.old_table_nodes[old_index]
+
+    def is_rehashing(self) -> bool:
+        return self.old_table_nodes is not None
     
     def add_nodes(self, nodes_to_add: int) -> None:
         """
         Add nodes_to_add to the hash table and rehash the elements
         """
         logger.info(f'Adding {nodes_to_add} nodes to the hash table')
-        self.nodes_count += nodes_to_add
-        self.table_nodes = self._rehash_table()
+        self._resize(self.nodes_count + nodes_to_add)
 
     def remove_nodes(self, nodes_to_remove: int) -> None:
         """
         Removes nodes_to_add to the hash table and rehash the elements
         """
         logger.info(f'Removing {nodes_to_remove} nodes to the hash table')
-        self.nodes_count -= nodes_to_remove
-        self.table_nodes = self._rehash_table()
+        self._resize(self.nodes_count - nodes_to_remove)
+
+    def _resize(self, nodes_count: int) -> None:
+        if not self.incremental:
+            self.nodes_count = nodes_count
+            self.table_nodes = self._rehash_table()
+            return
+        self._finish_rehash()           # Only one migration at a time
+        self.old_table_nodes = self.table_nodes
+        self.old_nodes_count = self.nodes_count
+        self.rehash_index = 0
+        self.nodes_count = nodes_count
+        self.table_nodes = [Node(i, self.node_capacity, hasher=self.hasher) for i in range(nodes_count)]
+        logger.info(f'Started incremental rehash from {self.old_nodes_count} to {nodes_count} nodes')
+
+    def _rehash_step(self, steps: int | None = None) -> None:
+        """
+        Migrates up to steps nodes of the old table to the new one
+        """
+        if self.old_table_nodes is None:
+            return
+        steps = self.rehash_step if steps is None else steps
+        while steps > 0 and self.rehash_index < self.old_nodes_count:
+            old_node = self.old_table_nodes[self.rehash_index]
+            for key, value in old_node.list_items():
+                full_hash = old_node.get_key_hash(key)
+                self.table_nodes[full_hash % self.nodes_count].insert(key, value, full_hash)
+            self.old_table_nodes[self.rehash_index] = None
+            self.rehash_index += 1
+            steps -= 1
+        if self.rehash_index >= self.old_nodes_count:
+            self.old_table_nodes = None
+            logger.info(f'Incremental rehash to {self.nodes_count} nodes finished')
+
+    def _finish_rehash(self) -> None:
+        self._rehash_step(self.old_nodes_count)
 
     def _rehash_table(self) -> list[Node]:
-        new_list = [Node(i, self.node_capacity) for i in range(self.nodes_count)]
+        new_list = [Node(i, self.node_capacity, hasher=self.hasher) for i in range(self.nodes_count)]
         for index, node in enumerate(self.table_nodes):
             node_elements = node.list_items()
             for element in node_elements:
                 key, value = element
-                new_list[self._hash(key)].insert(key, value)
-                logger.debug(f'Element {key} was rehashed to node {index}')
+                full_hash = node.get_key_hash(key)
+                new_list[full_hash % self.nodes_count].insert(key, value, full_hash)
+                logger.debug('Element %s was rehashed to node %d', key, index)
         logger.info(f'{self.elements_count} elements were rehashed')
         return new_list
             
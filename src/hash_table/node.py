@@ -5,6 +5,8 @@ class Node:
     Node class is just an abstraction of a dictionary.
     This can represent an node of a database, machine, etc.
     """
+    __slots__ = ('capacity', 'node_index', 'data')
+
     def __init__(self, node_index: int, capacity: str) -> None:
         self.capacity = capacity
         self.node_index = node_index
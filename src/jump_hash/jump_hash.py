@@ -0,0 +1,116 @@
+from typing import Any, Iterator
+import logging
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError, NodeIsFullError
+from src.hash import Hasher, default_hasher
+from src.hash.hash import MASK_64
+
+logger = logging.getLogger(__name__)
+
+JUMP_MULTIPLIER = 2862933555777941757
+
+def jump_hash(key_hash: int, buckets: int)->int:
+    """
+    Jump consistent hash (Lamping and Veach): maps the key to a bucket in [0, buckets)
+    in O(ln buckets) time and no memory. Growing to buckets + 1 moves only 1/(buckets + 1) of the keys
+    """
+    key_hash &= MASK_64
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key_hash = (key_hash * JUMP_MULTIPLIER + 1) & MASK_64
+        jump = int((bucket + 1) * ((1 << 31) / ((key_hash >> 33) + 1)))
+    return bucket
+
+class JumpHash:
+    """
+    Places keys with jump consistent hash, for clusters of fixed size.
+    There is no ring to search: the node is computed from the key hash.
+    Nodes can only be added or removed at the end, as the buckets are numbered
+    """
+    def __init__(self, nodes_count: int, node_capacity: int, hasher: Hasher = default_hasher) -> None:
+        if nodes_count < 1:
+            raise ValueError(f'nodes_count must be at least 1, got {nodes_count}')
+        self.hasher = hasher
+        self.node_capacity = node_capacity
+        self.table_nodes = [Node(i, node_capacity, hasher=hasher) for i in range(nodes_count)]
+
+    @property
+    def nodes_count(self) -> int:
+        return len(self.table_nodes)
+
+    def nodes(self) -> Iterator[Node]:
+        return iter(self.table_nodes)
+
+    def insert(self, key: str, value: Any) -> int:
+        """
+        Inserts the key, returning the index of its node. Raises NodeIsFullError if the node is full
+        """
+        key_hash = self.hasher(key)
+        node = self._find_node(key_hash)
+        if node.is_full() and not node.has_key(key):
+            raise NodeIsFullError(f'Node {node.index} is full')
+        node.insert(key, value, key_hash)
+        return node.index
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the value of the key. Raises an exception if not found
+        """
+        node = self._find_node(self.hasher(key))
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        return node.get(key)
+
+    def update(self, key: str, new_value: Any) -> None:
+        node = self._find_node(self.hasher(key))
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        node.update(key, new_value)
+
+    def delete(self, key: str) -> Any:
+        node = self._find_node(self.hasher(key))
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        return node.delete(key)
+
+    def add_nodes(self, nodes_to_add: int) -> int:
+        """
+        Appends nodes_to_add nodes. Only the keys whose bucket changed are moved.
+        Returns how many keys were moved
+        """
+        old_count = self.nodes_count
+        self.table_nodes.extend(Node(i, self.node_capacity, hasher=self.hasher) for i in range(old_count, old_count + nodes_to_add))
+        moved_keys = 0
+        for node in self.table_nodes[:old_count]:
+            moved_keys += self._export_moved_keys(node)
+        logger.info(f'Added {nodes_to_add} nodes: {moved_keys} keys were moved')
+        return moved_keys
+
+    def remove_nodes(self, nodes_to_remove: int) -> int:
+        """
+        Removes the last nodes_to_remove nodes, moving their keys to the remaining ones.
+        Returns how many keys were moved
+        """
+        if nodes_to_remove >= self.nodes_count:
+            raise ValueError(f'Can not remove {nodes_to_remove} of {self.nodes_count} nodes')
+        removed_nodes = self.table_nodes[-nodes_to_remove:]
+        del self.table_nodes[-nodes_to_remove:]
+        moved_keys = 0
+        for node in removed_nodes:
+            moved_keys += self._export_moved_keys(node)
+        logger.info(f'Removed {nodes_to_remove} nodes: {moved_keys} keys were moved')
+        return moved_keys
+
+    def _export_moved_keys(self, node: Node) -> int:
+        moved = list()
+        for key, key_hash in node.key_hashes.items():
+            owner = self._find_node(key_hash)
+            if owner is not node:
+                owner.insert(key, node.data[key], key_hash)
+                moved.append(key)
+        node.clean_keys(moved)
+        return len(moved)
+
+    def _find_node(self, key_hash: int) -> Node:
+        return self.table_nodes[jump_hash(key_hash, len(self.table_nodes))]
@@ -14,8 +14,7 @@ def main():
     for item in items:
         consistant_hash_ring.insert(item, item)
 
-    for ring_nodes in consistant_hash_ring.ring.inorder():
-        key, node = ring_nodes
+    for key, node in consistant_hash_ring.ring:
         print(key, node)
         for item in node.list_items():
             print(f'node: {node.index}, value: {item}')
@@ -0,0 +1 @@
+from .metrics import Counter, Histogram, Metrics, LATENCY_BUCKETS
@@ -0,0 +1,151 @@
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Iterable
+
+# Upper bounds of the histogram buckets. Values above the last one fall in the +Inf bucket
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 0.1, 1.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+class Counter:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+class Histogram:
+    """
+    Counts of the observed values per bucket, plus their sum, like a Prometheus histogram
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """
+        (upper bound, observations up to it) per bucket, ending with +Inf
+        """
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+class Metrics:
+    """
+    Registry of counters, histograms and gauges, exported as a dict or in the Prometheus text format.
+    Metrics are identified by name and labels. Gauges are read from a callback only when exported,
+    so they cost nothing on the hot path.
+    Structures are instrumented by wrapping their methods, and the ones created without metrics pay nothing.
+    Updates are not locked: a thread can lose an increment to another one
+    """
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[Labels, Counter]] = dict()
+        self.histograms: dict[str, dict[Labels, Histogram]] = dict()
+        self.gauges: dict[str, list[Callable[[], Iterable[tuple[dict[str, str], float]]]]] = dict()
+        self.help: dict[str, str] = dict()
+
+    def counter(self, name: str, help: str = '', **labels: Any) -> Counter:
+        self._describe(name, help)
+        series = self.counters.setdefault(name, dict())
+        key = self._labels(labels)
+        if key not in series:
+            series[key] = Counter()
+        return series[key]
+
+    def histogram(self, name: str, buckets: tuple[float, ...] = LATENCY_BUCKETS, help: str = '', **labels: Any) -> Histogram:
+        self._describe(name, help)
+        series = self.histograms.setdefault(name, dict())
+        key = self._labels(labels)
+        if key not in series:
+            series[key] = Histogram(buckets)
+        return series[key]
+
+    def gauge(self, name: str, collect: Callable[[], Iterable[tuple[dict[str, str], float]]], help: str = '') -> None:
+        """
+        Registers a callback returning the (labels, value) of every series of the gauge
+        """
+        self._describe(name, help)
+        self.gauges.setdefault(name, []).append(collect)
+
+    def timed(self, function: Callable, seconds: Histogram, calls: Counter | None = None) -> Callable:
+        """
+        Wraps function to observe its duration in seconds and count its calls
+        """
+        clock = time.perf_counter
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds.observe(clock() - start)
+                if calls is not None:
+                    calls.value += 1
+        return timed_function
+
+    def as_dict(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Every series by metric name, with its labels and its value, or its buckets, sum and count for histograms
+        """
+        result: dict[str, list[dict[str, Any]]] = dict()
+        for name, series in self.counters.items():
+            result[name] = [{'labels': dict(labels), 'value': counter.value} for labels, counter in series.items()]
+        for name, series in self.histograms.items():
+            result[name] = [{'labels': dict(labels), 'buckets': dict(histogram.cumulative()), 'sum': histogram.sum, 'count': histogram.count}
+                            for labels, histogram in series.items()]
+        for name, collects in self.gauges.items():
+            result[name] = [{'labels': labels, 'value': value} for collect in collects for labels, value in collect()]
+        return result
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, series in self.counters.items():
+            self._header(lines, name, 'counter')
+            for labels, counter in series.items():
+                lines.append(f'{name}{self._format_labels(labels)} {counter.value}')
+        for name, series in self.histograms.items():
+            self._header(lines, name, 'histogram')
+            for labels, histogram in series.items():
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{self._format_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{name}_sum{self._format_labels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{self._format_labels(labels)} {histogram.count}')
+        for name, collects in self.gauges.items():
+            self._header(lines, name, 'gauge')
+            for collect in collects:
+                for labels, value in collect():
+                    lines.append(f'{name}{self._format_labels(self._labels(labels))} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _describe(self, name: str, help: str) -> None:
+        if help:
+            self.help[name] = help
+
+    def _labels(self, labels: dict[str, Any]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def _header(self, lines: list[str], name: str, kind: str) -> None:
+        if name in self.help:
+            lines.append(f'# HELP {name} {self.help[name]}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    def _format_labels(self, labels: Labels) -> str:
+        if not labels:
+            return ''
+        escape = lambda value: value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
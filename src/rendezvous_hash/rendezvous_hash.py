@@ -0,0 +1,123 @@
+from typing import Any, Iterator
+import logging
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError, NodeIsFullError
+from src.consistent_hash_ring.errors.ring_errors import NodeNotFoundError
+from src.hash import Hasher, default_hasher
+from src.hash.hash import MASK_64
+
+logger = logging.getLogger(__name__)
+
+def _mix_64(value: int)->int:
+    """
+    splitmix64 finalizer, so every (key, node) pair gets an independent score without hashing a string
+    """
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+class RendezvousHash:
+    """
+    Places keys with rendezvous (highest random weight) hashing: each key goes to the node
+    with the highest score for it. Lookups are O(nodes), but the balance is as good as the
+    hash and any node can be added or removed moving only the keys it wins or owned
+    """
+    def __init__(self, nodes_count: int, node_capacity: int, hasher: Hasher = default_hasher) -> None:
+        if nodes_count < 1:
+            raise ValueError(f'nodes_count must be at least 1, got {nodes_count}')
+        self.hasher = hasher
+        self.node_capacity = node_capacity
+        self.table_nodes: list[Node] = list()
+        self.seeds: list[int] = list()          # Seed of each node in table_nodes, mixed with the key hash to score it
+        self.next_node_index = 0
+        for _ in range(nodes_count):
+            self._create_node()
+
+    @property
+    def nodes_count(self) -> int:
+        return len(self.table_nodes)
+
+    def nodes(self) -> Iterator[Node]:
+        return iter(self.table_nodes)
+
+    def insert(self, key: str, value: Any) -> int:
+        """
+        Inserts the key, returning the index of its node. Raises NodeIsFullError if the node is full
+        """
+        key_hash = self.hasher(key)
+        node = self._find_node(key_hash)
+        if node.is_full() and not node.has_key(key):
+            raise NodeIsFullError(f'Node {node.index} is full')
+        node.insert(key, value, key_hash)
+        return node.index
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the value of the key. Raises an exception if not found
+        """
+        node = self._find_node(self.hasher(key))
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        return node.get(key)
+
+    def update(self, key: str, new_value: Any) -> None:
+        node = self._find_node(self.hasher(key))
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        node.update(key, new_value)
+
+    def delete(self, key: str) -> Any:
+        node = self._find_node(self.hasher(key))
+        if not node.has_key(key):
+            raise KeyNotFoundError(f'Key {key} not found')
+        return node.delete(key)
+
+    def add_node(self) -> Node:
+        """
+        Adds a node, which takes from every other node the keys it now scores highest for
+        """
+        node = self._create_node()
+        seed = self.seeds[-1]
+        moved_keys = 0
+        for other, other_seed in zip(self.table_nodes[:-1], self.seeds[:-1]):
+            moved_keys += other.export_keys_where(node, lambda key_hash: self._score(key_hash, seed) > self._score(key_hash, other_seed))
+        logger.info(f'Node {node.index} added: {moved_keys} keys were moved')
+        return node
+
+    def remove_node(self, index: int) -> Node:
+        """
+        Removes the node, sending each of its keys to the node with the next highest score
+        """
+        position = next((i for i, node in enumerate(self.table_nodes) if node.index == index), None)
+        if position is None:
+            raise NodeNotFoundError(f'Node with index {index} not found')
+        if self.nodes_count == 1:
+            raise ValueError('Can not remove the last node')
+        node = self.table_nodes.pop(position)
+        del self.seeds[position]
+        for key, key_hash in node.key_hashes.items():
+            self._find_node(key_hash).insert(key, node.data[key], key_hash)
+        logger.info(f'Node {index} removed: {len(node.data)} keys were moved')
+        return node
+
+    def _create_node(self) -> Node:
+        node = Node(self.next_node_index, self.node_capacity, hasher=self.hasher)
+        self.table_nodes.append(node)
+        self.seeds.append(self.hasher(f'node-{node.index}') & MASK_64)
+        self.next_node_index += 1
+        return node
+
+    def _score(self, key_hash: int, seed: int) -> int:
+        return _mix_64((key_hash ^ seed) & MASK_64)
+
+    def _find_node(self, key_hash: int) -> Node:
+        key_hash &= MASK_64
+        best_score, best_position = -1, 0
+        for position, seed in enumerate(self.seeds):     # _mix_64 inlined, this is the hot loop
+            value = key_hash ^ seed
+            value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+            value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+            value ^= value >> 31
+            if value > best_score:
+                best_score, best_position = value, position
+        return self.table_nodes[best_position]
@@ -0,0 +1,116 @@
+import pytest
+from array import array
+from src.adt.array_avl_tree import ArrayAVLTree, NIL
+from src.consistent_hash_ring.ring import Ring
+
+def _assert_balanced(tree, node):
+    if node == NIL:
+        return 0
+    left_height = _assert_balanced(tree, tree.left[node])
+    right_height = _assert_balanced(tree, tree.right[node])
+    assert abs(left_height - right_height) <= 1
+    assert tree.heights[node] == 1 + max(left_height, right_height)
+    return tree.heights[node]
+
+def test_insert_search():
+    tree = ArrayAVLTree()
+    for key in [20, 10, 30, 5, 15, 25, 35]:
+        tree.insert(key, f'value{key}')
+    assert tree.search(15) == 'value15'
+    assert tree.search(16) is None
+    assert len(tree) == 7
+
+def test_sorted_inserts_stay_balanced():
+    tree = ArrayAVLTree()
+    for key in range(10_000):
+        tree.insert(key, key)
+    _assert_balanced(tree, tree.root)
+    assert tree.heights[tree.root] <= 20
+    assert [key for key, _ in tree] == list(range(10_000))
+
+def test_insert_existing_key_replaces_value():
+    tree = ArrayAVLTree()
+    tree.insert(1, 'a')
+    tree.insert(1, 'b')
+    assert tree.search(1) == 'b'
+    assert len(tree) == 1
+
+def test_update():
+    tree = ArrayAVLTree()
+    tree.insert(1, 'a')
+    assert tree.update(1, 'b') == 'a'
+    assert tree.search(1) == 'b'
+    assert tree.update(2, 'c') is None
+
+def test_remove():
+    tree = ArrayAVLTree()
+    for key in range(100):
+        tree.insert(key, key)
+    for key in range(0, 100, 2):
+        assert tree.remove(key) == key
+    assert tree.remove(0) is None
+    _assert_balanced(tree, tree.root)
+    assert [key for key, _ in tree] == list(range(1, 100, 2))
+
+def test_removed_slots_are_reused():
+    tree = ArrayAVLTree()
+    for key in range(100):
+        tree.insert(key, key)
+    for key in range(50):
+        tree.remove(key)
+    for key in range(100, 150):
+        tree.insert(key, key)
+    assert len(tree.values) == 100
+    assert [key for key, _ in tree] == list(range(50, 150))
+
+def test_remove_root():
+    tree = ArrayAVLTree()
+    tree.insert(1, 'a')
+    assert tree.remove(1) == 'a'
+    assert tree.root == NIL
+    assert list(tree) == []
+
+def test_keys_wider_than_64_bits():
+    tree = ArrayAVLTree()
+    tree.insert(5, 'a')
+    assert isinstance(tree.keys, array)
+    tree.insert(2 ** 100, 'b')
+    assert tree.search(2 ** 100) == 'b'
+    assert tree.find_max_smaller_than(2 ** 99) == 'a'
+
+def test_find_max_smaller_than():
+    tree = ArrayAVLTree()
+    for key in [0, 10, 20, 30]:
+        tree.insert(key, key)
+    assert tree.find_max_smaller_than(0) == 0
+    assert tree.find_max_smaller_than(15) == 10
+    assert tree.find_max_smaller_than(20) == 20
+    assert tree.find_max_smaller_than(1000) == 30
+    assert tree.find_max_smaller_than(-1) is None
+
+def test_find_min_greater_than():
+    tree = ArrayAVLTree()
+    for key in [0, 10, 20, 30]:
+        tree.insert(key, key)
+    assert tree.find_min_greater_than(-1) == 0
+    assert tree.find_min_greater_than(15) == 20
+    assert tree.find_min_greater_than(20) == 20
+    assert tree.find_min_greater_than(31) is None
+
+def test_ring_with_array_avl_tree():
+    ring = Ring(3, ArrayAVLTree(), vnodes=4)
+    for i in range(200):
+        ring.insert(f'key{i}', f'value{i}')
+    ring.add_node()
+    for i in range(200):
+        assert ring.get(f'key{i}') == f'value{i}'
+    _assert_balanced(ring.ring, ring.ring.root)
+
+def test_bulk_load():
+    tree = ArrayAVLTree()
+    tree.insert(-5, 'replaced')
+    tree.bulk_load([(key, key) for key in range(1_000, 0, -1)])
+    _assert_balanced(tree, tree.root)
+    assert [key for key, _ in tree] == list(range(1, 1_001))
+    assert tree.find_max_smaller_than(500) == 500
+    assert tree.search(-5) is None
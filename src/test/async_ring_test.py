@@ -0,0 +1,114 @@
+import asyncio
+import random
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.async_ring import AsyncRing
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError
+from src.consistent_hash_ring.ring import Ring
+from src.consistent_hash_ring.scaling_policy import ScalingPolicy
+from src.consistent_hash_ring.storage import InMemoryStorage
+
+def assert_stored_at_owners(async_ring):
+    for index, storage in async_ring.storages.items():
+        for key in storage.data:
+            assert async_ring._owner(key).index == index
+
+def test_insert_get_update_delete():
+    async def scenario():
+        async_ring = AsyncRing(Ring(20, AVLTree()))
+        await asyncio.gather(*(async_ring.insert(f'key{i}', f'value{i}') for i in range(200)))
+        assert len(async_ring.storages) > 1
+        await async_ring.update('key1', 'new_value')
+        assert await async_ring.get('key1') == 'new_value'
+        assert await async_ring.delete('key2') == 'value2'
+        with pytest.raises(KeyNotFoundError):
+            await async_ring.get('key2')
+        with pytest.raises(KeyNotFoundError):
+            await async_ring.update('key2', 'value')
+        await async_ring.wait_for_migrations()
+        assert not async_ring.migrating
+        assert_stored_at_owners(async_ring)
+        values = await async_ring.get_many(f'key{i}' for i in range(3, 200))
+        assert values == {f'key{i}': f'value{i}' for i in range(3, 200)}
+    asyncio.run(scenario())
+
+def test_batches_send_one_request_per_node():
+    async def scenario():
+        ring = Ring(10_000, AVLTree(), vnodes=8)
+        async_ring = AsyncRing(ring, lambda node: InMemoryStorage(latency=0.001))
+        for _ in range(3):
+            await async_ring.add_node()
+        await async_ring.insert_many((f'key{i}', f'value{i}') for i in range(1000))
+        assert all(storage.calls == 1 for storage in async_ring.storages.values())
+        await async_ring.get_many(f'key{i}' for i in range(1000))
+        assert all(storage.calls == 2 for storage in async_ring.storages.values())
+    asyncio.run(scenario())
+
+def test_reads_are_served_while_keys_migrate():
+    async def scenario():
+        ring = Ring(10_000, AVLTree(), vnodes=8)
+        async_ring = AsyncRing(ring, lambda node: InMemoryStorage(latency=0.001), migration_batch=50)
+        await async_ring.insert_many((f'key{i}', f'value{i}') for i in range(1000))
+        await async_ring.add_node()
+        assert async_ring.migrating and async_ring.migration_task is not None
+        await async_ring.update('key1', 'new_value')
+        for i in range(2, 1000, 7):
+            assert await async_ring.get(f'key{i}') == f'value{i}'
+        await async_ring.remove_node(0)
+        await async_ring.wait_for_migrations()
+        assert not async_ring.migrating
+        assert 0 not in async_ring.storages
+        assert_stored_at_owners(async_ring)
+        assert await async_ring.get('key1') == 'new_value'
+        values = await async_ring.get_many(f'key{i}' for i in range(2, 1000))
+        assert values == {f'key{i}': f'value{i}' for i in range(2, 1000)}
+    asyncio.run(scenario())
+
+def test_writes_drop_the_copies_they_supersede():
+    async def scenario():
+        ring = Ring(20, AVLTree(), policy=ScalingPolicy(0.9, 0.0))
+        async_ring = AsyncRing(ring, lambda node: InMemoryStorage(latency=0.001), migration_batch=2)
+        for i in range(20):
+            await async_ring.insert(f'key{i}', i)
+        assert len(async_ring.storages) == 2
+        superseded = list(async_ring.migrating)
+        assert superseded
+        for key in superseded:
+            await async_ring.update(key, 'new')
+        await async_ring.wait_for_migrations()
+        assert_stored_at_owners(async_ring)
+
+        for key in [f'key{i}' for i in range(20) if f'key{i}' not in superseded][:6]:
+            await async_ring.delete(key)
+        new_node = max(async_ring.storages)
+        assert await async_ring.remove_node(new_node)       # The arc goes back to node 0
+        assert async_ring.migrating
+        values = await async_ring.get_many(superseded)
+        assert values == {key: 'new' for key in superseded}
+        await async_ring.wait_for_migrations()
+        assert_stored_at_owners(async_ring)
+        assert await async_ring.get_many(superseded) == {key: 'new' for key in superseded}
+    asyncio.run(scenario())
+
+def test_churn_leaves_no_orphaned_values():
+    async def scenario():
+        rng = random.Random(7)
+        ring = Ring(30, AVLTree(), vnodes=4, policy=ScalingPolicy(0.9, 0.1))
+        async_ring = AsyncRing(ring, lambda node: InMemoryStorage(latency=0.0005), migration_batch=5)
+        expected = dict()
+        for step in range(600):
+            key = f'key{rng.randrange(150)}'
+            if key in expected and rng.random() < 0.3:
+                await async_ring.delete(key)
+                del expected[key]
+            elif key in expected:
+                expected[key] = step
+                await async_ring.update(key, step)
+            else:
+                expected[key] = step
+                await async_ring.insert(key, step)
+        await async_ring.wait_for_migrations()
+        assert_stored_at_owners(async_ring)
+        assert sum(len(storage.data) for storage in async_ring.storages.values()) == len(expected)
+        assert await async_ring.get_many(expected) == expected
+    asyncio.run(scenario())
@@ -1,6 +1,83 @@
-# import pytest
-# from ..consistent_hash_ring.ring import Ring
-# from ..ADT.binary_search_tree import BinarySearchTree
+import pytest
+from src.adt.binary_search_tree import BinarySearchTree
+from src.consistent_hash_ring.ring import Ring
 
-# Test create
-# def test_
+def test_insert_search():
+    bst = BinarySearchTree()
+    for key in [20, 10, 30, 5, 15, 25, 35]:
+        bst.insert(key, f'value{key}')
+    assert bst.search(15) == 'value15'
+    assert bst.search(16) is None
+
+def test_iter_is_lazy_and_ordered():
+    bst = BinarySearchTree()
+    for key in [20, 10, 30, 5, 15, 25, 35]:
+        bst.insert(key, key)
+    iterator = iter(bst)
+    assert next(iterator) == (5, 5)
+    assert list(iterator) == [(10, 10), (15, 15), (20, 20), (25, 25), (30, 30), (35, 35)]
+
+def test_update():
+    bst = BinarySearchTree()
+    bst.insert(1, 'a')
+    assert bst.update(1, 'b') == 'a'
+    assert bst.search(1) == 'b'
+    assert bst.update(2, 'c') is None
+
+def test_remove_leaf_and_inner_nodes():
+    bst = BinarySearchTree()
+    for key in [20, 10, 30, 5, 15, 25, 35]:
+        bst.insert(key, f'value{key}')
+    assert bst.remove(5) == 'value5'
+    assert bst.remove(10) == 'value10'
+    assert bst.remove(30) == 'value30'
+    assert bst.remove(30) is None
+    assert list(bst) == [(15, 'value15'), (20, 'value20'), (25, 'value25'), (35, 'value35')]
+
+def test_remove_root():
+    bst = BinarySearchTree()
+    bst.insert(1, 'a')
+    bst.insert(2, 'b')
+    assert bst.remove(1) == 'a'
+    assert bst.root.key == 2
+    assert bst.remove(2) == 'b'
+    assert bst.root is None
+
+def test_find_max_smaller_than():
+    bst = BinarySearchTree()
+    for key in [0, 10, 20, 30]:
+        bst.insert(key, key)
+    assert bst.find_max_smaller_than(15) == 10
+    assert bst.find_max_smaller_than(20) == 20
+    assert bst.find_max_smaller_than(1000) == 30
+    assert bst.find_max_smaller_than(-1) is None
+
+def test_find_min_greater_than():
+    bst = BinarySearchTree()
+    for key in [0, 10, 20, 30]:
+        bst.insert(key, key)
+    assert bst.find_min_greater_than(15) == 20
+    assert bst.find_min_greater_than(20) == 20
+    assert bst.find_min_greater_than(31) is None
+
+def test_deep_tree_does_not_hit_recursion_limit():
+    bst = BinarySearchTree()
+    for key in range(5_000):            # Sorted inserts build a linked list
+        bst.insert(key, key)
+    assert bst.search(4_999) == 4_999
+    assert bst.find_max_smaller_than(10_000) == 4_999
+    assert sum(1 for _ in bst) == 5_000
+    assert bst.remove(0) == 0
+
+def test_ring_str():
+    ring = Ring(3, BinarySearchTree())
+    ring.insert('key', 'value')
+    assert str(ring) == 'node 0: key: value'
+
+def test_bulk_load():
+    tree = BinarySearchTree()
+    tree.insert(-5, 'replaced')
+    tree.bulk_load([(key, key) for key in range(1_000, 0, -1)])
+    assert [key for key, _ in tree] == list(range(1, 1_001))
+    assert tree.find_max_smaller_than(500) == 500
+    assert tree.search(-5) is None
@@ -0,0 +1,68 @@
+import threading
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.adt.sorted_array import SortedArray
+from src.consistent_hash_ring.concurrent_ring import ConcurrentRing, ReadWriteLock
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError
+
+THREADS = 8
+
+def run_threads(target):
+    errors = []
+    def wrapped(thread_index):
+        try:
+            target(thread_index)
+        except Exception as error:
+            errors.append(error)
+    threads = [threading.Thread(target=wrapped, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+@pytest.mark.parametrize('adt, vnodes', [(AVLTree, 1), (SortedArray, 1), (AVLTree, 8)])
+def test_concurrent_inserts_gets_and_deletes(adt, vnodes):
+    ring = ConcurrentRing(50, adt(), node_min_load=0.1, vnodes=vnodes)
+    def worker(thread_index):
+        keys = [f'thread{thread_index}-key{i}' for i in range(500)]
+        for key in keys:
+            ring.insert(key, key)
+        for key in keys:
+            assert ring.get(key) == key
+        for key in keys[::2]:
+            ring.update(key, f'new-{key}')
+        for key in keys[1::2]:
+            assert ring.delete(key) == key
+    run_threads(worker)
+
+    stored = {key: value for node in ring.nodes() for key, value in node.data.items()}
+    expected = {f'thread{t}-key{i}': f'new-thread{t}-key{i}' for t in range(THREADS) for i in range(0, 500, 2)}
+    assert stored == expected
+    for node in ring.nodes():
+        for key in node.data:
+            assert ring._find_node(node.get_key_hash(key)) is node
+    with pytest.raises(KeyNotFoundError):
+        ring.get('thread0-key1')
+
+def test_concurrent_readers_during_topology_changes():
+    ring = ConcurrentRing(1_000, AVLTree(), vnodes=4)
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(2000))
+    def worker(thread_index):
+        if thread_index == 0:
+            for _ in range(5):
+                ring.add_node()
+            return
+        for i in range(2000):
+            assert ring.get(f'key{i}') == f'value{i}'
+    run_threads(worker)
+    assert len(ring.node_positions) >= 7
+
+def test_read_write_lock_is_reentrant_for_the_writer():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        pass
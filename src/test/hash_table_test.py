@@ -0,0 +1,63 @@
+import pytest
+from src.hash_table.hash_table import HashTable
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_insert_get_delete(incremental):
+    table = HashTable(1, 10, 5, incremental=incremental)
+    for i in range(200):
+        table.insert(f'key{i}', f'value{i}')
+    assert table.nodes_count > 1
+    assert table.elements_count == 200
+    for i in range(200):
+        assert table.get(f'key{i}') == f'value{i}'
+    for i in range(100):
+        assert table.delete(f'key{i}')
+    assert not table.delete('key0')
+    assert table.elements_count == 100
+    assert table.get('key0') is None
+    assert table.get('key150') == 'value150'
+
+def test_update():
+    table = HashTable(4, 10, 5)
+    table.insert('key', 'value')
+    table.update('key', 'new_value')
+    assert table.get('key') == 'new_value'
+    assert table.elements_count == 1
+
+def test_incremental_rehash_is_bounded():
+    table = HashTable(4, 100, 50, incremental=True, rehash_step=1)
+    for i in range(100):
+        table.insert(f'key{i}', f'value{i}')
+    table.add_nodes(4)
+    assert table.is_rehashing()
+    assert table.rehash_index == 0
+    assert sum(len(node.data) for node in table.table_nodes) == 0
+
+    assert table.get('key42') == 'value42'      # Found in the old table
+    assert table.rehash_index == 1
+
+    for _ in range(3):
+        table.get('key0')
+    assert not table.is_rehashing()
+    assert sum(len(node.data) for node in table.table_nodes) == 100
+    for i in range(100):
+        assert table.get(f'key{i}') == f'value{i}'
+
+def test_writes_during_incremental_rehash():
+    table = HashTable(4, 100, 50, incremental=True, rehash_step=1)
+    for i in range(100):
+        table.insert(f'key{i}', f'value{i}')
+    table.add_nodes(4)
+    table.insert('key1', 'new_value1')
+    table.update('key2', 'new_value2')
+    assert table.delete('key3')
+    table.insert('key100', 'value100')
+    assert table.elements_count == 100
+    table.remove_nodes(2)               # Finishes the current migration before starting another
+    assert table.get('key1') == 'new_value1'
+    assert table.get('key2') == 'new_value2'
+    assert table.get('key3') is None
+    assert table.get('key100') == 'value100'
+    while table.is_rehashing():
+        table.get('key0')
+    assert sum(len(node.data) for node in table.table_nodes) == 100
@@ -0,0 +1,51 @@
+import hashlib
+import pytest
+from array import array
+from src.hash.hash import Hasher, hash, hash_many, md5, blake2b_64, fnv1a_64, xxh64
+from src.adt.sorted_array import SortedArray
+from src.consistent_hash_ring.ring import Ring
+
+def test_md5_matches_hex_digest():
+    for key in ['', 'key', 'gatão']:
+        assert md5(key.encode()) == int(hashlib.md5(key.encode()).hexdigest(), 16)
+        assert hash(key) == int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+def test_xxh64_reference_values():
+    assert xxh64(b'') == 0xEF46DB3751D8E999
+    assert xxh64(b'a') == 0xD24EC4F1A98C6E5B
+    assert xxh64(b'abc') == 0x44BC2CF5AD770999
+    assert xxh64(b'Nobody inspects the spammish repetition') == 0xFBCEA83C8A378BF1
+
+def test_fnv1a_reference_values():
+    assert fnv1a_64(b'') == 0xCBF29CE484222325
+    assert fnv1a_64(b'a') == 0xAF63DC4C8601EC8C
+
+def test_64_bits_functions():
+    for function in [blake2b_64, fnv1a_64, xxh64]:
+        assert 0 <= function(b'some key') < 2 ** 64
+
+def test_hasher_space():
+    hasher = Hasher('xxh64', 1_000)
+    assert hasher.space == 1_000
+    assert hasher('key') == xxh64(b'key') % 1_000
+    assert Hasher('blake2b').space == 2 ** 64
+
+def test_unknown_hash_function():
+    with pytest.raises(ValueError):
+        Hasher('crc0')
+
+def test_hash_many():
+    keys = [f'key{i}' for i in range(10)]
+    hasher = Hasher('xxh64')
+    hashes = hasher.hash_many(keys)
+    assert isinstance(hashes, array)
+    assert list(hashes) == [hasher(key) for key in keys]
+    assert hash_many(keys) == [hash(key) for key in keys]     # md5 does not fit in 64 bits
+
+def test_ring_with_64_bits_hasher():
+    ring = Ring(5, SortedArray(), hasher=Hasher('xxh64'))
+    for i in range(100):
+        ring.insert(f'key{i}', f'value{i}')
+    for i in range(100):
+        assert ring.get(f'key{i}') == f'value{i}'
+    assert isinstance(ring.ring.keys, array)
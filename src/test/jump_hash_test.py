@@ -0,0 +1,47 @@
+import pytest
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError, NodeIsFullError
+from src.jump_hash.jump_hash import JumpHash, jump_hash
+
+def test_jump_hash_is_in_range_and_stable():
+    for key_hash in range(1000):
+        bucket = jump_hash(key_hash, 10)
+        assert 0 <= bucket < 10
+        assert bucket == jump_hash(key_hash, 10)
+    assert jump_hash(12345, 1) == 0
+
+def test_jump_hash_only_moves_keys_to_the_new_bucket():
+    for key_hash in range(0, 2 ** 64, 2 ** 52):
+        old_bucket, new_bucket = jump_hash(key_hash, 7), jump_hash(key_hash, 8)
+        assert new_bucket == old_bucket or new_bucket == 7
+
+def test_insert_get_update_delete():
+    table = JumpHash(4, 1000)
+    for i in range(200):
+        table.insert(f'key{i}', f'value{i}')
+    assert sum(len(node.data) for node in table.nodes()) == 200
+    assert all(node.data for node in table.nodes())
+    table.update('key1', 'new_value')
+    assert table.get('key1') == 'new_value'
+    assert table.delete('key2') == 'value2'
+    with pytest.raises(KeyNotFoundError):
+        table.get('key2')
+    with pytest.raises(KeyNotFoundError):
+        table.update('key2', 'value')
+
+def test_full_node_raises():
+    table = JumpHash(1, 2)
+    table.insert('a', 1)
+    table.insert('b', 2)
+    table.insert('a', 3)            # Existing keys can still be written
+    with pytest.raises(NodeIsFullError):
+        table.insert('c', 4)
+
+def test_add_and_remove_nodes_move_a_fraction_of_the_keys():
+    table = JumpHash(4, 10_000)
+    for i in range(2000):
+        table.insert(f'key{i}', f'value{i}')
+    moved_keys = table.add_nodes(1)
+    assert 0 < moved_keys < 2000 * 0.3           # Expected 1/5 of the keys
+    assert table.remove_nodes(1) == moved_keys
+    for i in range(2000):
+        assert table.get(f'key{i}') == f'value{i}'
@@ -0,0 +1,110 @@
+import os
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.log_storage import LogStorage
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.ring import Ring
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('segment-'))
+
+def test_put_get_overwrite_delete(tmp_path):
+    storage = LogStorage(str(tmp_path))
+    storage['a'] = {'value': 1}
+    storage['b'] = [1, 2, 3]
+    storage['a'] = 'new'
+    assert storage['a'] == 'new'
+    assert storage['b'] == [1, 2, 3]
+    del storage['b']
+    assert 'b' not in storage
+    assert storage.get('b') is None
+    with pytest.raises(KeyError):
+        del storage['b']
+    assert dict(storage.items()) == {'a': 'new'}
+
+def test_reopen_from_index(tmp_path):
+    storage = LogStorage(str(tmp_path), segment_size=4096)
+    for i in range(500):
+        storage[f'key{i}'] = f'value{i}'
+    for i in range(0, 500, 2):
+        del storage[f'key{i}']
+    storage.close()
+    assert os.path.exists(tmp_path / 'index')
+
+    reopened = LogStorage(str(tmp_path), segment_size=4096)
+    assert len(reopened) == 250
+    assert reopened['key1'] == 'value1'
+    assert 'key0' not in reopened
+    reopened['key0'] = 'back'
+    assert reopened['key0'] == 'back'
+
+def test_reopen_after_crash_scans_the_log(tmp_path):
+    storage = LogStorage(str(tmp_path), segment_size=4096)
+    for i in range(300):
+        storage[f'key{i}'] = i
+    del storage['key7']
+    storage.flush()             # No close: the index is never saved
+
+    reopened = LogStorage(str(tmp_path), segment_size=4096)
+    assert len(reopened) == 299
+    assert reopened['key299'] == 299
+    assert 'key7' not in reopened
+
+def test_records_larger_than_a_segment(tmp_path):
+    storage = LogStorage(str(tmp_path), segment_size=1024)
+    storage['big'] = 'x' * 5000
+    storage['small'] = 1
+    assert storage['big'] == 'x' * 5000
+    storage.close()
+    assert LogStorage(str(tmp_path), segment_size=1024)['big'] == 'x' * 5000
+
+def test_compaction_drops_overwritten_segments(tmp_path):
+    storage = LogStorage(str(tmp_path), segment_size=4096, compaction_batch=16)
+    for round in range(20):
+        for i in range(50):
+            storage[f'key{i}'] = (round, i)
+    assert len(segment_files(tmp_path)) <= 2         # 8 segments without compaction
+    storage.compact()
+    assert all(storage[f'key{i}'] == (19, i) for i in range(50))
+    storage.close()
+    reopened = LogStorage(str(tmp_path), segment_size=4096)
+    assert all(reopened[f'key{i}'] == (19, i) for i in range(50))
+
+def test_compaction_keeps_deletes(tmp_path):
+    storage = LogStorage(str(tmp_path), segment_size=2048, compaction_batch=16)
+    for i in range(100):
+        storage[f'key{i}'] = i
+    for i in range(100):
+        del storage[f'key{i}']
+    storage['last'] = 'value'
+    storage.compact()
+    storage.flush()
+    reopened = LogStorage(str(tmp_path), segment_size=2048)     # Scans the log: deleted keys must not come back
+    assert list(reopened) == ['last']
+
+def test_node_indexes_a_reopened_storage(tmp_path):
+    node = Node(0, 100, storage=LogStorage(str(tmp_path)))
+    for i in range(20):
+        node.insert(f'key{i}', i)
+    node.close()
+    reopened = Node(0, 100, storage=LogStorage(str(tmp_path)))
+    assert reopened.key_hashes == node.key_hashes
+    assert reopened.sorted_keys == node.sorted_keys
+    assert reopened.get('key3') == 3
+
+def test_ring_on_log_storage(tmp_path):
+    ring = Ring(50, AVLTree(), node_storage=lambda index: LogStorage(str(tmp_path / str(index)), segment_size=4096))
+    for i in range(400):
+        ring.insert(f'key{i}', f'value{i}')
+    for i in range(400):
+        assert ring.get(f'key{i}') == f'value{i}'
+    for i in range(0, 400, 2):
+        ring.delete(f'key{i}')
+    assert len(os.listdir(tmp_path)) == len(list(ring.nodes()))
+
+    removed = next(ring.nodes())
+    assert ring.remove_node(removed.index)
+    assert not os.path.exists(tmp_path / str(removed.index))
+    assert all(ring.get(f'key{i}') == f'value{i}' for i in range(1, 400, 2))
+    ring.close()
+    assert all(os.path.exists(tmp_path / str(node.index) / 'index') for node in ring.nodes())
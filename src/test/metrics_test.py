@@ -0,0 +1,112 @@
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.adt.binary_search_tree import BinarySearchTree
+from src.consistent_hash_ring.concurrent_ring import ConcurrentRing
+from src.consistent_hash_ring.ring import Ring
+from src.hash_table.hash_table import HashTable
+from src.metrics import Metrics
+
+def series(metrics, name, **labels):
+    labels = {key: str(value) for key, value in labels.items()}
+    return [entry for entry in metrics.as_dict()[name] if labels.items() <= entry['labels'].items()]
+
+def test_histogram_buckets():
+    metrics = Metrics()
+    histogram = metrics.histogram('latency', (1, 10))
+    for value in [0.5, 1, 5, 50]:
+        histogram.observe(value)
+    assert histogram.cumulative() == [('1', 2), ('10', 3), ('+Inf', 4)]
+    assert histogram.sum == 56.5
+
+def test_prometheus_format():
+    metrics = Metrics()
+    metrics.counter('requests_total', help='Requests', path='/a"b').inc(3)
+    metrics.histogram('latency_seconds', (0.1,)).observe(0.05)
+    metrics.gauge('load', lambda: [({'node': 1}, 0.5)])
+    assert metrics.to_prometheus().splitlines() == [
+        '# HELP requests_total Requests',
+        '# TYPE requests_total counter',
+        'requests_total{path="/a\\"b"} 3',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="+Inf"} 1',
+        'latency_seconds_sum 0.05',
+        'latency_seconds_count 1',
+        '# TYPE load gauge',
+        'load{node="1"} 0.5',
+    ]
+
+def test_rings_without_metrics_run_the_plain_methods():
+    ring = Ring(10, AVLTree())
+    assert 'insert' not in vars(ring)
+    assert 'get' not in vars(ring)
+
+def test_ring_metrics():
+    metrics = Metrics()
+    ring = Ring(10, BinarySearchTree(), metrics=metrics)
+    for i in range(100):
+        ring.insert(f'key{i}', i)
+    for i in range(50):
+        ring.get(f'key{i}')
+    ring.delete('key0')
+    ring.insert_many([('a', 1), ('b', 2)])
+
+    assert series(metrics, 'ring_operations_total', operation='insert')[0]['value'] == 100
+    assert series(metrics, 'ring_operations_total', operation='get')[0]['value'] == 50
+    assert series(metrics, 'ring_operation_seconds', operation='delete')[0]['count'] == 1
+    assert series(metrics, 'ring_operations_total', operation='insert_many')[0]['value'] == 1
+    assert sum(entry['value'] for entry in series(metrics, 'ring_arc_operations_total')) == 151
+    assert 'ring_lookup_depth' not in metrics.as_dict()
+    splits = series(metrics, 'ring_events_total', event='split')[0]['value']
+    assert splits == ring.policy.splits > 0
+    loads = series(metrics, 'ring_node_load')
+    assert len(loads) == len(list(ring.nodes()))
+    assert sum(entry['value'] for entry in series(metrics, 'ring_node_keys')) == 101
+    assert 'ring_arc_operations_total{arc=' in metrics.to_prometheus()
+
+def test_arc_metrics_route_each_key_once():
+    metrics = Metrics()
+    ring = Ring(1_000, AVLTree(), vnodes=8, route_cache_size=100)
+    ring.insert_many((f'key{i}', i) for i in range(200))
+    hasher = ring.hasher
+    hashed = []
+    ring.hasher = lambda key: (hashed.append(key), hasher(key))[1]
+    ring.instrument(metrics)
+    for i in list(range(100)) * 2:
+        assert ring.get(f'key{i}') == i
+    assert len(hashed) == 100               # Once per key, the second gets take the hash from the route cache
+    assert sum(entry['value'] for entry in series(metrics, 'ring_arc_operations_total')) == 200
+
+def test_concurrent_ring_metrics():
+    metrics = Metrics()
+    ring = ConcurrentRing(10, AVLTree(), vnodes=4)
+    ring.instrument(metrics)
+    for i in range(30):
+        ring.insert(f'key{i}', i)
+    assert ring.get('key3') == 3
+    assert series(metrics, 'ring_operations_total', operation='insert')[0]['value'] == 30
+    assert series(metrics, 'ring_events_total', event='add_virtual_node')[0]['value'] > 0
+
+def test_hash_table_metrics():
+    metrics = Metrics()
+    table = HashTable(2, 10, 1.5, metrics=metrics)
+    for i in range(20):
+        table.insert(f'key{i}')
+    assert table.get('key1') == 'key1'
+    assert series(metrics, 'hash_table_operations_total', operation='insert')[0]['value'] == 20
+    assert sum(entry['value'] for entry in series(metrics, 'hash_table_node_operations_total')) == 21
+    assert series(metrics, 'hash_table_events_total', event='resize')[0]['value'] > 0
+    assert len(series(metrics, 'hash_table_node_load')) == table.nodes_count
+
+def test_hash_table_metrics_hash_each_key_once():
+    metrics = Metrics()
+    table = HashTable(4, 100, 50, metrics=metrics)
+    hasher = table.hasher
+    hashed = []
+    table.hasher = lambda key: (hashed.append(key), hasher(key))[1]
+    table.insert('key', value='value')
+    table.update('key', value='new_value')
+    assert table.get('key') == 'new_value'
+    assert table.delete('key')
+    assert hashed == ['key'] * 4
+    assert sum(entry['value'] for entry in series(metrics, 'hash_table_node_operations_total')) == 4
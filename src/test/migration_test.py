@@ -0,0 +1,104 @@
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError
+from src.consistent_hash_ring.migration import RateLimiter
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.errors.ring_errors import PositionTakenError
+from src.consistent_hash_ring.ring import Ring
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def assert_keys_at_owners(ring):
+    for node in ring.nodes():
+        for key in node.data:
+            assert ring._find_node(node.get_key_hash(key)) is node
+
+def test_export_keys_chunks_moves_a_chunk_per_step():
+    source, destination = Node(0, 100), Node(1, 100)
+    for i in range(10):
+        source.insert(f'key{i}', i)
+    moved_keys = {key for key in source.data if source.get_key_hash(key) % 2}
+    steps = source.export_keys_chunks(lambda key_hash: destination if key_hash % 2 else source, 4)
+    assert sum(keys for keys, _ in steps) == len(moved_keys)
+    assert set(destination.data) == moved_keys
+    assert not moved_keys & set(source.data)
+    assert len(source.sorted_keys) == len(source.data)
+
+@pytest.mark.parametrize('vnodes', [1, 4])
+def test_split_moves_keys_while_serving_reads(vnodes):
+    ring = Ring(200, AVLTree(), vnodes=vnodes, migration_chunk=10)
+    for i in range(150):
+        ring.insert(f'key{i}', f'value{i}')
+    ring.finish_migrations()
+    ring.add_node()
+    assert ring.migrations
+    ring.update('key1', 'new_value')
+    ring.delete('key2')
+    ring.insert('key3', 'newer_value')
+    for i in range(4, 150):
+        assert ring.get(f'key{i}') == f'value{i}'
+    assert not ring.migrations
+    assert ring.get('key1') == 'new_value'
+    assert ring.get('key3') == 'newer_value'
+    with pytest.raises(KeyNotFoundError):
+        ring.get('key2')
+    assert_keys_at_owners(ring)
+    assert sum(len(node.data) for node in ring.nodes()) == 149
+
+def test_removed_node_keys_are_read_until_moved():
+    ring = Ring(1_000, AVLTree(), vnodes=4, migration_chunk=5)
+    for _ in range(3):
+        ring.add_node()
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(300))
+    ring.remove_node(0)
+    assert ring.migrations
+    assert ring.get_many(f'key{i}' for i in range(300)) == {f'key{i}': f'value{i}' for i in range(300)}
+    assert not ring.migrations
+    assert_keys_at_owners(ring)
+
+def test_add_node_finishes_the_split_still_migrating():
+    ring = Ring(10, AVLTree(), migration_chunk=1)
+    for i in range(11):
+        ring.insert(f'0-key{i}', i)
+    assert ring.migrations
+    ring.add_node()
+    ring.finish_migrations()
+    assert len(ring.node_positions) == 3
+    assert ring.get_many(f'0-key{i}' for i in range(11)) == {f'0-key{i}': i for i in range(11)}
+    assert_keys_at_owners(ring)
+
+def test_remove_node_finishes_its_migration():
+    ring = Ring(10, AVLTree(), migration_chunk=1)
+    for i in range(11):
+        ring.insert(f'0-key{i}', i)
+    for i in range(3):
+        ring.delete(f'0-key{i}')
+    source = ring.migrations[0].source
+    assert ring.remove_node(source.index)
+    assert ring.get_many(f'0-key{i}' for i in range(3, 11)) == {f'0-key{i}': i for i in range(3, 11)}
+    assert_keys_at_owners(ring)
+
+def test_create_node_on_a_taken_position_raises():
+    ring = Ring(10, AVLTree())
+    with pytest.raises(PositionTakenError):
+        ring._create_node(next(iter(ring.node_positions)))
+
+def test_rate_limiter_caps_keys_per_second():
+    clock = FakeClock()
+    limiter = RateLimiter(keys_per_second=100, burst=0.1, clock=clock)
+    ring = Ring(1_000, AVLTree(), vnodes=4, migration_chunk=5, migration_limiter=limiter)
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(500))
+    ring.add_node()
+    migration = ring.migrations[0]
+    for _ in range(20):
+        ring.get('key0')
+    assert migration.keys_moved <= 10 + 5         # The burst and one chunk of overdraft
+    clock.now += 1.0
+    ring.get('key0')
+    assert migration.keys_moved <= 10 + 10 + 5     # The bucket refills up to the burst only
+    assert limiter.allows() is False
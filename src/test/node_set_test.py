@@ -0,0 +1,29 @@
+import pytest
+from src.consistent_hash_ring.node_set import NodeSet
+
+def test_insert_get_delete():
+    node_set = NodeSet(0, 3, 10)
+    node_set.insert('key', 'item')
+    assert all(node.get('key') == 'item' for node in node_set.list_nodes())
+    assert node_set.update('key', 'new_item') == 'item'
+    assert node_set.get('key') == 'new_item'
+    node_set.delete('key')
+    assert not node_set.has_key('key')
+
+def test_import_export_keys():
+    node_set1 = NodeSet(0, 2, 10)
+    node_set2 = NodeSet(1, 2, 10)
+    for i in range(4):
+        node_set1.insert(f'key{i}', f'item{i}')
+    node_set1.export_keys(node_set2)
+    assert not any(node_set1.has_key(f'key{i}') for i in range(4))
+    assert all(node_set2.get(f'key{i}') == f'item{i}' for i in range(4))
+    node_set1.import_keys(node_set2)
+    assert all(node_set1.get(f'key{i}') == f'item{i}' for i in range(4))
+    assert node_set2.get('key0') is None
+
+def test_calc_mid_hash():
+    node_set = NodeSet(0, 2, 10)
+    for i in range(4):
+        node_set.insert(f'key{i}', f'item{i}')
+    assert node_set.calc_mid_hash() == node_set.get_replica(1).calc_mid_hash()
@@ -166,10 +166,84 @@ def test_clean_keys():
     node.insert(key2, item2)
     node.insert(key3, item3)
 
-    node.keys_to_delete.append(key1)
-    node.keys_to_delete.append(key2)
-    node.clean_keys()
+    node.clean_keys([key1, key2])
     
     assert not node.has_key(key1)
     assert not node.has_key(key2)
-    assert node.has_key(key3)
\ No newline at end of file
+    assert node.has_key(key3)
+# Cached key hashes
+class CountingHasher:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        return hash(key)
+
+def test_key_hashes_are_cached():
+    hasher = CountingHasher()
+    node1 = Node(0, 10, 1, hasher=hasher)
+    node2 = Node(1, 10, 1, hasher=hasher)
+    for i in range(10):
+        node1.insert(f'key{i}', f'item{i}')
+    assert hasher.calls == 10
+
+    node1.export_keys(node2, node1.calc_mid_hash())
+    assert hasher.calls == 10
+    for key in node2.data:
+        assert node2.get_key_hash(key) == hash(key)
+
+def test_insert_with_known_hash():
+    hasher = CountingHasher()
+    node = Node(0, 10, 1, hasher=hasher)
+    node.insert('key', 'item', 42)
+    assert hasher.calls == 0
+    assert node.get_key_hash('key') == 42
+    node.delete('key')
+    assert 'key' not in node.key_hashes
+
+# Median split
+def test_keys_ordered_by_hash():
+    node = Node(0, 10, 1)
+    for key_hash in [50, 10, 40, 20, 30]:
+        node.insert(f'key{key_hash}', f'item{key_hash}', key_hash)
+    node.delete('key40')
+    assert node.sorted_hashes == [10, 20, 30, 50]
+    assert node.sorted_keys == ['key10', 'key20', 'key30', 'key50']
+
+def test_calc_median_hash():
+    node = Node(0, 10, 1)
+    for key_hash in [1, 2, 3, 1_000_000]:
+        node.insert(f'key{key_hash}', f'item{key_hash}', key_hash)
+    assert node.calc_mid_hash() > 3         # The mean is dragged by the outlier
+    assert node.calc_median_hash() == 3
+
+def test_export_upper_half():
+    node1 = Node(0, 10, 1)
+    node2 = Node(1, 10, 1)
+    for key_hash in range(10):
+        node1.insert(f'key{key_hash}', f'item{key_hash}', key_hash)
+    assert node1.export_upper_half(node2) == 5
+    assert node1.sorted_hashes == [0, 1, 2, 3, 4]
+    assert node2.sorted_hashes == [5, 6, 7, 8, 9]
+    assert set(node2.data) == {f'key{key_hash}' for key_hash in range(5, 10)}
+    assert node2.get_key_hash('key7') == 7
+
+def test_export_upper_half_wrapping_node():
+    # Node placed at 100 also owns the arc that wraps around the ring, before the first position
+    node1 = Node(100, 10, 1)
+    node2 = Node(1, 10, 1)
+    for key_hash in [100, 110, 120, 1, 2, 3]:
+        node1.insert(f'key{key_hash}', f'item{key_hash}', key_hash)
+    assert node1.calc_median_hash(100) == 1
+    assert node1.export_upper_half(node2, 100) == 1
+    assert node1.sorted_hashes == [100, 110, 120]
+    assert node2.sorted_hashes == [1, 2, 3]
+
+def test_export_upper_half_same_hashes():
+    node1 = Node(0, 10, 1)
+    node2 = Node(1, 10, 1)
+    for i in range(4):
+        node1.insert(f'key{i}', f'item{i}', 7)
+    assert node1.export_upper_half(node2) is None
+    assert len(node1.data) == 4
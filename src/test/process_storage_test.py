@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.async_ring import AsyncRing
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError
+from src.consistent_hash_ring.process_storage import decode_fields, encode_fields, spawn_worker
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.ring import Ring
+
+def test_fields_round_trip():
+    fields = [b'key', b'', b'\x00' * 300]
+    assert decode_fields(encode_fields(fields)) == fields
+    assert decode_fields(b'') == []
+
+def test_worker_that_can_not_listen_raises(tmp_path):
+    socket_dir = tmp_path / ('d' * 120)         # Past the 108 bytes of a unix socket path
+    socket_dir.mkdir()
+    with pytest.raises(RuntimeError, match='exited with code 1'):
+        spawn_worker(Node(0, 10), str(socket_dir))
+
+def test_keys_migrate_between_worker_processes(tmp_path):
+    async def scenario():
+        ring = Ring(10_000, AVLTree(), vnodes=4)
+        async_ring = AsyncRing(ring, lambda node: spawn_worker(node, str(tmp_path)))
+        try:
+            await async_ring.add_node()
+            await async_ring.insert_many((f'key{i}', {'value': i}) for i in range(500))
+            await async_ring.update('key1', 'new_value')
+            assert await async_ring.delete('key2') == {'value': 2}
+
+            await async_ring.add_node()
+            await async_ring.remove_node(0)
+            await async_ring.wait_for_migrations()
+            processes = [storage.process for storage in async_ring.storages.values()]
+            assert len(processes) == 2 and all(process.is_alive() for process in processes)
+
+            values = await async_ring.get_many(f'key{i}' for i in range(3, 500))
+            assert values == {f'key{i}': {'value': i} for i in range(3, 500)}
+            assert await async_ring.get('key1') == 'new_value'
+            with pytest.raises(KeyNotFoundError):
+                await async_ring.get('key2')
+        finally:
+            await async_ring.close()
+        assert not any(process.is_alive() for process in processes)
+    asyncio.run(scenario())
@@ -0,0 +1,144 @@
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.concurrent_ring import ConcurrentRing
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError
+from src.consistent_hash_ring.read_cache import FrequencySketch, ReadCache
+from src.consistent_hash_ring.ring import Ring
+from src.metrics import Metrics
+
+def test_sketch_counts_and_ages():
+    sketch = FrequencySketch(16)
+    for _ in range(5):
+        sketch.increment('hot')
+    assert sketch.estimate('hot') >= 5
+    assert sketch.estimate('never read') <= 1
+    for i in range(sketch.sample_size):
+        sketch.increment(f'key{i}')
+    assert sketch.ages >= 1
+    assert sketch.estimate('hot') < 5
+
+def test_sketch_saturates():
+    sketch = FrequencySketch(1024)
+    for _ in range(100):
+        sketch.increment('hot')
+    assert sketch.estimate('hot') == 15
+
+def test_cache_is_bounded_and_keeps_frequent_keys():
+    cache = ReadCache(100, admission=True, window_fraction=0.1)
+    for _ in range(5):
+        for i in range(50):
+            if cache.get(f'hot{i}') is None:
+                cache.put(f'hot{i}', i, i, 0)
+    for i in range(1000):           # A scan of keys read once
+        if cache.get(f'cold{i}') is None:
+            cache.put(f'cold{i}', i, i, 0)
+    assert len(cache) <= 100
+    assert cache.evictions > 0
+    assert sum(cache.get(f'hot{i}') is not None for i in range(50)) >= 45
+
+def test_cache_hit_ratio_and_invalidate():
+    cache = ReadCache(10, admission=True)
+    assert cache.get('a') is None
+    cache.put('a', 'value', 1, 0)
+    assert cache.get('a') == ('value', 1, 0)
+    assert cache.hit_ratio == 0.5
+    cache.invalidate('a')
+    assert cache.get('a') is None
+
+def test_hot_keys_per_node():
+    cache = ReadCache(100, top_k=2)
+    reads = {('a', 0): 8, ('b', 0): 6, ('c', 0): 2, ('d', 1): 3}
+    for (key, node), count in reads.items():
+        for _ in range(count):
+            if cache.get(key) is None:
+                cache.put(key, key, hash(key), node)
+    hot = cache.hot_keys()
+    assert [key for key, _ in hot[0]] == ['a', 'b']
+    assert [key for key, _ in hot[1]] == ['d']
+    cache.reassign_hot_keys(lambda key_hash: 1)
+    assert [key for key, _ in cache.hot_keys()[1]] == ['a', 'b']
+
+def test_ring_serves_and_invalidates_cached_reads():
+    ring = Ring(1000, AVLTree(), read_cache=ReadCache(100))
+    ring.insert('key', 'old')
+    assert ring.get('key') == 'old'
+    assert ring.get('key') == 'old'
+    assert ring.read_cache.hits == 1
+    ring.update('key', 'new')
+    assert ring.get('key') == 'new'
+    ring.insert('key', 'newer')
+    assert ring.get('key') == 'newer'
+    ring.insert_many([('key', 'batch')])
+    assert ring.get('key') == 'batch'
+    ring.delete('key')
+    with pytest.raises(KeyNotFoundError):
+        ring.get('key')
+    ring.insert('key', 'back')
+    ring.get('key')
+    ring.delete_many(['key'])
+    with pytest.raises(KeyNotFoundError):
+        ring.get('key')
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_topology_changes_drop_moved_keys(vnodes):
+    ring = Ring(20, AVLTree(), vnodes=vnodes, read_cache=ReadCache(1000, admission=True, top_k=3))
+    for i in range(10):
+        ring.insert(f'key{i}', i)
+        ring.get(f'key{i}')
+    for i in range(10, 200):        # Splits the nodes
+        ring.insert(f'key{i}', i)
+    for key, key_hash, node_index in ring.read_cache.entries():
+        assert ring._find_node(key_hash).index == node_index
+    for index, hot in ring.read_cache.hot_keys().items():
+        assert all(ring._find_node(ring.hasher(key)).index == index for key, _ in hot)
+    assert all(ring.get(f'key{i}') == i for i in range(200))
+
+    for i in range(190):            # Merges them back
+        ring.delete(f'key{i}')
+    assert all(ring.get(f'key{i}') == i for i in range(190, 200))
+    for key, key_hash, node_index in ring.read_cache.entries():
+        assert ring._find_node(key_hash).index == node_index
+
+def test_cache_metrics():
+    metrics = Metrics()
+    ring = Ring(100, AVLTree(), read_cache=ReadCache(10), metrics=metrics)
+    ring.insert('key', 1)
+    for _ in range(4):
+        ring.get('key')
+    values = {name: metrics.as_dict()[name][0]['value'] for name in ('ring_cache_hits', 'ring_cache_misses', 'ring_cache_hit_ratio')}
+    assert values == {'ring_cache_hits': 3, 'ring_cache_misses': 1, 'ring_cache_hit_ratio': 0.75}
+
+def test_concurrent_ring_with_cache_is_exclusive():
+    ring = ConcurrentRing(100, AVLTree(), read_cache=ReadCache(10))
+    assert ring.exclusive
+    ring.insert('key', 1)
+    assert ring.get('key') == 1
+
+def test_lru_without_admission():
+    cache = ReadCache(3, admission=False)
+    assert cache.sketch is None
+    for key in 'abc':
+        cache.put(key, key, 0, 0)
+    cache.get('a')
+    cache.put('d', 'd', 0, 0)           # Evicts b, the least recently used
+    assert cache.get('b') is None
+    assert [cache.get(key)[0] for key in 'acd'] == ['a', 'c', 'd']
+    assert cache.evictions == 1
+
+def test_hot_keys_count_misses():
+    cache = ReadCache(2, top_k=3)
+    for _ in range(50):
+        for key in ['a', 'b', 'c']:         # Read in a cycle, every read misses the LRU
+            if cache.get(key) is None:
+                cache.put(key, key, hash(key), 0)
+    assert cache.hits == 0
+    assert sorted(key for key, _ in cache.hot_keys()[0]) == ['a', 'b', 'c']
+
+def test_deleted_keys_are_not_hot():
+    ring = Ring(100, AVLTree(), read_cache=ReadCache(10, top_k=2))
+    for key in ['k1', 'k2']:
+        ring.insert(key, key)
+        for _ in range(5):
+            ring.get(key)
+    ring.delete('k1')
+    assert [key for hot in ring.read_cache.hot_keys().values() for key, _ in hot] == ['k2']
@@ -0,0 +1,52 @@
+import pytest
+from src.consistent_hash_ring.errors.node_errors import KeyNotFoundError, NodeIsFullError
+from src.consistent_hash_ring.errors.ring_errors import NodeNotFoundError
+from src.rendezvous_hash.rendezvous_hash import RendezvousHash
+
+def test_insert_get_update_delete():
+    table = RendezvousHash(4, 1000)
+    for i in range(200):
+        table.insert(f'key{i}', f'value{i}')
+    assert sum(len(node.data) for node in table.nodes()) == 200
+    table.update('key1', 'new_value')
+    assert table.get('key1') == 'new_value'
+    assert table.delete('key2') == 'value2'
+    with pytest.raises(KeyNotFoundError):
+        table.delete('key2')
+
+def test_full_node_raises():
+    table = RendezvousHash(1, 1)
+    table.insert('a', 1)
+    with pytest.raises(NodeIsFullError):
+        table.insert('b', 2)
+
+def test_keys_are_balanced():
+    table = RendezvousHash(4, 10_000)
+    for i in range(4000):
+        table.insert(f'key{i}', f'value{i}')
+    assert all(800 < len(node.data) < 1200 for node in table.nodes())
+
+def test_add_node_only_takes_keys_from_others():
+    table = RendezvousHash(4, 10_000)
+    for i in range(2000):
+        table.insert(f'key{i}', f'value{i}')
+    owners = {key: node.index for node in table.nodes() for key in node.data}
+    node = table.add_node()
+    assert 0 < len(node.data) < 2000 * 0.3
+    for other in table.nodes():
+        assert all(owners[key] == other.index for key in other.data if other is not node)
+    for i in range(2000):
+        assert table.get(f'key{i}') == f'value{i}'
+
+def test_remove_node_keeps_other_keys_in_place():
+    table = RendezvousHash(4, 10_000)
+    for i in range(2000):
+        table.insert(f'key{i}', f'value{i}')
+    owners = {key: node.index for node in table.nodes() for key in node.data}
+    table.remove_node(1)
+    for node in table.nodes():
+        assert all(owners[key] in (node.index, 1) for key in node.data)
+    for i in range(2000):
+        assert table.get(f'key{i}') == f'value{i}'
+    with pytest.raises(NodeNotFoundError):
+        table.remove_node(1)
@@ -1,7 +1,10 @@
+import random
 import pytest
 from src.consistent_hash_ring.ring import Ring
 from src.consistent_hash_ring.node import Node
 from src.adt.binary_search_tree import BinarySearchTree
+from src.adt.avl_tree import AVLTree
+from src.adt.sorted_array import SortedArray
 from src.consistent_hash_ring.errors.node_errors import *
 from src.consistent_hash_ring.errors.ring_errors import *
 
@@ -72,3 +75,360 @@ def delete_non_existent_element():
         ring.delete('key')
     
     
+
+# Virtual nodes
+def test_vnodes_initialization():
+    ring = Ring(10, BinarySearchTree(), vnodes=8)
+    assert len(ring.node_positions[0]) == 8
+    assert len(list(ring.ring)) == 8
+    assert len(list(ring.nodes())) == 1
+
+def test_vnodes_insert_many_elements():
+    ring = Ring(10, AVLTree(), vnodes=8)
+    for i in range(200):
+        ring.insert(f'key{i}', f'value{i}')
+    for i in range(200):
+        assert ring.get(f'key{i}') == f'value{i}'
+    nodes = list(ring.nodes())
+    assert len(nodes) > 1
+    assert sum(len(node.data) for node in nodes) == 200
+    assert all(not node.load > 1 for node in nodes)
+
+def test_vnodes_add_node_takes_keys_from_many_nodes():
+    ring = Ring(1_000, AVLTree(), vnodes=16)
+    for _ in range(3):
+        ring.add_node()
+    for i in range(400):
+        ring.insert(f'key{i}', f'value{i}')
+    before = {node.index: len(node.data) for node in ring.nodes()}
+    new_node = ring.add_node()
+    after = {node.index: len(node.data) for node in ring.nodes()}
+    donors = [index for index in before if after[index] < before[index]]
+    assert len(donors) > 1
+    assert sum(before.values()) - sum(after[index] for index in before) == len(new_node.data)
+    for i in range(400):
+        assert ring.get(f'key{i}') == f'value{i}'
+
+def test_vnodes_remove_node():
+    ring = Ring(1_000, AVLTree(), vnodes=16)
+    for _ in range(3):
+        ring.add_node()
+    for i in range(400):
+        ring.insert(f'key{i}', f'value{i}')
+    ring.remove_node(0)
+    assert 0 not in ring.node_positions
+    assert len(list(ring.ring)) == 3 * 16
+    for i in range(400):
+        assert ring.get(f'key{i}') == f'value{i}'
+
+def test_remove_first_node_wraps_around():
+    ring = Ring(2, AVLTree())
+    for i in range(10):
+        ring.insert(f'key{i}', f'value{i}')
+    ring.remove_node(0)
+    for i in range(10):
+        assert ring.get(f'key{i}') == f'value{i}'
+
+def test_remove_unexistent_node():
+    ring = Ring(2, AVLTree())
+    with pytest.raises(NodeNotFoundError):
+        ring.remove_node(42)
+
+# Batch operations
+def test_insert_many_get_many():
+    ring = Ring(10, AVLTree())
+    items = [(f'key{i}', f'value{i}') for i in range(500)]
+    ring.insert_many(items)
+    assert ring.get_many(key for key, _ in items) == dict(items)
+    for key, value in items:
+        assert ring.get(key) == value
+    assert all(node.load <= 1 for node in ring.nodes())
+
+def test_insert_many_vnodes():
+    ring = Ring(50, AVLTree(), vnodes=8)
+    items = [(f'key{i}', f'value{i}') for i in range(500)]
+    ring.insert_many(items)
+    assert ring.get_many(key for key, _ in items) == dict(items)
+    assert all(node.load <= 1 for node in ring.nodes())
+
+def test_get_many_non_existent_element():
+    ring = Ring(10, AVLTree())
+    ring.insert('key', 'value')
+    with pytest.raises(KeyNotFoundError):
+        ring.get_many(['key', 'other_key'])
+
+def test_delete_many():
+    ring = Ring(10, AVLTree(), node_min_load=0.2)
+    items = [(f'key{i}', f'value{i}') for i in range(200)]
+    ring.insert_many(items)
+    removed = ring.delete_many(f'key{i}' for i in range(150))
+    assert removed == dict(items[:150])
+    for i in range(150, 200):
+        assert ring.get(f'key{i}') == f'value{i}'
+    assert sum(len(node.data) for node in ring.nodes()) == 50
+
+def test_delete_many_non_existent_element_deletes_nothing():
+    ring = Ring(10, AVLTree())
+    ring.insert('key', 'value')
+    with pytest.raises(KeyNotFoundError):
+        ring.delete_many(['key', 'other_key'])
+    assert ring.get('key') == 'value'
+
+def test_split_halves_the_node():
+    ring = Ring(100, AVLTree())
+    for i in range(101):
+        ring.insert(f'key{i}', f'value{i}')
+    assert sorted(len(node.data) for node in ring.nodes()) == [50, 51]
+
+# Replication
+def assert_replicated(ring):
+    for position, (arc_end, owner, replicas) in ring.replica_plan.items():
+        assert len({owner, *replicas}) == min(ring.replication_factor, len(ring.node_positions))
+        for replica in replicas:
+            assert replica.replicas[position] == owner.items_in_arc(position, arc_end)
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_replicated_ring(vnodes):
+    ring = Ring(20, AVLTree(), vnodes=vnodes, replication_factor=3)
+    for i in range(300):
+        ring.insert(f'key{i}', f'value{i}')
+    assert_replicated(ring)
+    for i in range(300):
+        assert ring.get(f'key{i}') == f'value{i}'
+
+def test_replicated_update_delete():
+    ring = Ring(20, AVLTree(), node_min_load=0.2, replication_factor=2)
+    for i in range(100):
+        ring.insert(f'key{i}', f'value{i}')
+    for i in range(50):
+        ring.update(f'key{i}', f'new_value{i}')
+    for i in range(50, 100):
+        ring.delete(f'key{i}')
+    assert_replicated(ring)
+    for i in range(50):
+        assert ring.get(f'key{i}') == f'new_value{i}'
+    with pytest.raises(KeyNotFoundError):
+        ring.get('key70')
+
+def test_replicated_batches():
+    ring = Ring(20, AVLTree(), replication_factor=3)
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(300))
+    ring.delete_many(f'key{i}' for i in range(100))
+    assert_replicated(ring)
+    assert ring.get('key150') == 'value150'
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_small_batches_copy_only_the_arcs_they_touch(vnodes, monkeypatch):
+    ring = Ring(40, AVLTree(), vnodes=vnodes, node_min_load=0.1, replication_factor=2)
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(300))
+    copies = []
+    store_replica = Node.store_replica
+    monkeypatch.setattr(Node, 'store_replica', lambda node, arc, items: (copies.append(arc), store_replica(node, arc, items)))
+    new_key = next(key for key in (f'new{i}' for i in range(100)) if not ring._find_node(ring.hasher(key)).is_full())
+    ring.insert_many([(new_key, 'value')])
+    position, _ = ring._find_arc(ring.hasher(new_key))
+    assert copies == [position]
+    copies.clear()
+    ring.delete_many([new_key, 'key1'])
+    assert set(copies) <= {position, ring._find_arc(ring.hasher('key1'))[0]}
+    assert_replicated(ring)
+    ring.delete_many(f'key{i}' for i in range(2, 280))       # Merges nodes: the changed arcs are copied too
+    assert_replicated(ring)
+    assert ring.get_many(f'key{i}' for i in range(280, 300)) == {f'key{i}': f'value{i}' for i in range(280, 300)}
+
+def test_reads_are_spread_over_replicas():
+    ring = Ring(1_000, AVLTree(), vnodes=4, replication_factor=3)
+    for _ in range(3):
+        ring.add_node()
+    ring.insert('key', 'value')
+    for _ in range(30):
+        assert ring.get('key') == 'value'
+    position, owner = ring._find_arc(ring.hasher('key'))
+    readers = (owner,) + ring.replica_plan[position][2]
+    assert [node.reads_served for node in readers] == [10, 10, 10]
+
+def assert_bounded(ring):
+    room = ring._bounded_room(ring.keys_count)
+    assert sum(len(node.data) for node in ring.nodes()) == ring.keys_count
+    assert max(len(node.data) for node in ring.nodes()) <= room
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_bounded_load_caps_node_load(vnodes):
+    ring = Ring(10_000, AVLTree(), vnodes=vnodes, load_bound=0.25)
+    keys = [f'key{i}' for i in range(2000)]
+    for key in keys[:100]:
+        ring.insert(key, key)
+    for _ in range(7):
+        ring.add_node()
+    for key in keys[100:]:
+        ring.insert(key, key)
+    assert_bounded(ring)
+    assert ring.spilled
+    for key in keys:
+        assert ring.get(key) == key
+
+def test_bounded_load_update_delete():
+    ring = Ring(10_000, AVLTree(), vnodes=4, load_bound=0.1)
+    for _ in range(3):
+        ring.add_node()
+    for i in range(1000):
+        ring.insert(f'key{i}', f'value{i}')
+    spilled_key = next(iter(ring.spilled))
+    ring.update(spilled_key, 'new_value')
+    assert ring.get(spilled_key) == 'new_value'
+    assert ring.delete(spilled_key) == 'new_value'
+    assert spilled_key not in ring.spilled
+    with pytest.raises(KeyNotFoundError):
+        ring.get(spilled_key)
+    for i in range(0, 1000, 2):
+        if f'key{i}' != spilled_key:
+            ring.delete(f'key{i}')
+    assert ring.keys_count == 500 - (int(spilled_key[3:]) % 2)
+    with pytest.raises(KeyNotFoundError):
+        ring.delete('key0')
+
+def test_bounded_load_topology_change_places_spilled_keys_again():
+    ring = Ring(100, AVLTree(), vnodes=4, load_bound=0.2)
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(1000))
+    assert len(ring.node_positions) >= 10       # Scaled up when the ring reached its capacity
+    ring.remove_node(next(iter(ring.node_positions)))
+    ring.add_node()
+    assert_bounded(ring)
+    assert ring.get_many(f'key{i}' for i in range(1000)) == {f'key{i}': f'value{i}' for i in range(1000)}
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_bounded_load_holds_after_add_node_and_deletes(vnodes):
+    ring = Ring(10_000, AVLTree(), vnodes=vnodes, load_bound=0.1)
+    for _ in range(7):
+        ring.add_node()
+    ring.insert_many((f'key{i}', i) for i in range(8000))
+    ring.add_node()
+    assert_bounded(ring)
+    for i in range(0, 8000, 2):
+        ring.delete(f'key{i}')
+        assert max(len(node.data) for node in ring.nodes()) <= ring._bounded_room(ring.keys_count)
+    assert_bounded(ring)
+    assert ring.get_many(f'key{i}' for i in range(1, 8000, 2)) == {f'key{i}': i for i in range(1, 8000, 2)}
+
+@pytest.mark.parametrize('vnodes, seed, kept', [(1, 7, 44), (4, 7, 86)])
+def test_bounded_load_remove_node_keeps_every_key(vnodes, seed, kept):
+    ring = Ring(20, AVLTree(), vnodes=vnodes, load_bound=0.25)
+    keys = [f'key{i}' for i in range(150)]
+    ring.insert_many((key, key) for key in keys)
+    random.Random(seed).shuffle(keys)
+    for key in keys[kept:]:
+        ring.delete(key)
+    for index in list(ring.node_positions):
+        removed = ring.remove_node(index)
+        assert removed == (index not in ring.node_positions)
+        assert_bounded(ring)
+        assert ring.keys_count == kept
+    assert len(ring.node_positions) * 20 >= kept
+    ring.add_node()
+    assert ring.get_many(keys[:kept]) == {key: key for key in keys[:kept]}
+
+def test_bounded_load_with_replication_raises():
+    with pytest.raises(ValueError):
+        Ring(10, AVLTree(), replication_factor=2, load_bound=0.5)
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_routing_snapshot_follows_topology(vnodes):
+    ring = Ring(20, AVLTree(), node_min_load=0.2, vnodes=vnodes)
+    snapshot = ring.routing
+    ring.insert_many((f'key{i}', f'value{i}') for i in range(500))
+    assert ring.routing is not snapshot
+    snapshot = ring.routing
+    ring.update('key1', 'new_value')
+    assert ring.routing is snapshot             # Only topology changes publish a new snapshot
+    for i in range(0, 500, 3):
+        ring.delete(f'key{i}')
+    assert len(ring.routing[1]) == len(list(ring.ring))
+    for key_hash in range(0, ring.hasher.space, ring.hasher.space // 997):
+        assert ring._route(key_hash) is ring._find_node(key_hash)
+    assert ring.get('key1') == 'new_value'
+
+@pytest.mark.parametrize('vnodes', [1, 8])
+def test_route_cache_follows_topology_epoch(vnodes):
+    ring = Ring(20, AVLTree(), node_min_load=0.2, vnodes=vnodes, route_cache_size=100)
+    for i in range(300):
+        ring.insert(f'key{i}', i)
+    assert len(ring.route_cache) == 100
+    epoch = ring.topology_epoch
+    assert all(ring.get(f'key{i}') == i for i in range(300))
+    assert ring.topology_epoch == epoch
+    for i in range(250):            # Merges nodes: the cached owners go stale
+        ring.delete(f'key{i}')
+    assert ring.topology_epoch > epoch
+    for i in range(250, 300):
+        key_hash, node = ring._locate(f'key{i}')
+        assert node is ring._find_node(key_hash)
+        assert ring.get(f'key{i}') == i
+    for epoch, key_hash, node in ring.route_cache.values():
+        assert epoch < ring.topology_epoch or node is ring._find_node(key_hash)
+
+def test_route_cache_evicts_the_least_recently_used_key():
+    ring = Ring(1_000, AVLTree(), route_cache_size=3)
+    for key in ['a', 'b', 'c']:
+        ring.insert(key, key)
+    ring.get('a')                   # Read again, so 'b' is now the least recently used
+    ring.insert('d', 'd')
+    assert list(ring.route_cache) == ['c', 'a', 'd']
+
+@pytest.mark.parametrize('vnodes', [4, 16])
+def test_vnodes_split_takes_keys_from_the_full_node(vnodes):
+    ring = Ring(20, AVLTree(), vnodes=vnodes)
+    for i in range(20):
+        ring.insert(f'key{i}', i)
+    full = next(ring.nodes())
+    new_node = ring._split_node(full)
+    assert len(ring.node_positions[new_node.index]) == vnodes
+    assert 5 <= len(new_node.data) <= 15
+    assert len(full.data) + len(new_node.data) == 20
+
+def test_vnodes_splits_fill_nodes_like_single_positions():
+    for vnodes in [1, 4]:
+        ring = Ring(20, AVLTree(), vnodes=vnodes)
+        for i in range(2000):
+            ring.insert(f'key{i}', i)
+        assert 2000 / (len(ring.node_positions) * 20) > 0.5
+
+@pytest.mark.parametrize('keys_count', [0, 1])
+def test_add_node_without_keys_to_split(keys_count):
+    ring = Ring(10, AVLTree())
+    for i in range(keys_count):
+        ring.insert(f'key{i}', i)
+    first = ring.add_node()
+    assert first.index == ring.hasher.space // 2
+    second = ring.add_node()
+    assert len(ring.node_positions) == 3
+    assert len({first.index, second.index, 0}) == 3
+    for i in range(keys_count):
+        assert ring.get(f'key{i}') == i
+        assert ring._find_node(ring.hasher(f'key{i}')).has_key(f'key{i}')
+
+def test_multi_position_changes_rebuild_the_sorted_array_once():
+    adt = SortedArray()
+    rebuilds = []
+    rebuild = adt._rebuild
+    adt._rebuild = lambda items: (rebuilds.append(len(items)), rebuild(items))
+    ring = Ring(10_000, adt, vnodes=8)
+    ring.insert_many((f'key{i}', i) for i in range(500))
+    rebuilds.clear()
+    new_node = ring.add_node()
+    assert rebuilds == [16]
+    rebuilds.clear()
+    assert ring.remove_node(new_node.index)
+    assert rebuilds == [8]
+    assert ring.get_many(f'key{i}' for i in range(500)) == {f'key{i}': i for i in range(500)}
+
+def test_batch_split_rebuilds_the_sorted_array_once():
+    adt = SortedArray()
+    rebuilds = []
+    rebuild = adt._rebuild
+    adt._rebuild = lambda items: (rebuilds.append(len(items)), rebuild(items))
+    ring = Ring(100, adt)
+    rebuilds.clear()
+    ring.insert_many((f'key{i}', i) for i in range(450))
+    assert len(ring.node_positions) >= 5
+    assert len(rebuilds) == 1
+    assert ring.get_many(f'key{i}' for i in range(450)) == {f'key{i}': i for i in range(450)}
@@ -0,0 +1,98 @@
+import pytest
+from src.adt.avl_tree import AVLTree
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.ring import Ring
+from src.consistent_hash_ring.scaling_policy import ScalingPolicy
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def fill(node: Node, keys_count: int)->Node:
+    for i in range(keys_count):
+        node.insert(f'key{i}', f'item{i}', i)
+    return node
+
+def test_invalid_bands():
+    with pytest.raises(ValueError):
+        ScalingPolicy(split_load=0.8, merge_load=0.4)
+    with pytest.raises(ValueError):
+        ScalingPolicy(split_load=1.5)
+
+def test_split_and_merge_thresholds():
+    policy = ScalingPolicy(split_load=0.8, merge_load=0.2)
+    assert policy.should_split(fill(Node(0, 10), 8))
+    assert not policy.should_split(fill(Node(0, 10), 7))
+    assert policy.should_merge(fill(Node(0, 10), 1))
+    assert not policy.should_merge(fill(Node(0, 10), 2))
+
+def test_can_absorb():
+    policy = ScalingPolicy(split_load=0.8, merge_load=0.2)
+    node = fill(Node(0, 10), 5)
+    assert policy.can_absorb(node, 2)
+    assert not policy.can_absorb(node, 3)
+
+def test_cooldown():
+    clock = FakeClock()
+    policy = ScalingPolicy(split_load=0.8, merge_load=0.2, cooldown=5, clock=clock)
+    node = fill(Node(0, 10), 8)
+    policy.record_split(node.index)
+    assert not policy.should_split(node)
+    fill(node, 10)
+    assert policy.should_split(node)            # A full node is split even while cooling down
+    clock.now = 6
+    empty_node = Node(0, 10)
+    assert policy.should_merge(empty_node)
+
+def test_stats():
+    clock = FakeClock()
+    policy = ScalingPolicy(clock=clock)
+    policy.record_split(0, 1)
+    policy.record_split(1, 2)
+    policy.record_merge(0)
+    clock.now = 2
+    stats = policy.stats()
+    assert stats['splits'] == 2
+    assert stats['merges'] == 1
+    assert stats['splits_per_second'] == 1
+    policy.reset_stats()
+    assert policy.stats()['splits'] == 0
+
+def test_ring_counts_splits_and_merges():
+    ring = Ring(10, AVLTree(), node_min_load=0.2)
+    for i in range(50):
+        ring.insert(f'key{i}', f'value{i}')
+    assert ring.policy.splits == len(list(ring.nodes())) - 1
+    for i in range(45):
+        ring.delete(f'key{i}')
+    assert ring.policy.merges > 0
+    for i in range(45, 50):
+        assert ring.get(f'key{i}') == f'value{i}'
+
+def test_merge_picks_lighter_neighbour():
+    ring = Ring(10, AVLTree(), node_min_load=0.2)
+    for position in [100, 200]:
+        ring._create_node(position)
+    first, middle, last = [ring.ring.search(position) for position in [0, 100, 200]]
+    fill(first, 6)
+    middle.insert('middle', 'item', 150)
+    last.insert('last', 'item', 250)
+    assert ring._merge_node(middle)
+    # The successor is lighter than the predecessor, so the middle node keeps both arcs
+    assert 200 not in ring.node_positions
+    assert middle.get('last') == 'item'
+    assert ring._find_node(250) is middle
+    assert len(first.data) == 6
+
+def test_merge_rejected_without_capacity():
+    ring = Ring(10, AVLTree(), node_min_load=0.2)
+    ring._create_node(100)
+    first, second = ring.ring.search(0), ring.ring.search(100)
+    fill(first, 9)
+    second.insert('second', 'item', 150)
+    assert not ring._merge_node(second)
+    assert ring.policy.rejected_merges == 1
+    assert ring._find_node(150) is second
@@ -0,0 +1,90 @@
+import pytest
+from src.adt.array_avl_tree import ArrayAVLTree
+from src.adt.avl_tree import AVLTree
+from src.adt.sorted_array import SortedArray
+from src.consistent_hash_ring.concurrent_ring import ConcurrentRing
+from src.consistent_hash_ring.log_storage import LogStorage
+from src.consistent_hash_ring.node import Node
+from src.consistent_hash_ring.ring import Ring
+from src.hash import Hasher
+
+def build_ring(adt, **kwargs):
+    ring = Ring(50, adt, **kwargs)
+    for i in range(1_000):
+        ring.insert(f'key{i}', {'value': i})
+    return ring
+
+def assert_same_ring(ring, loaded, compare_data=True):
+    assert list(loaded.ring) and [position for position, _ in loaded.ring] == [position for position, _ in ring.ring]
+    assert [node.index for _, node in loaded.ring] == [node.index for _, node in ring.ring]
+    for node in ring.nodes():
+        twin = loaded.ring.search(loaded.node_positions[node.index][0])
+        assert not compare_data or twin.data == node.data
+        assert twin.capacity == node.capacity
+        assert twin.key_hashes == node.key_hashes
+        assert twin.sorted_hashes == node.sorted_hashes
+        assert twin.sorted_keys == node.sorted_keys
+
+@pytest.mark.parametrize('adt, vnodes', [(AVLTree, 1), (SortedArray, 1), (ArrayAVLTree, 8)])
+def test_round_trip(tmp_path, adt, vnodes, monkeypatch):
+    ring = build_ring(adt(), vnodes=vnodes)
+    ring.save(str(tmp_path / 'ring.snapshot'))
+    with monkeypatch.context() as patch:        # No key is inserted, hashed again nor split to rebuild it
+        patch.setattr(Ring, '_split_node', None)
+        patch.setattr(Node, 'insert', None)
+        patch.setattr(Hasher, 'hash_many', None)
+        loaded = Ring.load(str(tmp_path / 'ring.snapshot'))
+    assert type(loaded.ring) is adt
+    assert_same_ring(ring, loaded)
+    assert all(loaded.get(f'key{i}') == {'value': i} for i in range(1_000))
+    loaded.insert('new', 'value')
+    loaded.add_node()
+    assert loaded.get('new') == 'value'
+
+def test_round_trip_with_a_reduced_hash_space(tmp_path):
+    ring = build_ring(AVLTree(), hasher=Hasher('fnv1a', 2 ** 20))
+    ring.save(str(tmp_path / 'ring.snapshot'))
+    loaded = Ring.load(str(tmp_path / 'ring.snapshot'))
+    assert loaded.hasher.space == 2 ** 20
+    assert_same_ring(ring, loaded)
+
+def test_round_trip_with_bounded_loads_and_replicas(tmp_path):
+    bounded = build_ring(AVLTree(), vnodes=4, load_bound=0.25)
+    bounded.save(str(tmp_path / 'bounded.snapshot'))
+    loaded = Ring.load(str(tmp_path / 'bounded.snapshot'))
+    assert loaded.spilled == bounded.spilled
+    assert loaded.keys_count == bounded.keys_count
+    assert all(loaded.get(f'key{i}') == {'value': i} for i in range(1_000))
+
+    replicated = build_ring(AVLTree(), vnodes=4, replication_factor=2)
+    replicated.save(str(tmp_path / 'replicated.snapshot'))
+    loaded = Ring.load(str(tmp_path / 'replicated.snapshot'))
+    assert loaded.replica_plan.keys() == replicated.replica_plan.keys()
+    assert all(loaded.get(f'key{i}') == {'value': i} for i in range(1_000))
+
+def test_load_as_concurrent_ring(tmp_path):
+    build_ring(AVLTree()).save(str(tmp_path / 'ring.snapshot'))
+    loaded = ConcurrentRing.load(str(tmp_path / 'ring.snapshot'))
+    assert isinstance(loaded, ConcurrentRing)
+    assert loaded.get('key7') == {'value': 7}
+
+def test_round_trip_on_log_storage(tmp_path):
+    storage = lambda index: LogStorage(str(tmp_path / 'nodes' / str(index)), segment_size=4096)
+    ring = build_ring(AVLTree(), node_storage=storage)
+    ring.save(str(tmp_path / 'ring.snapshot'))
+    ring.close()
+    with pytest.raises(ValueError):
+        Ring.load(str(tmp_path / 'ring.snapshot'))
+    loaded = Ring.load(str(tmp_path / 'ring.snapshot'), node_storage=storage)
+    assert_same_ring(ring, loaded, compare_data=False)
+    assert all(loaded.get(f'key{i}') == {'value': i} for i in range(1_000))
+
+def test_truncated_snapshot(tmp_path):
+    path = tmp_path / 'ring.snapshot'
+    build_ring(AVLTree()).save(str(path))
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(ValueError):
+        Ring.load(str(path))
+    path.write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError):
+        Ring.load(str(path))
@@ -0,0 +1,94 @@
+import pytest
+from array import array
+from src.adt.sorted_array import SortedArray
+from src.consistent_hash_ring.ring import Ring
+
+def test_insert_search():
+    adt = SortedArray()
+    for key in [20, 10, 30, 5]:
+        adt.insert(key, f'value{key}')
+    assert adt.search(10) == 'value10'
+    assert adt.search(11) is None
+    assert list(adt.keys) == [5, 10, 20, 30]
+    assert isinstance(adt.keys, array)
+
+def test_wide_keys_fall_back_to_list():
+    adt = SortedArray()
+    adt.insert(1, 'a')
+    adt.insert(2 ** 100, 'b')
+    assert isinstance(adt.keys, list)
+    assert adt.find_max_smaller_than(2 ** 127) == 'b'
+
+def test_update_remove():
+    adt = SortedArray()
+    adt.insert(1, 'a')
+    adt.insert(2, 'b')
+    assert adt.update(1, 'c') == 'a'
+    assert adt.update(3, 'd') is None
+    assert adt.remove(2) == 'b'
+    assert adt.remove(2) is None
+    assert list(adt) == [(1, 'c')]
+
+def test_find_max_smaller_than():
+    adt = SortedArray()
+    for key in [0, 10, 20, 30]:
+        adt.insert(key, key)
+    assert adt.find_max_smaller_than(0) == 0
+    assert adt.find_max_smaller_than(15) == 10
+    assert adt.find_max_smaller_than(20) == 20
+    assert adt.find_max_smaller_than(1000) == 30
+    assert adt.find_max_smaller_than(-1) is None
+
+def test_find_min_greater_than():
+    adt = SortedArray()
+    for key in [0, 10, 20, 30]:
+        adt.insert(key, key)
+    assert adt.find_min_greater_than(15) == 20
+    assert adt.find_min_greater_than(20) == 20
+    assert adt.find_min_greater_than(31) is None
+
+def test_batch_rebuilds_once():
+    adt = SortedArray()
+    adt.insert(10, 'a')
+    adt.insert(20, 'b')
+    with adt.batch():
+        adt.insert(15, 'c')
+        adt.insert(5, 'd')
+        assert adt.remove(10) == 'a'
+        assert adt.remove(15) == 'c'
+        assert list(adt.keys) == [10, 20]       # Not applied yet
+    assert list(adt) == [(5, 'd'), (20, 'b')]
+
+def test_reads_inside_batch_see_changes():
+    adt = SortedArray()
+    adt.insert(0, 'a')
+    with adt.batch():
+        adt.insert(10, 'b')
+        assert adt.find_max_smaller_than(12) == 'b'
+        adt.insert(20, 'c')
+    assert adt.find_max_smaller_than(25) == 'c'
+
+def test_search_inside_batch_does_not_rebuild():
+    adt = SortedArray()
+    adt.insert(10, 'a')
+    adt.insert(20, 'b')
+    with adt.batch():
+        adt.insert(15, 'c')
+        adt.remove(20)
+        assert adt.search(15) == 'c'
+        assert adt.search(20) is None
+        assert adt.search(10) == 'a'
+        assert list(adt.keys) == [10, 20]       # Not applied yet
+    assert list(adt) == [(10, 'a'), (15, 'c')]
+
+def test_bulk_load():
+    adt = SortedArray()
+    adt.bulk_load([(3, 'c'), (1, 'a'), (2, 'b')])
+    assert list(adt) == [(1, 'a'), (2, 'b'), (3, 'c')]
+
+def test_ring_with_sorted_array():
+    ring = Ring(3, SortedArray())
+    for i in range(200):
+        ring.insert(f'key{i}', f'value{i}')
+    for i in range(200):
+        assert ring.get(f'key{i}') == f'value{i}'